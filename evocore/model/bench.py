@@ -0,0 +1,292 @@
+"""
+Benchmark registered models.
+
+    python -m evocore.model.bench --models dummy --config '{"ttft": 0.05}'
+    python -m evocore.model.bench --mock --models gpt-local qwen_code_local
+    python -m evocore.model.bench --output new.json --baseline old.json
+
+Measures cold and warm latency, time to first token, tokens/second and
+throughput at several concurrency levels over a prompt corpus, writes the
+results as JSON and, given a baseline, exits non-zero on regressions.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import pathlib
+import platform
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence
+
+from evocore.model.mock_ollama import MockOllamaServer
+from evocore.model.model_manager import BaseModel, ModelManager
+from evocore.model.stats import flatten, percentile
+
+DEFAULT_CORPUS = [
+    "who are you?",
+    "Summarize the benefits of unit tests in two sentences.",
+    "Write a Python function that reverses a string.",
+    "List three HTTP methods and what they are used for.",
+]
+
+DEFAULT_CONCURRENCY = (1, 4, 16)
+
+# Metrics where a larger value is an improvement; every other timing metric
+# is treated as lower-is-better when comparing runs.
+HIGHER_IS_BETTER = ("tokens_per_second", "throughput_rps")
+COUNT_METRICS = ("requests", "errors", "tokens")
+
+
+@dataclass
+class Sample:
+    latency: float
+    ttft: float
+    tokens: int
+
+
+def _chunk_text(chunk: Any) -> str:
+    return chunk if isinstance(chunk, str) else getattr(chunk, "content", "")
+
+
+def _count_tokens(chunks: List[Any]) -> int:
+    for chunk in reversed(chunks):
+        usage = getattr(chunk, "usage_metadata", None)
+        if usage:
+            return usage.get("output_tokens", 0)
+    return sum(1 for chunk in chunks if _chunk_text(chunk))
+
+
+async def measure(model: BaseModel, prompt: Any) -> Sample:
+    start = time.perf_counter()
+    ttft = None
+    chunks = []
+    async for chunk in model.astream(prompt):
+        if ttft is None and _chunk_text(chunk):
+            ttft = time.perf_counter() - start
+        chunks.append(chunk)
+    latency = time.perf_counter() - start
+    if ttft is None:
+        ttft = latency
+    return Sample(latency=latency, ttft=ttft, tokens=_count_tokens(chunks))
+
+
+def _summary(samples: List[Sample], elapsed: float) -> Dict[str, float]:
+    latencies = [s.latency for s in samples]
+    ttfts = [s.ttft for s in samples]
+    tokens = sum(s.tokens for s in samples)
+    return {
+        "requests": len(samples),
+        "tokens": tokens,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "latency_p99": percentile(latencies, 99),
+        "ttft_p50": percentile(ttfts, 50),
+        "ttft_p95": percentile(ttfts, 95),
+        "ttft_p99": percentile(ttfts, 99),
+        "tokens_per_second": tokens / elapsed if elapsed else 0.0,
+    }
+
+
+async def bench_model(
+    name: str,
+    corpus: Sequence[str],
+    config: Dict[str, Any] | None = None,
+    warm_runs: int = 2,
+    concurrency: Sequence[int] = DEFAULT_CONCURRENCY,
+) -> Dict[str, Any]:
+    # Cold: a fresh, unpooled instance, so construction and the backend's
+    # first load are part of the measurement.
+    start = time.perf_counter()
+    model = ModelManager.get_model(name, config, pooled=False)
+    cold = await measure(model, corpus[0])
+    cold_latency = time.perf_counter() - start
+
+    samples = []
+    start = time.perf_counter()
+    for _ in range(warm_runs):
+        for prompt in corpus:
+            samples.append(await measure(model, prompt))
+    warm = _summary(samples, time.perf_counter() - start)
+
+    levels = {}
+    for level in concurrency:
+        prompts = [corpus[i % len(corpus)] for i in range(max(len(corpus), 2 * level))]
+        semaphore = asyncio.Semaphore(level)
+
+        async def run(prompt: str) -> Sample:
+            async with semaphore:
+                return await measure(model, prompt)
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(run(p) for p in prompts), return_exceptions=True)
+        elapsed = time.perf_counter() - start
+        ok = [r for r in results if isinstance(r, Sample)]
+        summary = _summary(ok, elapsed)
+        summary["errors"] = len(results) - len(ok)
+        summary["throughput_rps"] = len(ok) / elapsed if elapsed else 0.0
+        levels[str(level)] = summary
+
+    await model.aclose()
+    return {
+        "cold": {"latency": cold_latency, "ttft": cold.ttft, "tokens": cold.tokens},
+        "warm": warm,
+        "concurrency": levels,
+    }
+
+
+def measure_startup() -> Dict[str, float]:
+    """Time a fresh interpreter importing ModelManager and listing models."""
+    code = (
+        "import time; t = time.perf_counter()\n"
+        "from evocore.model.model_manager import ModelManager\n"
+        "ModelManager.list_models()\n"
+        "print(time.perf_counter() - t)\n"
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p))
+    out = subprocess.run(
+        [sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True
+    )
+    return {"list_models_seconds": float(out.stdout.strip())}
+
+
+def run(
+    models: Sequence[str],
+    corpus: Sequence[str] = DEFAULT_CORPUS,
+    config: Dict[str, Any] | None = None,
+    warm_runs: int = 2,
+    concurrency: Sequence[int] = DEFAULT_CONCURRENCY,
+    startup: bool = True,
+) -> Dict[str, Any]:
+    if not corpus:
+        raise ValueError("corpus must not be empty")
+    result: Dict[str, Any] = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "host": platform.node(),
+            "corpus_size": len(corpus),
+            "config": config or {},
+        },
+        "models": {},
+    }
+    if startup:
+        result["startup"] = measure_startup()
+    for name in models:
+        result["models"][name] = asyncio.run(
+            bench_model(name, corpus, config, warm_runs, concurrency)
+        )
+    return result
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = 0.1,
+    min_delta: float = 0.001,
+) -> List[str]:
+    """
+    Return a description of every metric that regressed by more than
+    `threshold` (relative). Timing changes smaller than `min_delta` seconds are
+    ignored as noise.
+    """
+    regressions = []
+    old = flatten({k: baseline.get(k, {}) for k in ("startup", "models")})
+    new = flatten({k: current.get(k, {}) for k in ("startup", "models")})
+    for key in sorted(old.keys() & new.keys()):
+        metric = key.rsplit(".", 1)[-1]
+        if metric in COUNT_METRICS:
+            continue
+        before, after = old[key], new[key]
+        if math.isnan(before) or math.isnan(after) or before == 0:
+            continue
+        change = (after - before) / before
+        if metric in HIGHER_IS_BETTER:
+            if -change > threshold:
+                regressions.append(f"{key}: {before:.4g} -> {after:.4g} ({change:+.1%})")
+        elif change > threshold and after - before > min_delta:
+            regressions.append(f"{key}: {before:.4g} -> {after:.4g} ({change:+.1%})")
+    return regressions
+
+
+def load_corpus(path: str | pathlib.Path) -> List[str]:
+    """Read prompts from a JSONL file of `{"prompt": ...}` objects (or bare strings)."""
+    prompts = []
+    for line in pathlib.Path(path).read_text().splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        prompts.append(item["prompt"] if isinstance(item, dict) else item)
+    return prompts
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--models", nargs="*", help="registry names (default: all)")
+    parser.add_argument("--corpus", help="JSONL prompt corpus")
+    parser.add_argument("--config", default="{}", help="model config as JSON")
+    parser.add_argument("--warm-runs", type=int, default=2)
+    parser.add_argument(
+        "--concurrency", type=int, nargs="*", default=list(DEFAULT_CONCURRENCY)
+    )
+    parser.add_argument("--output", default="bench_output.json")
+    parser.add_argument("--baseline", help="previous results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    parser.add_argument("--no-startup", action="store_true")
+    parser.add_argument(
+        "--mock", action="store_true", help="serve Ollama models from a local mock server"
+    )
+    parser.add_argument("--mock-ttft", type=float, default=0.05)
+    parser.add_argument("--mock-token-latency", type=float, default=0.01)
+    parser.add_argument("--mock-response", default=" ".join(["token"] * 32))
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus) if args.corpus else DEFAULT_CORPUS
+    config = json.loads(args.config)
+    server = None
+    if args.mock:
+        server = MockOllamaServer(
+            responses=args.mock_response,
+            ttft=args.mock_ttft,
+            token_latency=args.mock_token_latency,
+        ).start()
+        config["base_url"] = server.url
+    try:
+        result = run(
+            args.models or ModelManager.list_models(),
+            corpus,
+            config,
+            args.warm_runs,
+            args.concurrency,
+            startup=not args.no_startup,
+        )
+    finally:
+        if server is not None:
+            server.stop()
+    pathlib.Path(args.output).write_text(json.dumps(result, indent=2))
+    print(f"results written to {args.output}")
+
+    for name, stats in result["models"].items():
+        warm = stats["warm"]
+        print(
+            f"{name}: cold {stats['cold']['latency']:.3f}s, "
+            f"p50 {warm['latency_p50']:.3f}s, ttft p50 {warm['ttft_p50']:.3f}s, "
+            f"{warm['tokens_per_second']:.1f} tok/s"
+        )
+
+    if args.baseline:
+        baseline = json.loads(pathlib.Path(args.baseline).read_text())
+        regressions = compare(baseline, result, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+import functools
+import hashlib
+import json
+import operator
+import pickle
+import sqlite3
+import threading
+import time
+import pathlib
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, AsyncIterator, Sequence
+
+from evocore.model.manifest import cache_dir
+from evocore.model.model_manager import BaseModel, ModelWrapper
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+"""
+
+
+def default_cache_path() -> pathlib.Path:
+    return cache_dir() / "responses.sqlite"
+
+
+def _canonical(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    return repr(value)
+
+
+def make_key(model: str, prompt: Any, params: Dict[str, Any] | None = None) -> str:
+    """Content address of a call: model name, full rendered prompt and parameters."""
+    payload = json.dumps(
+        {"model": model, "prompt": prompt, "params": params or {}},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=_canonical,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    size_bytes: int = 0
+
+
+_MISSING = object()
+
+
+class ResponseCache:
+    """
+    SQLite-backed response store with TTL and size-bounded LRU eviction.
+
+    Values are pickled, so only point it at files you trust.
+    """
+
+    def __init__(
+        self,
+        path: str | pathlib.Path | None = None,
+        max_bytes: int = 256 * 1024 * 1024,
+        ttl: float | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = pathlib.Path(path) if path else default_cache_path()
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = self._clock()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self._expired(row[1], now):
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self._stats.evictions += 1
+                row = None
+            if row is None:
+                self._stats.misses += 1
+                return default
+            self._conn.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self._stats.hits += 1
+        return pickle.loads(row[0])
+
+    def put(self, key: str, value: Any, model: str = "") -> None:
+        blob = pickle.dumps(value)
+        now = self._clock()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, blob, len(blob), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                entries=entries,
+                size_bytes=size,
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    def _evict(self, now: float) -> None:
+        if self.ttl is not None:
+            cursor = self._conn.execute(
+                "DELETE FROM responses WHERE created < ?", (now - self.ttl,)
+            )
+            self._stats.evictions += cursor.rowcount
+
+        (total,) = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed ASC"
+        ).fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._stats.evictions += 1
+            total -= size
+
+
+class CachedModel(ModelWrapper):
+    """
+    Serve a model's responses from a ResponseCache.
+
+    The key covers the model name, the call arguments and the model config.
+    Pass `bypass=True` (or `bypass_cache=True` per call) when sampling is
+    non-deterministic and every call must reach the backend. With
+    `replay=True` a miss raises instead of calling the backend, so a recorded
+    run is reproduced exactly or not at all.
+    """
+
+    def __init__(
+        self, model: BaseModel, cache: ResponseCache, bypass: bool = False, replay: bool = False
+    ) -> None:
+        super().__init__(model)
+        self.cache = cache
+        self.bypass = bypass
+        self.replay = replay
+
+    def _key(self, args: Sequence[Any], kwargs: Dict[str, Any]) -> str:
+        prompt = {"args": list(args), "kwargs": kwargs}
+        return make_key(self.name, prompt, self.config)
+
+    def _put(self, key: str, value: Any) -> None:
+        self.cache.put(key, value, model=self.name)
+
+    def _miss(self, key: str) -> None:
+        if self.replay:
+            raise RuntimeError(f"no recorded response for {self.name} (key {key[:12]})")
+
+    def invoke(self, *args, bypass_cache: bool = False, **kwargs) -> Any:
+        if self.bypass or bypass_cache:
+            return self.inner.invoke(*args, **kwargs)
+        key = self._key(args, kwargs)
+        value = self.cache.get(key, _MISSING)
+        if value is _MISSING:
+            self._miss(key)
+            value = self.inner.invoke(*args, **kwargs)
+            self._put(key, value)
+        return value
+
+    async def ainvoke(self, *args, bypass_cache: bool = False, **kwargs) -> Any:
+        if self.bypass or bypass_cache:
+            return await self.inner.ainvoke(*args, **kwargs)
+        key = self._key(args, kwargs)
+        value = self.cache.get(key, _MISSING)
+        if value is _MISSING:
+            self._miss(key)
+            value = await self.inner.ainvoke(*args, **kwargs)
+            self._put(key, value)
+        return value
+
+    def stream(self, *args, bypass_cache: bool = False, **kwargs) -> Iterator[Any]:
+        if self.bypass or bypass_cache:
+            yield from self.inner.stream(*args, **kwargs)
+            return
+        key = self._key(args, kwargs)
+        value = self.cache.get(key, _MISSING)
+        if value is not _MISSING:
+            yield value
+            return
+        self._miss(key)
+        chunks = []
+        for chunk in self.inner.stream(*args, **kwargs):
+            chunks.append(chunk)
+            yield chunk
+        if chunks:
+            self._put(key, functools.reduce(operator.add, chunks))
+
+    async def astream(self, *args, bypass_cache: bool = False, **kwargs) -> AsyncIterator[Any]:
+        if self.bypass or bypass_cache:
+            async for chunk in self.inner.astream(*args, **kwargs):
+                yield chunk
+            return
+        key = self._key(args, kwargs)
+        value = self.cache.get(key, _MISSING)
+        if value is not _MISSING:
+            yield value
+            return
+        self._miss(key)
+        chunks = []
+        async for chunk in self.inner.astream(*args, **kwargs):
+            chunks.append(chunk)
+            yield chunk
+        if chunks:
+            self._put(key, functools.reduce(operator.add, chunks))
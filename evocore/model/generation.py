@@ -0,0 +1,158 @@
+import dataclasses
+import math
+import os
+import pathlib
+import tomllib
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+# Rough characters per token for English prose and code; backends refine it
+# from the prompt token counts they report.
+CHARS_PER_TOKEN = 3.5
+
+# Room left for the completion when sizing the context and `max_tokens` is unset.
+DEFAULT_COMPLETION_RESERVE = 2048
+
+# Config keys accepted under another name.
+_ALIASES = {"num_predict": "max_tokens"}
+
+
+def default_profiles_path() -> pathlib.Path:
+    """`$EVOCORE_PROFILES`, or the profiles shipped next to this module."""
+    return pathlib.Path(
+        os.environ.get("EVOCORE_PROFILES") or pathlib.Path(__file__).with_name("profiles.toml")
+    )
+
+
+def load_profiles(path: str | pathlib.Path | None = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Read named generation profiles from a TOML file, one table per profile:
+
+        [fast-architect]
+        model = "gpt-local"
+        max_tokens = 4096
+        temperature = 0.2
+    """
+    path = pathlib.Path(path) if path else default_profiles_path()
+    if not path.exists():
+        return {}
+    with path.open("rb") as f:
+        profiles = tomllib.load(f)
+    for name, profile in profiles.items():
+        if not isinstance(profile, dict):
+            raise ValueError(f"profile '{name}' in {path} must be a table")
+        GenerationConfig.from_config(profile)
+    return profiles
+
+
+def resolve_config(
+    config: Dict[str, Any] | None, profiles: Dict[str, Dict[str, Any]] | None = None
+) -> Dict[str, Any]:
+    """
+    Expand `config["profile"]` into the profile's settings. Keys set in
+    `config` itself win over the profile's.
+    """
+    config = dict(config or {})
+    name = config.pop("profile", None)
+    if name is None:
+        return config
+    profiles = load_profiles() if profiles is None else profiles
+    try:
+        profile = profiles[name]
+    except KeyError:
+        raise ValueError(f"Profile '{name}' not found")
+    resolved = {k: v for k, v in profile.items() if k != "model"}
+    resolved.update(config)
+    return resolved
+
+
+def prompt_text(prompt: Any) -> str:
+    """Flatten a prompt (string, PromptValue or message list) to its text."""
+    if isinstance(prompt, str):
+        return prompt
+    if hasattr(prompt, "to_string"):
+        return prompt.to_string()
+    if isinstance(prompt, (list, tuple)):
+        return "\n".join(prompt_text(getattr(m, "content", m)) for m in prompt)
+    return str(prompt)
+
+
+def estimate_tokens(text: str, chars_per_token: float = CHARS_PER_TOKEN) -> int:
+    return math.ceil(len(text) / chars_per_token)
+
+
+@dataclass(frozen=True)
+class GenerationConfig:
+    """
+    Generation settings read from a model's config dict.
+
+    `max_tokens` bounds the completion (Ollama's `num_predict`). When `num_ctx`
+    is unset and `auto_ctx` is on, the context window is sized per call from
+    the prompt length plus the completion budget, rounded up to a power of two
+    within [`min_ctx`, `max_ctx`] so the backend does not reload the model for
+    every small change in prompt size.
+    """
+
+    max_tokens: int | None = None
+    temperature: float | None = None
+    top_p: float | None = None
+    top_k: int | None = None
+    seed: int | None = None
+    stop: List[str] | None = None
+    repeat_penalty: float | None = None
+    num_ctx: int | None = None
+    auto_ctx: bool = True
+    min_ctx: int = 2048
+    max_ctx: int = 32768
+    num_thread: int | None = None
+    num_gpu: int | None = None
+    keep_alive: str | int | None = None
+
+    def __post_init__(self) -> None:
+        for key in ("max_tokens", "num_ctx", "min_ctx", "max_ctx", "num_thread", "top_k"):
+            value = getattr(self, key)
+            if value is not None and (not isinstance(value, int) or value < 1):
+                raise ValueError(f"{key} must be a positive integer, got {value!r}")
+        if self.min_ctx > self.max_ctx:
+            raise ValueError("min_ctx must not exceed max_ctx")
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any] | None) -> "GenerationConfig":
+        """Pick the generation keys out of `config`; other keys are ignored."""
+        fields = {f.name for f in dataclasses.fields(cls)}
+        values = {}
+        for key, value in (config or {}).items():
+            key = _ALIASES.get(key, key)
+            if key in fields:
+                values[key] = value
+        return cls(**values)
+
+    def override(self, **values: Any) -> "GenerationConfig":
+        """Copy with the given fields replaced; None values are ignored."""
+        values = {_ALIASES.get(k, k): v for k, v in values.items() if v is not None}
+        return dataclasses.replace(self, **values) if values else self
+
+    def context_size(self, prompt_tokens: int) -> int | None:
+        if self.num_ctx is not None:
+            return self.num_ctx
+        if not self.auto_ctx:
+            return None
+        needed = prompt_tokens + (self.max_tokens or DEFAULT_COMPLETION_RESERVE)
+        size = 1 << max(needed - 1, 1).bit_length()
+        return max(self.min_ctx, min(size, self.max_ctx))
+
+    def options(self, prompt_tokens: int = 0) -> Dict[str, Any]:
+        """Backend sampling options for a prompt of `prompt_tokens` tokens."""
+        options = {
+            "num_predict": self.max_tokens,
+            "num_ctx": self.context_size(prompt_tokens),
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "top_k": self.top_k,
+            "seed": self.seed,
+            "stop": self.stop,
+            "repeat_penalty": self.repeat_penalty,
+            "num_thread": self.num_thread,
+            "num_gpu": self.num_gpu,
+        }
+        return {k: v for k, v in options.items() if v is not None}
@@ -0,0 +1,347 @@
+"""
+Hedge slow model calls with a backup request.
+
+    model = HedgedModel(primary, [ModelManager.get_model("gpt-local", {"base_url": gpu2})])
+
+Each call goes to the primary model first. If it has produced neither a
+result (invoke) nor its first token (stream) after the hedge delay, or it
+failed, the same call is sent to the next backup model, for instance the
+same model on another host or another registered model. The first valid
+answer wins, where `accept` decides what is valid for invoke and a stream
+is valid once it has text; the other call is cancelled. If no answer is
+valid, the first one is returned, and if every call failed, the primary's
+error is raised.
+
+The delay is `delay` seconds if given, otherwise the `percentile` of the
+primary's recent latencies (time to first token for streams), and
+`initial_delay` until `min_samples` have been seen. Only valid answers are
+samples, so fast failures do not pull the delay down. At most `budget` of all
+calls (plus one) fire a hedge, so a slow backend is not hit with twice the
+load. Calls that lost while the primary was still running count as samples
+of at least the time they took, so the percentile does not drift down.
+
+Async calls are cancelled outright. Sync calls run in threads: a losing
+stream is closed at its next chunk, and a losing invoke cannot be
+interrupted, so it finishes in the background and its result is dropped.
+Each call records a `hedge` span; streams only cover the race up to the
+first token.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Sequence, Tuple
+
+from evocore.model.model_manager import BaseModel, ModelWrapper
+from evocore.model.stats import percentile
+from evocore.model.tracing import Tracer, default_tracer
+
+
+@dataclass
+class HedgeStats:
+    calls: int = 0
+    # Calls that sent a backup request, and those the backup answered.
+    fired: int = 0
+    backup_wins: int = 0
+    # Calls where every request failed.
+    failures: int = 0
+
+
+def _has_text(chunk: Any) -> bool:
+    return bool(chunk if isinstance(chunk, str) else getattr(chunk, "content", None))
+
+
+def _spawn(fn: Callable[[], Any]) -> Future:
+    """Run `fn` in a daemon thread, in a copy of the caller's context."""
+    future: Future = Future()
+    future.set_running_or_notify_cancel()
+    context = contextvars.copy_context()
+
+    def run() -> None:
+        try:
+            future.set_result(context.run(fn))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="hedge", daemon=True).start()
+    return future
+
+
+def _first_token(stream: Iterator[Any]) -> Tuple[List[Any], Iterator[Any] | None]:
+    """Read up to the first chunk with text; None once the stream has ended."""
+    chunks = []
+    for chunk in stream:
+        chunks.append(chunk)
+        if _has_text(chunk):
+            return chunks, stream
+    return chunks, None
+
+
+async def _afirst_token(stream: AsyncIterator[Any]) -> Tuple[List[Any], AsyncIterator[Any] | None]:
+    chunks = []
+    try:
+        async for chunk in stream:
+            chunks.append(chunk)
+            if _has_text(chunk):
+                return chunks, stream
+    except asyncio.CancelledError:
+        await stream.aclose()
+        raise
+    return chunks, None
+
+
+def _streamed_text(result: Tuple[List[Any], Any]) -> bool:
+    """Whether a stream got to its first token; one that ended without text did not."""
+    return result[1] is not None or any(_has_text(chunk) for chunk in result[0])
+
+
+def _close_stream(future: Future) -> None:
+    if not future.cancelled() and future.exception() is None:
+        _, stream = future.result()
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+
+
+async def _settle(task: asyncio.Task) -> None:
+    """Wait for a cancelled call; a stream that already had its first token is closed."""
+    try:
+        result = await task
+    except BaseException:
+        return
+    if isinstance(result, tuple) and result[1] is not None:
+        await result[1].aclose()
+
+
+class HedgedModel(ModelWrapper):
+    """Back up slow calls to `model` with `backups`; see the module docstring."""
+
+    def __init__(
+        self,
+        model: BaseModel,
+        backups: Sequence[BaseModel],
+        delay: float | None = None,
+        percentile: float = 95.0,
+        initial_delay: float = 1.0,
+        min_samples: int = 20,
+        window: int = 200,
+        budget: float = 0.2,
+        accept: Callable[[Any], bool] | None = None,
+        tracer: Tracer | None = None,
+    ) -> None:
+        if not backups:
+            raise ValueError("HedgedModel needs at least one backup model")
+        super().__init__(model)
+        self.backups = list(backups)
+        self.delay = delay
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self.budget = budget
+        self.accept = accept or (lambda result: True)
+        self.tracer = tracer or default_tracer
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, deque] = {
+            "invoke": deque(maxlen=window),
+            "stream": deque(maxlen=window),
+        }
+        self._next_backup = 0
+        self._stats = HedgeStats()
+
+    def stats(self) -> HedgeStats:
+        with self._lock:
+            return HedgeStats(**vars(self._stats))
+
+    def hedge_delay(self, kind: str) -> float:
+        """Seconds to wait for the primary before hedging an `invoke` or `stream` call."""
+        if self.delay is not None:
+            return self.delay
+        with self._lock:
+            samples = list(self._latencies[kind])
+        if len(samples) < self.min_samples:
+            return self.initial_delay
+        return percentile(samples, self.percentile)
+
+    def _observe(self, kind: str, seconds: float) -> None:
+        with self._lock:
+            self._latencies[kind].append(seconds)
+
+    def _start(self) -> None:
+        with self._lock:
+            self._stats.calls += 1
+
+    def _backup(self) -> BaseModel | None:
+        """The backup for one hedge, or None if the budget is used up."""
+        with self._lock:
+            if self._stats.fired >= self.budget * self._stats.calls + 1:
+                return None
+            self._stats.fired += 1
+            backup = self.backups[self._next_backup % len(self.backups)]
+            self._next_backup += 1
+            return backup
+
+    def _finish(self, span, delay: float, fired: bool, winner: str | None) -> None:
+        with self._lock:
+            if winner == "backup":
+                self._stats.backup_wins += 1
+            elif winner is None:
+                self._stats.failures += 1
+        span.set(delay=delay, fired=fired, winner=winner)
+
+    def _race(
+        self,
+        kind: str,
+        call: Callable[[BaseModel], Future],
+        valid: Callable[[Any], bool],
+        discard: Callable[[Future], None],
+        span,
+    ) -> Tuple[str, Any]:
+        """Run the primary, hedge it when due; the winning role and result."""
+        self._start()
+        delay = self.hedge_delay(kind)
+        started = time.perf_counter()
+        deadline = started + delay
+        pending = {call(self.inner): "primary"}
+        hedged = fired = False
+        error: BaseException | None = None
+        # The first answer that was not valid, returned if no answer is.
+        fallback: Tuple[str, Any] | None = None
+        while pending:
+            timeout = None if hedged else max(0.0, deadline - time.perf_counter())
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                role = pending.pop(future)
+                if future.exception() is not None:
+                    error = error or future.exception()
+                    continue
+                if not valid(future.result()):
+                    fallback = fallback or (role, future.result())
+                    continue
+                # Failures are not latency samples: fast errors would pull
+                # the delay down and make every call hedge.
+                if role == "primary" or "primary" in pending.values():
+                    # A primary that lost the race took at least this long.
+                    self._observe(kind, time.perf_counter() - started)
+                for loser in pending:
+                    discard(loser)
+                self._finish(span, delay, fired, role)
+                return role, future.result()
+            # Hedge once the delay is up, or straight away if the primary failed.
+            if not hedged and (not pending or time.perf_counter() >= deadline):
+                hedged = True
+                backup = self._backup()
+                if backup is not None:
+                    fired = True
+                    pending[call(backup)] = "backup"
+        if fallback is not None:
+            self._finish(span, delay, fired, fallback[0])
+            return fallback
+        self._finish(span, delay, fired, None)
+        raise error
+
+    async def _arace(
+        self,
+        kind: str,
+        call: Callable[[BaseModel], Any],
+        valid: Callable[[Any], bool],
+        discard: Callable[[asyncio.Task], Any],
+        span,
+    ) -> Tuple[str, Any]:
+        """`_race` for coroutines; the losing tasks are cancelled."""
+        self._start()
+        delay = self.hedge_delay(kind)
+        started = time.perf_counter()
+        deadline = started + delay
+        pending = {asyncio.ensure_future(call(self.inner)): "primary"}
+        hedged = fired = False
+        error: BaseException | None = None
+        fallback: Tuple[str, Any] | None = None
+        try:
+            while pending:
+                timeout = None if hedged else max(0.0, deadline - time.perf_counter())
+                done, _ = await asyncio.wait(
+                    list(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    role = pending.pop(task)
+                    if task.exception() is not None:
+                        error = error or task.exception()
+                        continue
+                    if not valid(task.result()):
+                        fallback = fallback or (role, task.result())
+                        continue
+                    if role == "primary" or "primary" in pending.values():
+                        self._observe(kind, time.perf_counter() - started)
+                    self._finish(span, delay, fired, role)
+                    return role, task.result()
+                if not hedged and (not pending or time.perf_counter() >= deadline):
+                    hedged = True
+                    backup = self._backup()
+                    if backup is not None:
+                        fired = True
+                        pending[asyncio.ensure_future(call(backup))] = "backup"
+        finally:
+            for task in pending:
+                task.cancel()
+                await discard(task)
+        if fallback is not None:
+            self._finish(span, delay, fired, fallback[0])
+            return fallback
+        self._finish(span, delay, fired, None)
+        raise error
+
+    def invoke(self, *args, **kwargs) -> Any:
+        with self.tracer.span("invoke", kind="hedge", model=self.name) as span:
+            _, result = self._race(
+                "invoke",
+                lambda model: _spawn(lambda: model.invoke(*args, **kwargs)),
+                self.accept,
+                # A sync call cannot be interrupted; its result is dropped.
+                lambda loser: None,
+                span,
+            )
+            return result
+
+    async def ainvoke(self, *args, **kwargs) -> Any:
+        with self.tracer.span("invoke", kind="hedge", model=self.name) as span:
+            _, result = await self._arace(
+                "invoke",
+                lambda model: model.ainvoke(*args, **kwargs),
+                self.accept,
+                _settle,
+                span,
+            )
+            return result
+
+    def stream(self, *args, **kwargs) -> Iterator[Any]:
+        # The span is not held open across yields; it covers the race.
+        with self.tracer.span("stream", kind="hedge", model=self.name) as span:
+            _, (chunks, stream) = self._race(
+                "stream",
+                lambda model: _spawn(lambda: _first_token(iter(model.stream(*args, **kwargs)))),
+                _streamed_text,
+                lambda loser: loser.add_done_callback(_close_stream),
+                span,
+            )
+        yield from chunks
+        if stream is not None:
+            yield from stream
+
+    async def astream(self, *args, **kwargs) -> AsyncIterator[Any]:
+        with self.tracer.span("stream", kind="hedge", model=self.name) as span:
+            _, (chunks, stream) = await self._arace(
+                "stream",
+                lambda model: _afirst_token(aiter(model.astream(*args, **kwargs))),
+                _streamed_text,
+                _settle,
+                span,
+            )
+        for chunk in chunks:
+            yield chunk
+        if stream is not None:
+            async for chunk in stream:
+                yield chunk
@@ -0,0 +1,230 @@
+"""
+Route model calls across several Ollama hosts.
+
+    ModelManager.get_model("qwen_code_local", {"hosts": ["http://gpu1:11434",
+                                                          "http://gpu2:11434"]})
+
+Every model configured with the same host list shares one `HostPool`, so the
+in-flight count of each host covers all of them. A call goes to:
+
+- the host its model is pinned to, which keeps the weights warm on one box,
+  as long as that host is healthy and has at most `sticky_slack` more calls in
+  flight than the least busy host;
+- otherwise the best healthy host by `strategy`: "least_outstanding" (fewest
+  calls in flight) or "latency" (in-flight calls weighted by the host's
+  smoothed latency). The model is then pinned there.
+
+Hosts are ejected after `failure_threshold` consecutive failures (connection
+errors and 5xx responses). They are tried again after `ejection_seconds`, and
+a single further failure ejects them again.
+`probe()` checks every host actively. `EVOCORE_OLLAMA_HOSTS` (comma
+separated) is the host list for models without a `hosts` or `base_url`.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+import httpx
+import ollama
+
+from evocore.model.http import get_http_pool
+
+STRATEGIES = ("least_outstanding", "latency")
+
+
+def default_hosts() -> List[str]:
+    return [h.strip() for h in os.environ.get("EVOCORE_OLLAMA_HOSTS", "").split(",") if h.strip()]
+
+
+def is_host_failure(error: BaseException) -> bool:
+    """Errors that say something about the host rather than the request."""
+    if isinstance(error, (httpx.TransportError, ConnectionError)):
+        return True
+    return isinstance(error, ollama.ResponseError) and error.status_code >= 500
+
+
+@dataclass
+class HostStats:
+    url: str
+    requests: int = 0
+    errors: int = 0
+    outstanding: int = 0
+    # Exponentially smoothed seconds per call (to the first chunk when streaming).
+    latency: float | None = None
+    failures: int = 0
+    ejections: int = 0
+    ejected: bool = False
+
+
+class HostPool:
+    """In-flight counts, latency and health of a set of hosts; see the module docstring."""
+
+    def __init__(
+        self,
+        hosts: Sequence[str],
+        strategy: str = "least_outstanding",
+        failure_threshold: int = 3,
+        ejection_seconds: float = 30.0,
+        sticky_slack: int = 2,
+        latency_alpha: float = 0.3,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not hosts:
+            raise ValueError("HostPool needs at least one host")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"unknown routing strategy '{strategy}', expected one of {STRATEGIES}")
+        self.hosts = [h.rstrip("/") for h in hosts]
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.ejection_seconds = ejection_seconds
+        self.sticky_slack = sticky_slack
+        self.latency_alpha = latency_alpha
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._stats = {url: HostStats(url) for url in self.hosts}
+        self._ejected_until: Dict[str, float] = {}
+        self._pinned: Dict[str, str] = {}
+
+    def _healthy(self, url: str, now: float) -> bool:
+        return self._ejected_until.get(url, 0.0) <= now
+
+    def _score(self, stats: HostStats) -> Tuple[float, int]:
+        if self.strategy == "latency":
+            # Hosts without a sample yet score 0, so each one gets tried.
+            return ((stats.outstanding + 1) * (stats.latency or 0.0), stats.outstanding)
+        return (stats.outstanding, 0)
+
+    def choose(self, model_id: str, exclude: Sequence[str] = ()) -> str:
+        """Pick the host for one call of `model_id`, skipping `exclude` if possible."""
+        with self._lock:
+            now = self._clock()
+            candidates = [u for u in self.hosts if u not in exclude] or list(self.hosts)
+            healthy = [u for u in candidates if self._healthy(u, now)]
+            if not healthy:
+                # Everything is ejected: try the host that comes back first.
+                return min(candidates, key=lambda u: self._ejected_until[u])
+
+            least = min(self._stats[u].outstanding for u in healthy)
+            pinned = self._pinned.get(model_id)
+            if pinned in healthy and self._stats[pinned].outstanding <= least + self.sticky_slack:
+                return pinned
+            # Ties go to the host the model already uses, then to list order.
+            url = min(
+                healthy,
+                key=lambda u: (self._score(self._stats[u]), u != pinned, self.hosts.index(u)),
+            )
+            if pinned is None or not self._healthy(pinned, now):
+                self._pinned[model_id] = url
+            return url
+
+    def started(self, url: str) -> None:
+        with self._lock:
+            stats = self._stats[url]
+            stats.requests += 1
+            stats.outstanding += 1
+
+    def finished(self, url: str, seconds: float | None, ok: bool) -> None:
+        with self._lock:
+            stats = self._stats[url]
+            stats.outstanding -= 1
+            if ok:
+                stats.failures = 0
+                self._ejected_until.pop(url, None)
+                if seconds is not None:
+                    stats.latency = (
+                        seconds
+                        if stats.latency is None
+                        else self.latency_alpha * seconds
+                        + (1 - self.latency_alpha) * stats.latency
+                    )
+                return
+            stats.errors += 1
+            stats.failures += 1
+            if stats.failures >= self.failure_threshold:
+                self._eject(url)
+
+    def _eject(self, url: str) -> None:
+        if self._healthy(url, self._clock()):
+            self._stats[url].ejections += 1
+        self._ejected_until[url] = self._clock() + self.ejection_seconds
+        # Models pinned here move elsewhere on their next call.
+        for model_id in [m for m, u in self._pinned.items() if u == url]:
+            del self._pinned[model_id]
+
+    @contextmanager
+    def request(self, model_id: str, exclude: Sequence[str] = ()) -> Iterator["_Call"]:
+        """
+        Route one call: yields the call, whose `url` is the chosen host.
+        Call `call.first_chunk()` when streaming so latency is time to first chunk.
+        """
+        call = _Call(self.choose(model_id, exclude), self._clock)
+        self.started(call.url)
+        try:
+            yield call
+        except BaseException as e:
+            self.finished(call.url, None, not is_host_failure(e))
+            raise
+        self.finished(call.url, call.seconds(), True)
+
+    def probe(self, timeout: float = 2.0) -> Dict[str, bool]:
+        """Check every host; unreachable ones are ejected, reachable ones readmitted."""
+        kwargs = dict(get_http_pool().client_kwargs(), timeout=timeout)
+        results = {}
+        with httpx.Client(**kwargs) as client:
+            for url in self.hosts:
+                try:
+                    ok = client.get(url + "/").status_code < 500
+                except httpx.HTTPError:
+                    ok = False
+                results[url] = ok
+                with self._lock:
+                    if ok:
+                        self._stats[url].failures = 0
+                        self._ejected_until.pop(url, None)
+                    else:
+                        self._eject(url)
+        return results
+
+    def pinned(self, model_id: str) -> str | None:
+        with self._lock:
+            return self._pinned.get(model_id)
+
+    def stats(self) -> Dict[str, HostStats]:
+        with self._lock:
+            now = self._clock()
+            return {
+                url: HostStats(**{**vars(s), "ejected": not self._healthy(url, now)})
+                for url, s in self._stats.items()
+            }
+
+
+class _Call:
+    def __init__(self, url: str, clock: Callable[[], float]) -> None:
+        self.url = url
+        self.clock = clock
+        self.start = clock()
+        self.first: float | None = None
+
+    def first_chunk(self) -> None:
+        if self.first is None:
+            self.first = self.clock()
+
+    def seconds(self) -> float:
+        return (self.first if self.first is not None else self.clock()) - self.start
+
+
+_pools: Dict[Tuple[Tuple[str, ...], str], HostPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_host_pool(hosts: Sequence[str], strategy: str = "least_outstanding") -> HostPool:
+    """The process-wide pool for this host list and strategy."""
+    key = (tuple(h.rstrip("/") for h in hosts), strategy)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = HostPool(key[0], strategy)
+        return _pools[key]
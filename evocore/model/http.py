@@ -0,0 +1,277 @@
+"""
+Process-wide HTTP connection pool shared by every Ollama-backed client.
+
+    ChatOllama(..., sync_client_kwargs=get_http_pool().client_kwargs(), ...)
+
+Clients built with `client_kwargs()` / `async_client_kwargs()` send their
+requests through one shared transport, so connections are kept alive and
+reused across models and hosts. Async connections are bound to the event loop
+that opened them; the shared async transport keeps one connection pool per
+running loop and routes each request to its loop's pool, so a single async
+client can be used from any loop. The pool is created on first use and tuned
+with `configure_http_pool()` or `EVOCORE_HTTP_*` environment variables.
+"""
+
+import asyncio
+import os
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict
+
+import httpx
+
+
+def _env(key: str, default: Any, cast=float) -> Any:
+    value = os.environ.get(f"EVOCORE_HTTP_{key}")
+    if value is None:
+        return default
+    return None if value.lower() == "none" else cast(value)
+
+
+@dataclass(frozen=True)
+class HttpPoolConfig:
+    max_connections: int = 32
+    max_keepalive_connections: int = 16
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 5.0
+    # Generation can legitimately take minutes; None waits indefinitely.
+    read_timeout: float | None = None
+    write_timeout: float = 30.0
+    # How long a request may wait for a free connection.
+    pool_timeout: float | None = None
+
+    @classmethod
+    def from_env(cls) -> "HttpPoolConfig":
+        defaults = cls()
+        return cls(
+            max_connections=_env("MAX_CONNECTIONS", defaults.max_connections, int),
+            max_keepalive_connections=_env(
+                "MAX_KEEPALIVE", defaults.max_keepalive_connections, int
+            ),
+            keepalive_expiry=_env("KEEPALIVE_EXPIRY", defaults.keepalive_expiry),
+            connect_timeout=_env("CONNECT_TIMEOUT", defaults.connect_timeout),
+            read_timeout=_env("READ_TIMEOUT", defaults.read_timeout),
+            write_timeout=_env("WRITE_TIMEOUT", defaults.write_timeout),
+            pool_timeout=_env("POOL_TIMEOUT", defaults.pool_timeout),
+        )
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=self.read_timeout,
+            write=self.write_timeout,
+            pool=self.pool_timeout,
+        )
+
+
+@dataclass
+class HttpPoolStats:
+    requests: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    # Connections opened across the sync pool and every loop's async pool;
+    # far fewer than `requests` when kept-alive connections are reused.
+    connections_opened: int = 0
+    event_loops: int = 0
+
+
+def _opened(event: str) -> bool:
+    # httpcore trace events, e.g. "connection.connect_tcp.complete".
+    return event.startswith("connection.connect_") and event.endswith(".complete")
+
+
+class _SharedTransport(httpx.BaseTransport):
+    """Counting view of the pool's sync transport. Closing a client leaves it open."""
+
+    def __init__(self, pool: "HttpPool") -> None:
+        self.pool = pool
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        previous = request.extensions.get("trace")
+
+        def trace(event: str, info: Dict[str, Any]) -> None:
+            if _opened(event):
+                self.pool._connected()
+            if previous is not None:
+                previous(event, info)
+
+        request.extensions["trace"] = trace
+        self.pool._started()
+        try:
+            response = self.pool._sync().handle_request(request)
+        except BaseException:
+            self.pool._finished()
+            raise
+        response.stream = _TrackedStream(response.stream, self.pool)
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+class _SharedAsyncTransport(httpx.AsyncBaseTransport):
+    """Route each request to the connection pool of the loop it runs on."""
+
+    def __init__(self, pool: "HttpPool") -> None:
+        self.pool = pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        previous = request.extensions.get("trace")
+
+        async def trace(event: str, info: Dict[str, Any]) -> None:
+            if _opened(event):
+                self.pool._connected()
+            if previous is not None:
+                await previous(event, info)
+
+        request.extensions["trace"] = trace
+        self.pool._started()
+        try:
+            response = await self.pool._async().handle_async_request(request)
+        except BaseException:
+            self.pool._finished()
+            raise
+        response.stream = _TrackedAsyncStream(response.stream, self.pool)
+        return response
+
+    async def aclose(self) -> None:
+        pass
+
+
+class _TrackedStream(httpx.SyncByteStream):
+    # A request stays in flight until its (possibly streamed) body is closed.
+    def __init__(self, stream: Any, pool: "HttpPool") -> None:
+        self.stream = stream
+        self.pool = pool
+        self.closed = False
+
+    def __iter__(self):
+        yield from self.stream
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self.pool._finished()
+            self.stream.close()
+
+
+class _TrackedAsyncStream(httpx.AsyncByteStream):
+    def __init__(self, stream: Any, pool: "HttpPool") -> None:
+        self.stream = stream
+        self.pool = pool
+        self.closed = False
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self.pool._finished()
+            await self.stream.aclose()
+
+
+class HttpPool:
+    """
+    Shared httpx transports with the limits and timeouts of `config`.
+
+    Transports are created lazily: the sync one on the first sync request,
+    an async one on the first request made from each event loop.
+    """
+
+    def __init__(self, config: HttpPoolConfig | None = None) -> None:
+        self.config = config or HttpPoolConfig.from_env()
+        self._lock = threading.Lock()
+        self._sync_transport: httpx.HTTPTransport | None = None
+        self._async_transports: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._stats = HttpPoolStats()
+        self.transport = _SharedTransport(self)
+        self.async_transport = _SharedAsyncTransport(self)
+
+    def client_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments for an httpx (or ollama) sync client."""
+        return {"transport": self.transport, "timeout": self.config.timeout()}
+
+    def async_client_kwargs(self) -> Dict[str, Any]:
+        return {"transport": self.async_transport, "timeout": self.config.timeout()}
+
+    def _sync(self) -> httpx.HTTPTransport:
+        with self._lock:
+            if self._sync_transport is None:
+                self._sync_transport = httpx.HTTPTransport(limits=self.config.limits())
+            return self._sync_transport
+
+    def _async(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transport = self._async_transports.get(loop)
+            if transport is None:
+                transport = httpx.AsyncHTTPTransport(limits=self.config.limits())
+                self._async_transports[loop] = transport
+            return transport
+
+    def _started(self) -> None:
+        with self._lock:
+            self._stats.requests += 1
+            self._stats.in_flight += 1
+            self._stats.peak_in_flight = max(self._stats.peak_in_flight, self._stats.in_flight)
+
+    def _connected(self) -> None:
+        with self._lock:
+            self._stats.connections_opened += 1
+
+    def _finished(self) -> None:
+        with self._lock:
+            self._stats.in_flight -= 1
+
+    def stats(self) -> HttpPoolStats:
+        with self._lock:
+            return HttpPoolStats(
+                requests=self._stats.requests,
+                in_flight=self._stats.in_flight,
+                peak_in_flight=self._stats.peak_in_flight,
+                connections_opened=self._stats.connections_opened,
+                event_loops=len(self._async_transports),
+            )
+
+    def close(self) -> None:
+        """Close pooled sync connections; async pools close with their loops."""
+        with self._lock:
+            transport, self._sync_transport = self._sync_transport, None
+        if transport is not None:
+            transport.close()
+
+
+_pool: HttpPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_http_pool() -> HttpPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HttpPool()
+        return _pool
+
+
+def configure_http_pool(config: HttpPoolConfig | None = None, **values: Any) -> HttpPool:
+    """
+    Replace the shared pool, e.g. `configure_http_pool(max_connections=64)`.
+    Only clients created afterwards use the new pool.
+    """
+    global _pool
+    config = config or HttpPoolConfig(**values)
+    with _pool_lock:
+        old, _pool = _pool, HttpPool(config)
+    if old is not None:
+        old.close()
+    return _pool
@@ -0,0 +1,156 @@
+import ast
+import hashlib
+import json
+import os
+import pathlib
+import pkgutil
+from typing import Dict, Any, List
+
+MANIFEST_VERSION = 2
+
+# Base classes a model module may subclass directly.
+MODEL_BASES = ("BaseModel", "OllamaModel")
+
+
+def cache_dir() -> pathlib.Path:
+    root = os.environ.get("EVOCORE_CACHE_DIR")
+    if root:
+        return pathlib.Path(root)
+    return pathlib.Path.home() / ".cache" / "evocore"
+
+
+def default_manifest_path() -> pathlib.Path:
+    return cache_dir() / "model_manifest.json"
+
+
+def _base_name(node: ast.expr) -> str | None:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def scan_module(source: str) -> List[str]:
+    """
+    Return the registry names declared in a model module without importing it.
+
+    A model is a top-level class deriving from one of `MODEL_BASES` (or from
+    a model class defined earlier in the module) with a non-empty string
+    literal `name` attribute, which is what BaseModel.__init_subclass__
+    registers.
+    """
+    names = []
+    bases = set(MODEL_BASES)
+    for node in ast.parse(source).body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        if not any(_base_name(base) in bases for base in node.bases):
+            continue
+        bases.add(node.name)
+        for stmt in node.body:
+            if isinstance(stmt, ast.Assign):
+                targets = stmt.targets
+            elif isinstance(stmt, ast.AnnAssign) and stmt.value is not None:
+                targets = [stmt.target]
+            else:
+                continue
+            if not any(isinstance(t, ast.Name) and t.id == "name" for t in targets):
+                continue
+            value = stmt.value
+            if isinstance(value, ast.Constant) and isinstance(value.value, str):
+                if value.value:
+                    names.append(value.value)
+    return names
+
+
+def _module_file(models_path: pathlib.Path, module_name: str, is_pkg: bool) -> pathlib.Path:
+    if is_pkg:
+        return models_path / module_name / "__init__.py"
+    return models_path / f"{module_name}.py"
+
+
+def _read_manifest(path: pathlib.Path, models_path: pathlib.Path) -> Dict[str, Any]:
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    if data.get("models_path") != str(models_path):
+        return {}
+    return data.get("modules", {})
+
+
+def _write_manifest(path: pathlib.Path, models_path: pathlib.Path, modules: Dict[str, Any]) -> None:
+    data = {
+        "version": MANIFEST_VERSION,
+        "models_path": str(models_path),
+        "modules": modules,
+    }
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(json.dumps(data, indent=2, sort_keys=True))
+        os.replace(tmp, path)
+    except OSError:
+        # The manifest is only an optimisation; a read-only cache dir must
+        # never break model discovery.
+        tmp.unlink(missing_ok=True)
+
+
+def load_manifest(
+    models_path: pathlib.Path, manifest_path: pathlib.Path | None = None
+) -> Dict[str, str]:
+    """
+    Return a `model name -> module name` index for the models package.
+
+    Entries are cached on disk per module file and revalidated by mtime and
+    size; when those change the file is hashed, and only re-parsed if its
+    content actually differs.
+    """
+    models_path = pathlib.Path(models_path).resolve()
+    manifest_path = manifest_path or default_manifest_path()
+
+    cached = _read_manifest(manifest_path, models_path)
+    modules: Dict[str, Any] = {}
+    changed = False
+
+    for _, module_name, is_pkg in pkgutil.iter_modules([str(models_path)]):
+        file = _module_file(models_path, module_name, is_pkg)
+        try:
+            stat = file.stat()
+        except OSError:
+            continue
+
+        entry = cached.get(module_name)
+        if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            modules[module_name] = entry
+            continue
+
+        content = file.read_bytes()
+        digest = hashlib.sha256(content).hexdigest()
+        if entry and entry["sha256"] == digest:
+            models = entry["models"]
+        else:
+            try:
+                models = scan_module(content.decode("utf-8"))
+            except (SyntaxError, UnicodeDecodeError) as e:
+                raise ImportError(f"Failed to scan model module: {file}") from e
+
+        modules[module_name] = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": digest,
+            "models": models,
+        }
+        changed = True
+
+    if changed or set(modules) != set(cached):
+        _write_manifest(manifest_path, models_path, modules)
+
+    index: Dict[str, str] = {}
+    for module_name, entry in modules.items():
+        for name in entry["models"]:
+            index[name] = module_name
+    return index
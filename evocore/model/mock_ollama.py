@@ -0,0 +1,349 @@
+"""
+Deterministic stand-in for an Ollama server.
+
+    with MockOllamaServer(responses="hello world", ttft=0.2) as server:
+        model = ModelManager.get_model("gpt-local", {"base_url": server.url})
+
+Speaks the parts of the Ollama HTTP API that ChatOllama and our tooling use
+(`/api/chat` with and without streaming, `/api/generate`, `/api/tags`,
+`/api/ps`) with configurable time to first token, per-token latency, model
+load time, error injection and canned or scripted responses. With
+`prompt_cache`, prompt evaluation reuses the longest prefix a prompt shares
+with the model's previous one, as Ollama's KV cache does, and only the rest
+costs `prompt_token_latency` per token. Also runnable as
+`python -m evocore.model.mock_ollama --port 11434`.
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Sequence
+
+_UNLOAD = (0, "0", "0s")
+
+Responder = str | Sequence[str] | Dict[str, str] | Callable[[Dict[str, Any]], str]
+
+
+def tokenize(text: str) -> List[str]:
+    return re.findall(r"\s*\S+", text) or [text]
+
+
+def prompt_text(request: Dict[str, Any]) -> str:
+    if "messages" in request:
+        return "\n".join(str(m.get("content", "")) for m in request["messages"])
+    return str(request.get("prompt", ""))
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class MockOllamaServer:
+    """
+    Threaded localhost Ollama stand-in.
+
+    `responses` is a single string, a list consumed in order (cycling), a
+    `model -> text` mapping, or a callable receiving the request body.
+    Failures are injected with probability `error_rate` from a seeded RNG, or
+    deterministically via `fail_next()`.
+    """
+
+    def __init__(
+        self,
+        responses: Responder = "ok",
+        ttft: float = 0.0,
+        token_latency: float = 0.0,
+        load_time: float = 0.0,
+        error_rate: float = 0.0,
+        prompt_token_latency: float = 0.0,
+        prompt_cache: bool = False,
+        seed: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        max_log: int = 1000,
+    ) -> None:
+        self.responses = responses
+        self.ttft = ttft
+        self.token_latency = token_latency
+        self.load_time = load_time
+        self.error_rate = error_rate
+        self.prompt_token_latency = prompt_token_latency
+        self.prompt_cache = prompt_cache
+        self._last_prompt: Dict[str, str] = {}
+        # Most recent request bodies, for assertions.
+        self.requests: deque = deque(maxlen=max_log)
+        self.counts: Counter = Counter()
+        self.loaded: Dict[str, float] = {}
+
+        self._rng = random.Random(seed)
+        self._script_index = 0
+        self._fail_next = 0
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.peak_in_flight = 0
+
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockOllamaServer":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "MockOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def fail_next(self, count: int = 1) -> None:
+        with self._lock:
+            self._fail_next += count
+
+    def respond(self, request: Dict[str, Any]) -> str:
+        responses = self.responses
+        if callable(responses):
+            return responses(request)
+        if isinstance(responses, str):
+            return responses
+        if isinstance(responses, dict):
+            return responses.get(request.get("model", ""), responses.get("*", "ok"))
+        with self._lock:
+            text = responses[self._script_index % len(responses)]
+            self._script_index += 1
+        return text
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            if self._fail_next:
+                self._fail_next -= 1
+                return True
+            return self.error_rate > 0 and self._rng.random() < self.error_rate
+
+    def _load(self, model: str) -> float:
+        """Mark `model` resident and return the simulated load time in seconds."""
+        with self._lock:
+            cold = model not in self.loaded
+            self.loaded[model] = time.monotonic()
+            if cold:
+                self.counts["load"] += 1
+        if cold and self.load_time:
+            time.sleep(self.load_time)
+        return self.load_time if cold else 0.0
+
+    def _unload(self, model: str) -> None:
+        with self._lock:
+            self._last_prompt.pop(model, None)
+            if self.loaded.pop(model, None) is not None:
+                self.counts["unload"] += 1
+
+    def _evaluated(self, model: str, prompt: str) -> str:
+        """The part of `prompt` that is not served from the model's prompt cache."""
+        if not self.prompt_cache:
+            return prompt
+        with self._lock:
+            previous = self._last_prompt.get(model, "")
+            self._last_prompt[model] = prompt
+        shared = 0
+        for a, b in zip(previous, prompt):
+            if a != b:
+                break
+            shared += 1
+        return prompt[shared:]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def _json(self, status: int, body: Dict[str, Any]) -> None:
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _chunk(self, body: Dict[str, Any]) -> None:
+                data = (json.dumps(body) + "\n").encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_HEAD(self) -> None:
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_GET(self) -> None:
+                if self.path == "/api/tags":
+                    models = sorted(set(m["model"] for m in server.requests if "model" in m))
+                    self._json(200, {"models": [{"name": m, "model": m} for m in models]})
+                elif self.path == "/api/ps":
+                    with server._lock:
+                        loaded = sorted(server.loaded)
+                    self._json(200, {"models": [{"name": m, "model": m} for m in loaded]})
+                else:
+                    data = b"Ollama is running"
+                    self.send_response(200)
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                with server._lock:
+                    server.requests.append(request)
+                    server.counts[self.path] += 1
+                    server._in_flight += 1
+                    server.peak_in_flight = max(server.peak_in_flight, server._in_flight)
+                try:
+                    if self.path in ("/api/chat", "/api/generate"):
+                        self._generate(request, chat=self.path == "/api/chat")
+                    else:
+                        self._json(404, {"error": f"unsupported endpoint {self.path}"})
+                finally:
+                    with server._lock:
+                        server._in_flight -= 1
+
+            def _generate(self, request: Dict[str, Any], chat: bool) -> None:
+                model = request.get("model", "")
+                if server._should_fail():
+                    server.counts["errors"] += 1
+                    self._json(500, {"error": "injected failure"})
+                    return
+
+                start = time.perf_counter()
+                prompt = prompt_text(request)
+                unload = request.get("keep_alive") in _UNLOAD
+                if not chat and not prompt:
+                    # Preload / unload request: nothing to generate.
+                    if unload:
+                        server._unload(model)
+                    else:
+                        server._load(model)
+                    self._json(200, {
+                        "model": model,
+                        "created_at": _now(),
+                        "response": "",
+                        "done": True,
+                        "done_reason": "unload" if unload else "load",
+                    })
+                    return
+
+                load = server._load(model)
+
+                tokens = tokenize(server.respond(request))
+                evaluated = server._evaluated(model, prompt)
+                evaluated_tokens = len(tokenize(evaluated)) if evaluated.strip() else 0
+                time.sleep(server.ttft + server.prompt_token_latency * evaluated_tokens)
+                prompt_eval = time.perf_counter() - start - load
+
+                def piece(text: str, done: bool) -> Dict[str, Any]:
+                    body: Dict[str, Any] = {"model": model, "created_at": _now(), "done": done}
+                    if chat:
+                        body["message"] = {"role": "assistant", "content": text}
+                    else:
+                        body["response"] = text
+                    return body
+
+                def final(text: str) -> Dict[str, Any]:
+                    body = piece(text, True)
+                    total = time.perf_counter() - start
+                    body.update(
+                        done_reason="stop",
+                        total_duration=int(total * 1e9),
+                        load_duration=int(load * 1e9),
+                        # Like Ollama, cached prompt tokens are not counted.
+                        prompt_eval_count=max(1, len(evaluated) // 4),
+                        prompt_eval_duration=int(prompt_eval * 1e9),
+                        eval_count=len(tokens),
+                        eval_duration=int((total - prompt_eval - load) * 1e9),
+                    )
+                    return body
+
+                if not request.get("stream", True):
+                    time.sleep(server.token_latency * (len(tokens) - 1))
+                    self._json(200, final("".join(tokens)))
+                    if unload:
+                        server._unload(model)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for i, token in enumerate(tokens):
+                    if i:
+                        time.sleep(server.token_latency)
+                    self._chunk(piece(token, False))
+                self._chunk(final(""))
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+                if unload:
+                    server._unload(model)
+
+        return Handler
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Run a mock Ollama server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--response", default="ok")
+    parser.add_argument("--ttft", type=float, default=0.0)
+    parser.add_argument("--token-latency", type=float, default=0.0)
+    parser.add_argument("--load-time", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--prompt-token-latency", type=float, default=0.0)
+    parser.add_argument("--prompt-cache", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    server = MockOllamaServer(
+        responses=args.response,
+        ttft=args.ttft,
+        token_latency=args.token_latency,
+        load_time=args.load_time,
+        error_rate=args.error_rate,
+        prompt_token_latency=args.prompt_token_latency,
+        prompt_cache=args.prompt_cache,
+        seed=args.seed,
+        host=args.host,
+        port=args.port,
+    )
+    print(f"mock ollama listening on {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,43 @@
 import abc
+import asyncio
 import pkgutil
 import importlib
 import pathlib
-from typing import Dict, Type, Any, List
+import time
+from typing import Dict, Type, Any, List, Iterable, Iterator, AsyncIterator, Tuple
+
+from evocore.model.generation import load_profiles, resolve_config
+from evocore.model.manifest import load_manifest
+from evocore.model.pool import ModelPool, PoolStats
 
 MODEL_REGISTRY: Dict[str, Type["BaseModel"]] = {}
 package = __package__
 
 
+class BatchResult(List[Any]):
+    """
+    Results of a batch call in input order.
+
+    Failed items hold their exception when the batch was run with
+    `return_exceptions=True`; `latencies[i]` is item i's wall time in seconds.
+    """
+
+    def __init__(self, results: Iterable[Any], latencies: List[float]) -> None:
+        super().__init__(results)
+        self.latencies = latencies
+
+    @property
+    def errors(self) -> List[BaseException]:
+        return [r for r in self if isinstance(r, BaseException)]
+
+
 class BaseModel(abc.ABC):
+    # Whether calls accept `format=<JSON schema>` for schema-constrained output.
+    supports_format = False
+
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
-        if hasattr(cls, "name") and cls.name:
+        if isinstance(getattr(cls, "name", None), str) and cls.name:
             MODEL_REGISTRY[cls.name] = cls
 
     def __init__(self, config: Dict[str, Any] | None = None) -> None:
@@ -21,15 +47,122 @@ class BaseModel(abc.ABC):
     def invoke(self, *args, **kwargs) -> Any:
         pass
 
+    async def ainvoke(self, *args, **kwargs) -> Any:
+        return await asyncio.to_thread(self.invoke, *args, **kwargs)
+
+    def stream(self, *args, **kwargs) -> Iterator[Any]:
+        """
+        Yield the response in chunks as the backend produces them.
+
+        Models without native streaming yield their whole `invoke` result as a
+        single chunk.
+        """
+        yield self.invoke(*args, **kwargs)
+
+    async def astream(self, *args, **kwargs) -> AsyncIterator[Any]:
+        yield await self.ainvoke(*args, **kwargs)
+
+    async def abatch(
+        self,
+        prompts: Iterable[Any],
+        max_concurrency: int = 4,
+        return_exceptions: bool = True,
+        timeout: float | None = None,
+    ) -> BatchResult:
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        prompts = list(prompts)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        latencies = [0.0] * len(prompts)
+
+        async def run(index: int, prompt: Any) -> Any:
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    return await asyncio.wait_for(self.ainvoke(prompt), timeout)
+                finally:
+                    latencies[index] = time.perf_counter() - start
+
+        results = await asyncio.gather(
+            *(run(i, prompt) for i, prompt in enumerate(prompts)),
+            return_exceptions=return_exceptions,
+        )
+        return BatchResult(results, latencies)
+
+    def batch(
+        self,
+        prompts: Iterable[Any],
+        max_concurrency: int = 4,
+        return_exceptions: bool = True,
+        timeout: float | None = None,
+    ) -> BatchResult:
+        """
+        Invoke the model on every prompt concurrently through `ainvoke`.
+
+        Must not be called from a running event loop; use `abatch` there.
+        """
+        return asyncio.run(
+            self.abatch(prompts, max_concurrency, return_exceptions, timeout)
+        )
+
+    def close(self) -> None:
+        pass
+
+    async def aclose(self) -> None:
+        self.close()
+
+
+def model_name(model: Any) -> str:
+    return getattr(model, "name", None) or type(model).__name__
+
+
+class ModelWrapper(BaseModel):
+    """
+    Base for models that decorate another model (caching, tracing, ...).
+
+    Every call is delegated to `inner` unless a subclass overrides it, and the
+    wrapper reports the inner model's name.
+    """
+
+    def __init__(self, model: BaseModel) -> None:
+        super().__init__(model.config)
+        self.inner = model
+
+    @property
+    def name(self) -> str:
+        return model_name(self.inner)
+
+    @property
+    def supports_format(self) -> bool:
+        return self.inner.supports_format
+
+    def invoke(self, *args, **kwargs) -> Any:
+        return self.inner.invoke(*args, **kwargs)
+
+    async def ainvoke(self, *args, **kwargs) -> Any:
+        return await self.inner.ainvoke(*args, **kwargs)
+
+    def stream(self, *args, **kwargs) -> Iterator[Any]:
+        yield from self.inner.stream(*args, **kwargs)
+
+    async def astream(self, *args, **kwargs) -> AsyncIterator[Any]:
+        async for chunk in self.inner.astream(*args, **kwargs):
+            yield chunk
+
+    def close(self) -> None:
+        self.inner.close()
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
 
 class ModelManager:
     _is_loaded = False
+    _manifest: Dict[str, str] | None = None
+    _pool = ModelPool()
 
     @classmethod
-    def _load_models(cls) -> None:
-        if cls._is_loaded:
-            return
-
+    def _models_path(cls) -> pathlib.Path:
         if not package:
             raise RuntimeError("ModelManager must be imported as a package")
 
@@ -40,29 +173,136 @@ class ModelManager:
         if not (models_path / "__init__.py").exists():
             raise RuntimeError("models/ must be a Python package")
 
+        return models_path
+
+    @classmethod
+    def _import_module(cls, module_name: str) -> None:
+        try:
+            importlib.import_module(f"{package}.models.{module_name}")
+        except Exception as e:
+            raise ImportError(
+                f"Failed to import model module: {package}.models.{module_name}"
+            ) from e
+
+    @classmethod
+    def _load_manifest(cls) -> Dict[str, str]:
+        if cls._manifest is None:
+            cls._manifest = load_manifest(cls._models_path())
+        return cls._manifest
+
+    @classmethod
+    def _load_models(cls) -> None:
+        if cls._is_loaded:
+            return
+
+        models_path = cls._models_path()
         for _, module_name, _ in pkgutil.iter_modules([str(models_path)]):
-            try:
-                importlib.import_module(f"{package}.models.{module_name}")
-            except Exception as e:
-                raise ImportError(
-                    f"Failed to import model module: {package}.models.{module_name}"
-                ) from e
+            cls._import_module(module_name)
 
         cls._is_loaded = True
 
+    @classmethod
+    def _load_model(cls, name: str) -> None:
+        if name in MODEL_REGISTRY:
+            return
+
+        module_name = cls._load_manifest().get(name)
+        if module_name is None:
+            # Not declared statically (e.g. registered dynamically at import
+            # time): fall back to importing every module.
+            cls._load_models()
+        else:
+            cls._import_module(module_name)
+
     @classmethod
     def reset(cls):
         cls._is_loaded = False
+        cls._manifest = None
+        cls._pool.close()
 
     @classmethod
     def list_models(cls) -> List[str]:
-        cls._load_models()
-        return list(MODEL_REGISTRY.keys())
+        names = list(cls._load_manifest())
+        names.extend(name for name in MODEL_REGISTRY if name not in names)
+        return names
 
     @classmethod
-    def get_model(cls, name: str, config: Dict[str, Any] | None = None) -> BaseModel:
-        cls._load_models()
+    def get_model(
+        cls, name: str, config: Dict[str, Any] | None = None, pooled: bool = True
+    ) -> BaseModel:
+        """
+        Instantiate (or reuse from the pool) model `name` with `config`.
+
+        `config["profile"]` names a generation profile (see
+        `evocore.model.generation.load_profiles`) whose settings fill in any
+        keys not given in `config`.
+        """
+        cls._load_model(name)
         try:
-            return MODEL_REGISTRY[name](config=config)
+            model_cls = MODEL_REGISTRY[name]
         except KeyError:
             raise ValueError(f"Model '{name}' not found")
+
+        config = resolve_config(config)
+        if not pooled:
+            return model_cls(config=config)
+        return cls._pool.get(name, config, lambda: model_cls(config=config))
+
+    @classmethod
+    def from_profile(
+        cls, profile: str, config: Dict[str, Any] | None = None, pooled: bool = True
+    ) -> BaseModel:
+        """Get the model a profile names, configured by that profile."""
+        try:
+            name = load_profiles()[profile]["model"]
+        except KeyError:
+            raise ValueError(f"Profile '{profile}' not found or names no model")
+        return cls.get_model(name, {**(config or {}), "profile": profile}, pooled)
+
+    @classmethod
+    async def ainvoke_many(
+        cls,
+        requests: Iterable[Tuple[str | BaseModel, Any]],
+        max_concurrency: int = 16,
+        config: Dict[str, Any] | None = None,
+        return_exceptions: bool = False,
+    ) -> List[Any]:
+        """
+        Run `(model, prompt)` pairs concurrently, at most `max_concurrency` in
+        flight at once, and return the results in input order.
+
+        `model` is either a registry name, resolved with `config`, or a model
+        instance.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(model: str | BaseModel, prompt: Any) -> Any:
+            if isinstance(model, str):
+                model = cls.get_model(model, config)
+            async with semaphore:
+                return await model.ainvoke(prompt)
+
+        return await asyncio.gather(
+            *(run(model, prompt) for model, prompt in requests),
+            return_exceptions=return_exceptions,
+        )
+
+    @classmethod
+    def release(cls, name: str, config: Dict[str, Any] | None = None) -> bool:
+        """Drop the pooled instance `get_model(name, config)` returns, if any."""
+        return cls._pool.release(name, resolve_config(config))
+
+    @classmethod
+    def close(cls) -> None:
+        cls._pool.close()
+
+    @classmethod
+    def configure_pool(cls, max_size: int = 16, ttl: float | None = None) -> None:
+        cls._pool.close()
+        cls._pool = ModelPool(max_size=max_size, ttl=ttl)
+
+    @classmethod
+    def pool_stats(cls) -> PoolStats:
+        return cls._pool.stats()
@@ -1,3 +1,7 @@
+import asyncio
+import re
+import time
+
 from evocore.model.model_manager import BaseModel
 
 
@@ -8,12 +12,45 @@ class DummyModel(BaseModel):
     This model exists to:
     - verify plugin discovery
     - serve as documentation
-    - support testing
+    - support testing and offline benchmarks
+
+    Config keys (all optional):
+    - response: text to answer with (default "ok")
+    - ttft: seconds before the first chunk
+    - token_latency: seconds between chunks
+    - max_tokens: truncate the response to this many tokens (also per call)
 
     It is NOT intended for production inference.
     """
 
     name = "dummy"
 
-    def invoke(self, *args, **kwargs):
-        return "ok"
+    def _tokens(self, max_tokens=None):
+        tokens = re.findall(r"\s*\S+", self.config.get("response", "ok"))
+        return tokens[: max_tokens or self.config.get("max_tokens")]
+
+    def invoke(self, *args, max_tokens=None, **kwargs):
+        time.sleep(self.config.get("ttft", 0))
+        tokens = self._tokens(max_tokens)
+        time.sleep(self.config.get("token_latency", 0) * max(len(tokens) - 1, 0))
+        return "".join(tokens)
+
+    async def ainvoke(self, *args, max_tokens=None, **kwargs):
+        await asyncio.sleep(self.config.get("ttft", 0))
+        tokens = self._tokens(max_tokens)
+        await asyncio.sleep(self.config.get("token_latency", 0) * max(len(tokens) - 1, 0))
+        return "".join(tokens)
+
+    def stream(self, *args, max_tokens=None, **kwargs):
+        time.sleep(self.config.get("ttft", 0))
+        for i, token in enumerate(self._tokens(max_tokens)):
+            if i:
+                time.sleep(self.config.get("token_latency", 0))
+            yield token
+
+    async def astream(self, *args, max_tokens=None, **kwargs):
+        await asyncio.sleep(self.config.get("ttft", 0))
+        for i, token in enumerate(self._tokens(max_tokens)):
+            if i:
+                await asyncio.sleep(self.config.get("token_latency", 0))
+            yield token
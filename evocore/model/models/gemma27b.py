@@ -1,16 +1,7 @@
 # gemma3:27b
-from typing import Dict, Any
-from langchain_ollama.chat_models import ChatOllama
-from langchain.messages import AIMessage
-from evocore.model.model_manager import BaseModel
+from evocore.model.ollama import OllamaModel
 
 
-class Gemma12(BaseModel):
+class Gemma12(OllamaModel):
     name = "gemma3_27b_local"
-
-    def __init__(self, config: Dict[str, Any] | None = None) -> None:
-        self.config = config or {}
-        self.model = ChatOllama(model="gemma3:27b")
-
-    def invoke(self, prompt: str, max_tokens: int = 100) -> AIMessage:
-        return self.model.invoke(prompt)
+    model_id = "gemma3:27b"
@@ -1,16 +1,7 @@
 # gpt-oss:20b
-from typing import Dict, Any
-from langchain_ollama.chat_models import ChatOllama
-from langchain.messages import AIMessage
-from evocore.model.model_manager import BaseModel
+from evocore.model.ollama import OllamaModel
 
 
-class GPT(BaseModel):
+class GPT(OllamaModel):
     name = "gpt-local"
-
-    def __init__(self, config: Dict[str, Any] | None = None) -> None:
-        self.config = config or {}
-        self.model = ChatOllama(model="gpt-oss:20b")
-
-    def invoke(self, prompt: str, max_tokens: int = 100) -> AIMessage:
-        return self.model.invoke(prompt)
+    model_id = "gpt-oss:20b"
@@ -1,16 +1,7 @@
 # llama3.1:8b
-from typing import Dict, Any
-from langchain_ollama.chat_models import ChatOllama
-from langchain.messages import AIMessage
-from evocore.model.model_manager import BaseModel
+from evocore.model.ollama import OllamaModel
 
 
-class Llama(BaseModel):
+class Llama(OllamaModel):
     name = "llama-local"
-
-    def __init__(self, config: Dict[str, Any] | None = None) -> None:
-        self.config = config or {}
-        self.model = ChatOllama(model="llama3.1:8b")
-
-    def invoke(self, prompt: str, max_tokens: int = 100) -> AIMessage:
-        return self.model.invoke(prompt)
+    model_id = "llama3.1:8b"
@@ -0,0 +1,207 @@
+import threading
+from typing import Dict, Any, Iterator, AsyncIterator, Awaitable, Callable, List, TypeVar
+from langchain_ollama.chat_models import ChatOllama
+from langchain.messages import AIMessage, AIMessageChunk
+from evocore.model.generation import (
+    CHARS_PER_TOKEN,
+    GenerationConfig,
+    estimate_tokens,
+    prompt_text,
+)
+from evocore.model.hosts import default_hosts, get_host_pool, is_host_failure
+from evocore.model.http import get_http_pool
+from evocore.model.model_manager import BaseModel
+
+T = TypeVar("T")
+
+# No tokenizer averages more characters per token than this.
+MAX_CHARS_PER_TOKEN = 8.0
+
+
+class OllamaModel(BaseModel):
+    """
+    Base for models served by Ollama through ChatOllama.
+
+    Subclasses only declare the registry `name` and the Ollama `model_id`.
+    `config["base_url"]` points the model at another Ollama host, and
+    `config["hosts"]` spreads its calls over several (see `evocore.model.hosts`;
+    `config["routing"]` picks the strategy). A call that fails on its host
+    before producing output is retried on another one. The generation keys of
+    `config` (see `GenerationConfig`) become the Ollama request options, and
+    per-call keyword arguments override them.
+
+    The ChatOllama client is built on first use and sends its requests through
+    the process-wide connection pool (`evocore.model.http`).
+    """
+
+    model_id: str = ""
+    supports_format = True
+
+    def __init__(self, config: Dict[str, Any] | None = None) -> None:
+        self.config = config or {}
+        self.generation = GenerationConfig.from_config(self.config)
+        # Refined from the prompt token counts Ollama reports back.
+        self.chars_per_token = CHARS_PER_TOKEN
+        self._model: ChatOllama | None = None
+        self._models: Dict[str, ChatOllama] = {}
+        self._lock = threading.Lock()
+        hosts = self.config.get("hosts") or (
+            [] if self.config.get("base_url") else default_hosts()
+        )
+        self.hosts = (
+            get_host_pool(hosts, self.config.get("routing", "least_outstanding"))
+            if hosts
+            else None
+        )
+
+    @property
+    def model(self) -> ChatOllama:
+        with self._lock:
+            if self._model is None:
+                self._model = self._build_model()
+            return self._model
+
+    def _client(self, url: str) -> ChatOllama:
+        with self._lock:
+            if url not in self._models:
+                self._models[url] = self._build_model(url)
+            return self._models[url]
+
+    def _build_model(self, base_url: str | None = None) -> ChatOllama:
+        pool = get_http_pool()
+        return ChatOllama(
+            model=self.model_id,
+            base_url=base_url or self.config.get("base_url"),
+            sync_client_kwargs=pool.client_kwargs(),
+            async_client_kwargs=pool.async_client_kwargs(),
+        )
+
+    def _request(self, text: str, max_tokens: int | None, params: Dict[str, Any]) -> Dict[str, Any]:
+        # `format` ("json" or a JSON schema) constrains decoding on the server.
+        output_format = params.pop("format", None)
+        generation = self.generation.override(max_tokens=max_tokens, **params)
+        request: Dict[str, Any] = {
+            "options": generation.options(estimate_tokens(text, self.chars_per_token))
+        }
+        if generation.keep_alive is not None:
+            request["keep_alive"] = generation.keep_alive
+        if output_format is not None:
+            request["format"] = output_format
+        return request
+
+    def _calibrate(self, text: str, message: Any) -> None:
+        usage = getattr(message, "usage_metadata", None) or {}
+        if usage.get("input_tokens") and text:
+            ratio = len(text) / usage["input_tokens"]
+            # A prompt served partly from the server's prefix cache reports
+            # only the tokens it evaluated; that says nothing about the ratio.
+            if ratio <= MAX_CHARS_PER_TOKEN:
+                self.chars_per_token = ratio
+
+    def _routed(self, call: Callable[[ChatOllama], T]) -> T:
+        if self.hosts is None:
+            return call(self.model)
+        tried: List[str] = []
+        while True:
+            try:
+                with self.hosts.request(self.model_id, tried) as routed:
+                    tried.append(routed.url)
+                    return call(self._client(routed.url))
+            except Exception as e:
+                if not is_host_failure(e) or len(tried) == len(self.hosts.hosts):
+                    raise
+
+    async def _arouted(self, call: Callable[[ChatOllama], Awaitable[T]]) -> T:
+        if self.hosts is None:
+            return await call(self.model)
+        tried: List[str] = []
+        while True:
+            try:
+                with self.hosts.request(self.model_id, tried) as routed:
+                    tried.append(routed.url)
+                    return await call(self._client(routed.url))
+            except Exception as e:
+                if not is_host_failure(e) or len(tried) == len(self.hosts.hosts):
+                    raise
+
+    def _routed_stream(
+        self, call: Callable[[ChatOllama], Iterator[AIMessageChunk]]
+    ) -> Iterator[AIMessageChunk]:
+        if self.hosts is None:
+            yield from call(self.model)
+            return
+        tried: List[str] = []
+        while True:
+            started = False
+            try:
+                with self.hosts.request(self.model_id, tried) as routed:
+                    tried.append(routed.url)
+                    for chunk in call(self._client(routed.url)):
+                        routed.first_chunk()
+                        started = True
+                        yield chunk
+                return
+            except Exception as e:
+                # Output already handed out cannot be taken back.
+                if started or not is_host_failure(e) or len(tried) == len(self.hosts.hosts):
+                    raise
+
+    async def _arouted_stream(
+        self, call: Callable[[ChatOllama], AsyncIterator[AIMessageChunk]]
+    ) -> AsyncIterator[AIMessageChunk]:
+        if self.hosts is None:
+            async for chunk in call(self.model):
+                yield chunk
+            return
+        tried: List[str] = []
+        while True:
+            started = False
+            try:
+                with self.hosts.request(self.model_id, tried) as routed:
+                    tried.append(routed.url)
+                    async for chunk in call(self._client(routed.url)):
+                        routed.first_chunk()
+                        started = True
+                        yield chunk
+                return
+            except Exception as e:
+                if started or not is_host_failure(e) or len(tried) == len(self.hosts.hosts):
+                    raise
+
+    def invoke(self, prompt: Any, max_tokens: int | None = None, **params) -> AIMessage:
+        text = prompt_text(prompt)
+        request = self._request(text, max_tokens, params)
+        message = self._routed(lambda chat: chat.invoke(prompt, **request))
+        self._calibrate(text, message)
+        return message
+
+    async def ainvoke(self, prompt: Any, max_tokens: int | None = None, **params) -> AIMessage:
+        text = prompt_text(prompt)
+        request = self._request(text, max_tokens, params)
+        message = await self._arouted(lambda chat: chat.ainvoke(prompt, **request))
+        self._calibrate(text, message)
+        return message
+
+    def stream(
+        self, prompt: Any, max_tokens: int | None = None, **params
+    ) -> Iterator[AIMessageChunk]:
+        text = prompt_text(prompt)
+        request = self._request(text, max_tokens, params)
+        for chunk in self._routed_stream(lambda chat: chat.stream(prompt, **request)):
+            self._calibrate(text, chunk)
+            yield chunk
+
+    async def astream(
+        self, prompt: Any, max_tokens: int | None = None, **params
+    ) -> AsyncIterator[AIMessageChunk]:
+        text = prompt_text(prompt)
+        request = self._request(text, max_tokens, params)
+        async for chunk in self._arouted_stream(lambda chat: chat.astream(prompt, **request)):
+            self._calibrate(text, chunk)
+            yield chunk
+
+    def close(self) -> None:
+        # Connections belong to the shared pool; only the client is dropped.
+        with self._lock:
+            self._model = None
+            self._models.clear()
@@ -0,0 +1,111 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Tuple
+
+PoolKey = Tuple[str, str]
+
+
+def normalize_config(config: Dict[str, Any] | None) -> str:
+    """Canonical, order-independent form of a model config used as a pool key."""
+    return json.dumps(config or {}, sort_keys=True, separators=(",", ":"), default=repr)
+
+
+@dataclass
+class PoolStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    size: int = 0
+
+
+@dataclass
+class _Entry:
+    model: Any
+    last_used: float
+
+
+class ModelPool:
+    """
+    Thread-safe LRU pool of model instances keyed by `(name, config)`.
+
+    Entries idle for longer than `ttl` seconds are evicted on the next access.
+    Evicted and released instances are closed.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 16,
+        ttl: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[PoolKey, _Entry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._stats = PoolStats()
+
+    def get(self, name: str, config: Dict[str, Any] | None, factory: Callable[[], Any]) -> Any:
+        key = (name, normalize_config(config))
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._stats.hits += 1
+                entry.last_used = now
+                self._entries.move_to_end(key)
+                return entry.model
+
+            self._stats.misses += 1
+            model = factory()
+            self._entries[key] = _Entry(model=model, last_used=now)
+            while len(self._entries) > self.max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self._evict(evicted)
+            return model
+
+    def release(self, name: str, config: Dict[str, Any] | None = None) -> bool:
+        """Drop and close the pooled instance for `(name, config)`, if any."""
+        with self._lock:
+            entry = self._entries.pop((name, normalize_config(config)), None)
+        if entry is None:
+            return False
+        entry.model.close()
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            entry.model.close()
+
+    def stats(self) -> PoolStats:
+        with self._lock:
+            return PoolStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                size=len(self._entries),
+            )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expire(self, now: float) -> None:
+        if self.ttl is None:
+            return
+        expired = [k for k, e in self._entries.items() if now - e.last_used > self.ttl]
+        for key in expired:
+            self._evict(self._entries.pop(key))
+
+    def _evict(self, entry: _Entry) -> None:
+        self._stats.evictions += 1
+        entry.model.close()
@@ -0,0 +1,67 @@
+"""
+Prompt assembly that keeps shared prefixes byte-identical across calls.
+
+    layout = PromptLayout(SYSTEM_PROMPT, [section("Architecture", stable_json(spec))])
+    messages = layout.render(section("File to generate", stable_json(file)))
+
+Backends such as Ollama reuse the KV cache of the longest prefix a prompt
+shares with the previous one, so only the new suffix has to be evaluated.
+That only works if the shared part comes first and renders to exactly the
+same bytes every time: static sections precede per-call ones, and JSON is
+rendered canonically (`stable_json`).
+"""
+
+import json
+from typing import Any, List, Sequence
+
+import pydantic
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.prompt_values import ChatPromptValue
+
+
+def _canonical(value: Any) -> Any:
+    # Model fields keep their declared order; plain dicts are sorted because
+    # their order comes from wherever they were built (often model output).
+    if isinstance(value, pydantic.BaseModel):
+        return {
+            name: _canonical(getattr(value, name)) for name in type(value).model_fields
+        }
+    if isinstance(value, dict):
+        return {str(k): _canonical(value[k]) for k in sorted(value, key=str)}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def stable_json(value: Any, exclude: Sequence[str] = ()) -> str:
+    """Compact JSON that is byte-identical for equal values; `exclude` drops top-level keys."""
+    data = _canonical(value)
+    if exclude and isinstance(data, dict):
+        data = {k: v for k, v in data.items() if k not in exclude}
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def section(title: str, body: str) -> str:
+    return f"{title}:\n{body}"
+
+
+class PromptLayout:
+    """
+    A system prompt plus static sections that every call of a kind shares.
+    `render()` appends the per-call sections after them, in one user message.
+    """
+
+    def __init__(self, system: str, static: Sequence[str] = ()) -> None:
+        self.system = system.strip()
+        self.static = tuple(static)
+
+    def extend(self, *static: str) -> "PromptLayout":
+        """A layout with more static sections appended after these."""
+        return PromptLayout(self.system, self.static + static)
+
+    def render(self, *dynamic: str) -> ChatPromptValue:
+        messages: List[Any] = [SystemMessage(content=self.system)]
+        body = "\n\n".join(self.static + dynamic)
+        if body:
+            messages.append(HumanMessage(content=body))
+        return ChatPromptValue(messages=messages)
@@ -0,0 +1,318 @@
+"""
+Keep the models a pipeline needs resident on a memory-bounded inference box.
+
+    residency = ResidencyManager(budget_gb=24)
+    architect = ResidentModel(ModelManager.get_model("gpt-local"), residency)
+
+Every call through a `ResidentModel` first acquires its model from the
+manager. Calls to a resident model proceed at once. A model that does not fit
+waits until enough idle models can be unloaded, and waiting work is served a
+model at a time (the model with the most queued calls goes first, older
+requests gain priority with age), so the backend swaps weights as rarely as
+possible. Loaded models are pinned with a keep-alive hint and unloaded
+explicitly, so the backend's own idle timer does not evict them mid-pipeline.
+"""
+
+import asyncio
+import contextlib
+import dataclasses
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, List, Protocol
+
+import ollama
+
+from evocore.model.http import get_http_pool
+from evocore.model.model_manager import BaseModel, ModelWrapper
+from evocore.model.tracing import Tracer, default_tracer
+
+GB = 1024**3
+
+# Approximate resident size (weights plus a default context) per Ollama model.
+FOOTPRINTS_GB = {
+    "gpt-oss:20b": 14.0,
+    "qwen3:30b": 19.0,
+    "qwen3-coder:30b": 19.0,
+    "llama3.1:8b": 5.5,
+    "llama3:instruct": 5.0,
+    "gemma3:latest": 4.0,
+    "gemma3:12b": 9.0,
+    "gemma3:27b": 18.0,
+}
+
+
+class ResidencyBackend(Protocol):
+    def load(self, model_id: str, keep_alive: Any) -> None: ...
+
+    def unload(self, model_id: str) -> None: ...
+
+
+class OllamaBackend:
+    """Load and unload through Ollama's empty-prompt generate requests."""
+
+    def __init__(self, base_url: str | None = None) -> None:
+        self.client = ollama.Client(host=base_url, **get_http_pool().client_kwargs())
+
+    def load(self, model_id: str, keep_alive: Any) -> None:
+        self.client.generate(model=model_id, keep_alive=keep_alive)
+
+    def unload(self, model_id: str) -> None:
+        self.client.generate(model=model_id, keep_alive=0)
+
+
+@dataclass
+class ResidencyStats:
+    loads: int = 0
+    unloads: int = 0
+    # Loads that had to unload another model first.
+    swaps: int = 0
+    load_seconds: float = 0.0
+    wait_seconds: float = 0.0
+    resident: List[str] = field(default_factory=list)
+
+
+class ResidencyManager:
+    """
+    Admit model calls against a memory budget of `budget_gb`.
+
+    Footprints come from `footprints` (model id -> GB), falling back to
+    `FOOTPRINTS_GB` and then `default_footprint_gb`. A model waiting longer
+    than `max_wait` seconds stops new calls to the models it has to replace,
+    so a busy model cannot starve it.
+    """
+
+    def __init__(
+        self,
+        budget_gb: float,
+        backend: ResidencyBackend | None = None,
+        footprints: Dict[str, float] | None = None,
+        default_footprint_gb: float = 8.0,
+        keep_alive: Any = -1,
+        max_wait: float = 30.0,
+        tracer: Tracer | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if budget_gb <= 0:
+            raise ValueError("budget_gb must be positive")
+        self.budget = budget_gb * GB
+        self.backend = backend or OllamaBackend()
+        self.footprints = {**FOOTPRINTS_GB, **(footprints or {})}
+        self.default_footprint_gb = default_footprint_gb
+        self.keep_alive = keep_alive
+        self.max_wait = max_wait
+        self.tracer = tracer or default_tracer
+        self._clock = clock
+
+        self._cond = threading.Condition()
+        # model id -> footprint in bytes, least recently used first
+        self._resident: "OrderedDict[str, float]" = OrderedDict()
+        self._in_use: Counter = Counter()
+        self._waiting: Dict[str, Deque[float]] = {}
+        self._draining: set = set()
+        self._stats = ResidencyStats()
+
+    def footprint(self, model_id: str) -> float:
+        return self.footprints.get(model_id, self.default_footprint_gb) * GB
+
+    def stats(self) -> ResidencyStats:
+        with self._cond:
+            return dataclasses.replace(self._stats, resident=list(self._resident))
+
+    @contextlib.contextmanager
+    def acquire(self, model_id: str) -> Iterator[None]:
+        """Hold `model_id` resident for the duration of the block."""
+        self._enter(model_id)
+        try:
+            yield
+        finally:
+            self._exit(model_id)
+
+    @contextlib.asynccontextmanager
+    async def aacquire(self, model_id: str) -> AsyncIterator[None]:
+        # The waiting thread cannot be interrupted. If the caller is cancelled
+        # first, the model is released once the thread has acquired it.
+        lock = threading.Lock()
+        first: List[str] = []
+
+        def enter() -> None:
+            self._enter(model_id)
+            with lock:
+                first.append("entered")
+            if first[0] == "cancelled":
+                self._exit(model_id)
+
+        try:
+            await asyncio.to_thread(enter)
+        except asyncio.CancelledError:
+            with lock:
+                first.append("cancelled")
+            if first[0] == "entered":
+                self._exit(model_id)
+            raise
+        try:
+            yield
+        finally:
+            self._exit(model_id)
+
+    def preload(self, model_id: str) -> None:
+        with self.acquire(model_id):
+            pass
+
+    def close(self) -> None:
+        """Unload every idle resident model."""
+        with self._cond:
+            idle = [m for m in self._resident if not self._in_use[m]]
+            for model_id in idle:
+                del self._resident[model_id]
+        self._unload(idle)
+
+    def _enter(self, model_id: str) -> None:
+        start = self._clock()
+        with self._cond:
+            waits = self._waiting.setdefault(model_id, deque())
+            waits.append(start)
+            try:
+                while True:
+                    now = self._clock()
+                    if model_id in self._resident and model_id not in self._draining:
+                        victims = None
+                        break
+                    if model_id not in self._resident and self._next(now) == model_id:
+                        victims = self._victims(model_id)
+                        if victims is not None:
+                            break
+                        if now - waits[0] > self.max_wait:
+                            self._draining = self._blocking(model_id)
+                    self._cond.wait(timeout=min(self.max_wait, 0.1))
+            finally:
+                waits.remove(start)
+                if not waits:
+                    del self._waiting[model_id]
+            self._in_use[model_id] += 1
+            self._stats.wait_seconds += self._clock() - start
+            if victims is None:
+                self._resident.move_to_end(model_id)
+                return
+            for victim in victims:
+                del self._resident[victim]
+            self._resident[model_id] = self.footprint(model_id)
+            self._draining = set()
+
+        try:
+            self._unload(victims)
+            with self.tracer.span("load", kind="residency", model=model_id, evicted=victims):
+                started = time.perf_counter()
+                self.backend.load(model_id, self.keep_alive)
+        except BaseException:
+            with self._cond:
+                self._resident.pop(model_id, None)
+            self._exit(model_id)
+            raise
+        with self._cond:
+            self._stats.loads += 1
+            self._stats.swaps += bool(victims)
+            self._stats.load_seconds += time.perf_counter() - started
+
+    def _exit(self, model_id: str) -> None:
+        with self._cond:
+            self._in_use[model_id] -= 1
+            if not self._in_use[model_id]:
+                del self._in_use[model_id]
+            self._cond.notify_all()
+
+    def _unload(self, model_ids: List[str]) -> None:
+        for model_id in model_ids:
+            with self.tracer.span("unload", kind="residency", model=model_id):
+                self.backend.unload(model_id)
+            with self._cond:
+                self._stats.unloads += 1
+
+    def _next(self, now: float) -> str | None:
+        """The non-resident model to swap in next: most queued work, aged."""
+        best, best_score = None, -1.0
+        for model_id, waits in self._waiting.items():
+            if model_id in self._resident:
+                continue
+            score = len(waits) + (now - waits[0]) / self.max_wait
+            if score > best_score:
+                best, best_score = model_id, score
+        return best
+
+    def _free(self) -> float:
+        return self.budget - sum(self._resident.values())
+
+    def _victims(self, model_id: str) -> List[str] | None:
+        """Idle models to unload so `model_id` fits, or None if it must wait."""
+        need = self.footprint(model_id) - self._free()
+        if need <= 0:
+            return []
+        idle = [m for m in self._resident if not self._in_use[m]]
+        # Models nobody is waiting for go first, least recently used first.
+        idle.sort(key=lambda m: m in self._waiting)
+        victims = []
+        for victim in idle:
+            victims.append(victim)
+            need -= self._resident[victim]
+            if need <= 0:
+                return victims
+        # Larger than the whole budget: run it alone.
+        if len(victims) == len(self._resident):
+            return victims
+        return None
+
+    def _blocking(self, model_id: str) -> set:
+        """Busy models that must finish before `model_id` can fit."""
+        need = self.footprint(model_id) - self._free()
+        blocking = set()
+        for victim, size in self._resident.items():
+            if need <= 0:
+                break
+            need -= size
+            if self._in_use[victim]:
+                blocking.add(victim)
+        return blocking
+
+
+def backend_model_id(model: BaseModel) -> str:
+    """The backend's id for `model`, looking through any wrappers."""
+    while isinstance(model, ModelWrapper):
+        model = model.inner
+    return getattr(model, "model_id", None) or model.name
+
+
+class ResidentModel(ModelWrapper):
+    """
+    Acquire the inner model's residency around every call and forward the
+    manager's keep-alive hint so the backend keeps it loaded.
+    """
+
+    def __init__(self, model: BaseModel, manager: ResidencyManager) -> None:
+        super().__init__(model)
+        self.manager = manager
+        self.model_id = backend_model_id(model)
+
+    def preload(self) -> None:
+        self.manager.preload(self.model_id)
+
+    def invoke(self, *args, **kwargs) -> Any:
+        kwargs.setdefault("keep_alive", self.manager.keep_alive)
+        with self.manager.acquire(self.model_id):
+            return self.inner.invoke(*args, **kwargs)
+
+    async def ainvoke(self, *args, **kwargs) -> Any:
+        kwargs.setdefault("keep_alive", self.manager.keep_alive)
+        async with self.manager.aacquire(self.model_id):
+            return await self.inner.ainvoke(*args, **kwargs)
+
+    def stream(self, *args, **kwargs) -> Iterator[Any]:
+        kwargs.setdefault("keep_alive", self.manager.keep_alive)
+        with self.manager.acquire(self.model_id):
+            yield from self.inner.stream(*args, **kwargs)
+
+    async def astream(self, *args, **kwargs) -> AsyncIterator[Any]:
+        kwargs.setdefault("keep_alive", self.manager.keep_alive)
+        async with self.manager.aacquire(self.model_id):
+            async for chunk in self.inner.astream(*args, **kwargs):
+                yield chunk
@@ -0,0 +1,317 @@
+"""
+Collapse concurrent identical model calls into one upstream request.
+
+    model = SingleflightModel(ModelManager.get_model("gpt-local"))
+
+Calls with the same model, arguments and config that overlap in time share
+one call to the inner model. Every waiter gets the same result or exception.
+Streams are fanned out chunk by chunk, and a waiter that joins late first
+replays the chunks already received. Nothing is kept once the call finishes;
+use `CachedModel` to remember results.
+
+Sync calls coalesce across threads, async calls within their event loop.
+Each call records a `singleflight` span named "upstream" or "coalesced"; for
+streams it only covers joining the call.
+"""
+
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Sequence
+
+from evocore.model.cache import make_key
+from evocore.model.model_manager import BaseModel, ModelWrapper
+from evocore.model.tracing import Tracer, default_tracer
+
+
+@dataclass
+class SingleflightStats:
+    # Calls that reached the inner model.
+    upstream: int = 0
+    # Calls served by another caller's in-flight request.
+    coalesced: int = 0
+    in_flight: int = 0
+
+
+# Marks that a reader has to fetch the next chunk from the source itself.
+_PULL = object()
+
+
+class _Call:
+    """One sync in-flight call, shared by every caller with its key."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class _Broadcast:
+    """
+    Fan one chunk iterator out to any number of subscribers. Whoever runs out
+    of buffered chunks first pulls the next one from the source, so the
+    stream keeps moving while at least one subscriber reads it.
+    """
+
+    def __init__(self, source: Iterator[Any], on_done: Callable[[], None]) -> None:
+        self.source = source
+        self.on_done = on_done
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self.subscribers = 0
+        self._pulling = False
+        self._cond = threading.Condition()
+
+    def join(self) -> None:
+        # Counted when the call is looked up, so the stream cannot be
+        # abandoned between a caller finding it and starting to read it.
+        with self._cond:
+            self.subscribers += 1
+
+    def _finish(self, error: BaseException | None = None) -> None:
+        with self._cond:
+            self._pulling = False
+            self.done = True
+            self.error = error
+            self._cond.notify_all()
+        self.on_done()
+
+    def subscribe(self) -> Iterator[Any]:
+        """Read the stream; `join()` must have been called for this reader."""
+        index = 0
+        try:
+            while True:
+                with self._cond:
+                    while index >= len(self.chunks) and not self.done and self._pulling:
+                        self._cond.wait()
+                    if index < len(self.chunks):
+                        chunk = self.chunks[index]
+                    elif self.done:
+                        if self.error is not None:
+                            raise self.error
+                        return
+                    else:
+                        self._pulling = True
+                        chunk = _PULL
+                if chunk is _PULL:
+                    try:
+                        chunk = next(self.source)
+                    except StopIteration:
+                        self._finish()
+                        continue
+                    except BaseException as e:
+                        self._finish(e)
+                        raise
+                    with self._cond:
+                        self._pulling = False
+                        self.chunks.append(chunk)
+                        self._cond.notify_all()
+                index += 1
+                yield chunk
+        finally:
+            with self._cond:
+                self.subscribers -= 1
+                abandoned = self.subscribers == 0 and not self.done
+            if abandoned:
+                self._finish(RuntimeError("stream abandoned by all readers"))
+                close = getattr(self.source, "close", None)
+                if close is not None:
+                    close()
+
+
+class _AsyncBroadcast:
+    """`_Broadcast` for async iterators, within one event loop."""
+
+    def __init__(self, source: AsyncIterator[Any], on_done: Callable[[], None]) -> None:
+        self.source = source
+        self.on_done = on_done
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self.subscribers = 0
+        self._pulling = False
+        self._cond = asyncio.Condition()
+
+    def join(self) -> None:
+        self.subscribers += 1
+
+    def _finish(self, error: BaseException | None = None) -> None:
+        self._pulling = False
+        self.done = True
+        self.error = error
+        self._cond.notify_all()
+        self.on_done()
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        index = 0
+        try:
+            while True:
+                async with self._cond:
+                    while index >= len(self.chunks) and not self.done and self._pulling:
+                        await self._cond.wait()
+                    if index < len(self.chunks):
+                        chunk = self.chunks[index]
+                    elif self.done:
+                        if self.error is not None:
+                            raise self.error
+                        return
+                    else:
+                        self._pulling = True
+                        chunk = _PULL
+                if chunk is _PULL:
+                    try:
+                        chunk = await self.source.__anext__()
+                    except StopAsyncIteration:
+                        async with self._cond:
+                            self._finish()
+                        continue
+                    except BaseException as e:
+                        async with self._cond:
+                            self._finish(e)
+                        raise
+                    async with self._cond:
+                        self._pulling = False
+                        self.chunks.append(chunk)
+                        self._cond.notify_all()
+                index += 1
+                yield chunk
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done:
+                async with self._cond:
+                    self._finish(RuntimeError("stream abandoned by all readers"))
+                await self.source.aclose()
+
+
+class SingleflightModel(ModelWrapper):
+    """Share one inner call between concurrent identical calls; see the module docstring."""
+
+    def __init__(self, model: BaseModel, tracer: Tracer | None = None) -> None:
+        super().__init__(model)
+        self.tracer = tracer or default_tracer
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._streams: Dict[str, _Broadcast] = {}
+        # (event loop, key) -> future or broadcast, for async callers.
+        self._async: Dict[tuple, Any] = {}
+        # Running upstream tasks of async calls; the loop only keeps weak references.
+        self._tasks: set = set()
+        self._stats = SingleflightStats()
+
+    def stats(self) -> SingleflightStats:
+        with self._lock:
+            return SingleflightStats(**vars(self._stats))
+
+    def _key(self, method: str, args: Sequence[Any], kwargs: Dict[str, Any]) -> str:
+        call = {"method": method, "args": list(args), "kwargs": kwargs}
+        return make_key(self.name, call, self.config)
+
+    def _count(self, leader: bool) -> None:
+        # Called with the lock held.
+        if leader:
+            self._stats.upstream += 1
+            self._stats.in_flight += 1
+        else:
+            self._stats.coalesced += 1
+
+    def _landed(self, table: Dict, key: Any) -> Callable[[], None]:
+        def done() -> None:
+            with self._lock:
+                table.pop(key, None)
+                self._stats.in_flight -= 1
+
+        return done
+
+    def _span(self, leader: bool):
+        return self.tracer.span(
+            "upstream" if leader else "coalesced", kind="singleflight", model=self.name
+        )
+
+    def invoke(self, *args, **kwargs) -> Any:
+        key = self._key("invoke", args, kwargs)
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            self._count(leader)
+        with self._span(leader):
+            if leader:
+                try:
+                    call.result = self.inner.invoke(*args, **kwargs)
+                except BaseException as e:
+                    call.error = e
+                finally:
+                    self._landed(self._calls, key)()
+                    call.done.set()
+            else:
+                call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+    async def _upstream(self, future: asyncio.Future, key: tuple, args, kwargs) -> None:
+        try:
+            future.set_result(await self.inner.ainvoke(*args, **kwargs))
+        except asyncio.CancelledError:
+            # Only the shared call itself was cancelled, not its waiters.
+            future.set_exception(RuntimeError("shared upstream call was cancelled"))
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            self._landed(self._async, key)()
+
+    async def ainvoke(self, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        key = (loop, self._key("invoke", args, kwargs))
+        with self._lock:
+            future = self._async.get(key)
+            leader = future is None
+            if leader:
+                future = self._async[key] = loop.create_future()
+                # Retrieved here in case every waiter is cancelled.
+                future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._count(leader)
+        with self._span(leader):
+            if leader:
+                # The call runs in its own task, so cancelling the caller that
+                # started it does not cancel it for the others.
+                task = loop.create_task(self._upstream(future, key, args, kwargs))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            return await asyncio.shield(future)
+
+    def stream(self, *args, **kwargs) -> Iterator[Any]:
+        key = self._key("stream", args, kwargs)
+        with self._lock:
+            broadcast = self._streams.get(key)
+            leader = broadcast is None
+            if leader:
+                broadcast = self._streams[key] = _Broadcast(
+                    iter(self.inner.stream(*args, **kwargs)), self._landed(self._streams, key)
+                )
+            broadcast.join()
+            self._count(leader)
+        # Readers of one stream may interleave in a thread, so the span only
+        # covers joining and is not held open across yields.
+        with self._span(leader):
+            pass
+        yield from broadcast.subscribe()
+
+    async def astream(self, *args, **kwargs) -> AsyncIterator[Any]:
+        key = (asyncio.get_running_loop(), self._key("stream", args, kwargs))
+        with self._lock:
+            broadcast = self._async.get(key)
+            leader = broadcast is None
+            if leader:
+                broadcast = self._async[key] = _AsyncBroadcast(
+                    aiter(self.inner.astream(*args, **kwargs)), self._landed(self._async, key)
+                )
+            broadcast.join()
+            self._count(leader)
+        with self._span(leader):
+            pass
+        async for chunk in broadcast.subscribe():
+            yield chunk
@@ -0,0 +1,233 @@
+"""
+Schema-constrained JSON output for pydantic schemas.
+
+    architecture = StructuredOutput(ArchitectureSpec).invoke(model, messages)
+
+Models that support it (`supports_format`) get the schema as their decoding
+format, so the backend can only produce valid JSON. Anything that still fails
+to validate goes through a local repair pass (fences, surrounding prose,
+trailing commas, Python literals, truncated brackets). If that fails too,
+the model is re-asked with only the schema, its invalid output and the
+validation error, not the original prompt.
+"""
+
+import functools
+import json
+import operator
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Generic, Type, TypeVar
+
+import pydantic
+from langchain_core.prompts import ChatPromptTemplate
+
+from evocore.model.generation import estimate_tokens
+from evocore.model.model_manager import BaseModel
+from evocore.model.tracing import Tracer, default_tracer
+
+Schema = TypeVar("Schema", bound=pydantic.BaseModel)
+
+REASK_SYSTEM_PROMPT = """
+You correct JSON documents so they validate against a JSON schema.
+Return ONLY the corrected JSON document, without markdown fences or comments.
+Keep every value that is already valid.
+"""
+
+REASK_HUMAN_PROMPT = """
+JSON schema:
+{schema}
+
+Invalid JSON:
+{output}
+
+Validation error:
+{error}
+"""
+
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_PY_LITERAL = re.compile(r"\b(True|False|None)\b")
+# A JSON string token, possibly left open by truncation.
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"?', re.DOTALL)
+
+
+class StructuredOutputError(ValueError):
+    def __init__(self, message: str, output: str) -> None:
+        super().__init__(message)
+        self.output = output
+
+
+@dataclass
+class StructuredStats:
+    calls: int = 0
+    # Responses that did not validate as returned by the model.
+    parse_failures: int = 0
+    repaired: int = 0
+    reasks: int = 0
+    failures: int = 0
+    # Completion tokens spent on responses that had to be discarded.
+    wasted_tokens: int = 0
+
+
+def _text(message: Any) -> str:
+    return message if isinstance(message, str) else getattr(message, "content", "")
+
+
+def _completion_tokens(message: Any) -> int:
+    usage = getattr(message, "usage_metadata", None) or {}
+    return usage.get("output_tokens") or estimate_tokens(_text(message))
+
+
+def _sub_outside_strings(pattern: re.Pattern, repl: Any, text: str) -> str:
+    """`pattern.sub(repl, ...)` on the parts of `text` outside JSON strings."""
+    parts, last = [], 0
+    for match in _STRING.finditer(text):
+        parts.append(pattern.sub(repl, text[last : match.start()]))
+        parts.append(match.group())
+        last = match.end()
+    parts.append(pattern.sub(repl, text[last:]))
+    return "".join(parts)
+
+
+def _close_brackets(text: str) -> str:
+    """Close strings and brackets left open by a truncated document."""
+    stack = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+    if in_string:
+        text += '"'
+    text = text.rstrip().rstrip(",")
+    return text + "".join(reversed(stack))
+
+
+def repair_json(text: str) -> str:
+    """Best-effort cleanup of almost-JSON model output."""
+    text = text.strip()
+    fence = re.search(r"```(?:json)?\s*\n(.*?)(?:```|$)", text, re.DOTALL)
+    if fence:
+        text = fence.group(1).strip()
+    start = min((i for i in (text.find("{"), text.find("[")) if i != -1), default=-1)
+    if start == -1:
+        return text
+    end = max(text.rfind("}"), text.rfind("]"))
+    body = text[start : end + 1] if end > start else text[start:]
+    try:
+        json.loads(body)
+        return body
+    except ValueError:
+        pass
+    body = _sub_outside_strings(_PY_LITERAL, lambda m: _PY_LITERALS[m.group(1)], body)
+    body = _sub_outside_strings(_TRAILING_COMMA, r"\1", body)
+    try:
+        json.loads(body)
+        return body
+    except ValueError:
+        # Maybe truncated: drop what follows the last complete value.
+        return _sub_outside_strings(_TRAILING_COMMA, r"\1", _close_brackets(text[start:]))
+
+
+class StructuredOutput(Generic[Schema]):
+    """Get a validated `schema` instance out of a model, with at most `max_reasks` re-asks."""
+
+    def __init__(
+        self, schema: Type[Schema], max_reasks: int = 2, tracer: Tracer | None = None
+    ) -> None:
+        self.schema = schema
+        self.max_reasks = max_reasks
+        self.tracer = tracer or default_tracer
+        self.json_schema: Dict[str, Any] = schema.model_json_schema()
+        self._lock = threading.Lock()
+        self._stats = StructuredStats()
+        self._reask = ChatPromptTemplate.from_messages(
+            [("system", REASK_SYSTEM_PROMPT), ("human", REASK_HUMAN_PROMPT)]
+        )
+
+    def stats(self) -> StructuredStats:
+        with self._lock:
+            return StructuredStats(**vars(self._stats))
+
+    def _count(self, **deltas: int) -> None:
+        with self._lock:
+            for key, value in deltas.items():
+                setattr(self._stats, key, getattr(self._stats, key) + value)
+
+    def _call(
+        self, model: BaseModel, prompt: Any, on_chunk: Callable[[str], None] | None = None
+    ) -> Any:
+        kwargs = {"format": self.json_schema} if model.supports_format else {}
+        if on_chunk is None:
+            return model.invoke(prompt, **kwargs)
+        chunks = []
+        for chunk in model.stream(prompt, **kwargs):
+            on_chunk(_text(chunk))
+            chunks.append(chunk)
+        if chunks and all(isinstance(c, str) for c in chunks):
+            return "".join(chunks)
+        return functools.reduce(operator.add, chunks) if chunks else ""
+
+    def parse(self, text: str) -> Schema:
+        """Validate `text`, falling back to `repair_json`; raises ValidationError."""
+        try:
+            return self.schema.model_validate_json(text)
+        except pydantic.ValidationError:
+            repaired = repair_json(text)
+            if repaired == text:
+                raise
+            result = self.schema.model_validate_json(repaired)
+            self._count(repaired=1)
+            return result
+
+    def invoke(
+        self, model: BaseModel, prompt: Any, on_chunk: Callable[[str], None] | None = None
+    ) -> Schema:
+        """
+        Call `model` and validate its answer. With `on_chunk` the first call is
+        streamed and every text chunk is passed to it as it arrives.
+        """
+        name = self.schema.__name__
+        with self.tracer.span("structured", kind="parse", schema=name) as span:
+            self._count(calls=1)
+            attempts = {"parse_failures": 0, "reasks": 0, "wasted_tokens": 0}
+            message = self._call(model, prompt, on_chunk)
+            try:
+                while True:
+                    output = _text(message)
+                    try:
+                        return self.parse(output)
+                    except pydantic.ValidationError as e:
+                        error = e
+                    attempts["parse_failures"] += 1
+                    attempts["wasted_tokens"] += _completion_tokens(message)
+                    if attempts["reasks"] >= self.max_reasks:
+                        self._count(failures=1)
+                        raise StructuredOutputError(
+                            f"{name} output did not validate after "
+                            f"{attempts['reasks']} re-asks: {error}",
+                            output,
+                        )
+                    attempts["reasks"] += 1
+                    reask = self._reask.invoke(
+                        {
+                            "schema": json.dumps(self.json_schema),
+                            "output": output,
+                            "error": str(error),
+                        }
+                    )
+                    message = self._call(model, reask)
+            finally:
+                self._count(**attempts)
+                span.set(**attempts)
@@ -0,0 +1,402 @@
+import contextlib
+import contextvars
+import json
+import os
+import pathlib
+import secrets
+import threading
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, AsyncIterator, Dict, Iterator, List, Protocol, Sequence, Tuple
+
+from evocore.model.model_manager import BaseModel, ModelWrapper
+
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+@dataclass
+class Span:
+    name: str
+    kind: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start: float
+    end: float | None = None
+    duration: float | None = None
+    status: str = "ok"
+    error: str | None = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    # perf_counter() at the start, for the duration; not exported.
+    _started: float = field(default=0.0, repr=False)
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        del data["_started"]
+        return data
+
+
+class Exporter(Protocol):
+    def export(self, span: Span) -> None: ...
+
+
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+    "evocore_current_span", default=None
+)
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+class Tracer:
+    """
+    Records nested spans and hands each finished span to the exporters.
+
+    Parent/child links follow the current context, so spans opened inside
+    LangGraph nodes or asyncio tasks attach to the span that was active when
+    the work was started.
+    """
+
+    def __init__(self, exporters: Sequence[Exporter] = ()) -> None:
+        self.exporters: List[Exporter] = list(exporters)
+        self._attempts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def start(self, name: str, kind: str = "internal", **attributes: Any) -> Span:
+        """
+        Open a span under the current one without making it current; end it
+        with `finish()`. For work that yields to its caller, such as streams,
+        where only `activate()` around each step may make it current.
+        """
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            kind=kind,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            start=time.time(),
+            attributes=attributes,
+            _started=time.perf_counter(),
+        )
+        return span
+
+    def finish(self, span: Span, error: BaseException | None = None) -> None:
+        if error is not None:
+            span.status = "error"
+            span.error = f"{type(error).__name__}: {error}"
+        span.duration = time.perf_counter() - span._started
+        span.end = span.start + span.duration
+        for exporter in self.exporters:
+            exporter.export(span)
+
+    @contextlib.contextmanager
+    def activate(self, span: Span) -> Iterator[Span]:
+        """Make `span` the current span for the duration of the block."""
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            _current_span.reset(token)
+
+    @contextlib.contextmanager
+    def span(self, name: str, kind: str = "internal", **attributes: Any) -> Iterator[Span]:
+        span = self.start(name, kind, **attributes)
+        try:
+            with self.activate(span):
+                yield span
+        except BaseException as e:
+            self.finish(span, e)
+            raise
+        self.finish(span)
+
+    def attempt(self, key: str) -> int:
+        """Count attempts of a retried unit of work; returns 1 on the first try."""
+        with self._lock:
+            self._attempts[key] = self._attempts.get(key, 0) + 1
+            return self._attempts[key]
+
+    def succeeded(self, key: str) -> None:
+        with self._lock:
+            self._attempts.pop(key, None)
+
+
+# Process-wide tracer; exporters are attached by the entry point.
+default_tracer = Tracer()
+
+
+class JsonlExporter:
+    """Append every finished span as one JSON line."""
+
+    def __init__(self, path: str | pathlib.Path) -> None:
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("a")
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=repr)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def _labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in labels)
+    return "{" + inner + "}"
+
+
+class _Histogram:
+    def __init__(self) -> None:
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+
+
+class MetricsExporter:
+    """
+    Aggregate spans into Prometheus text-format metrics.
+
+    Exposes span durations per name/kind/status, model token counters, TTFT,
+    server-reported prompt-eval and total time per call, node retries, model
+    loads/unloads/swaps, structured-output parse failures, re-asks and wasted
+    tokens, coalesced vs upstream calls, prompt tokens sent and saved by
+    per-file context slicing, and hedged calls, fired hedges and backup wins.
+    Read them with `render()`, `write(path)` or `serve(port)`.
+    """
+
+    def __init__(self, prefix: str = "evocore") -> None:
+        self.prefix = prefix
+        self._durations: Dict[Tuple, _Histogram] = defaultdict(_Histogram)
+        self._ttft: Dict[Tuple, _Histogram] = defaultdict(_Histogram)
+        self._prompt_eval: Dict[Tuple, _Histogram] = defaultdict(_Histogram)
+        self._server_time: Dict[Tuple, _Histogram] = defaultdict(_Histogram)
+        self._counters: Dict[Tuple[str, Tuple], int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+
+    def export(self, span: Span) -> None:
+        attrs = span.attributes
+        with self._lock:
+            key = (("name", span.name), ("kind", span.kind), ("status", span.status))
+            self._durations[key].observe(span.duration or 0.0)
+            if "model" in attrs:
+                model = (("model", attrs["model"]),)
+                for attr in ("prompt_tokens", "completion_tokens"):
+                    if attrs.get(attr):
+                        self._counters[(f"model_{attr}_total", model)] += attrs[attr]
+                if attrs.get("ttft") is not None:
+                    self._ttft[model].observe(attrs["ttft"])
+                if attrs.get("server_seconds") is not None:
+                    self._server_time[model].observe(attrs["server_seconds"])
+                    self._prompt_eval[model].observe(attrs.get("prompt_eval_seconds", 0.0))
+            if attrs.get("retries"):
+                self._counters[("retries_total", (("name", span.name),))] += attrs["retries"]
+            if span.kind == "parse":
+                schema = (("schema", attrs.get("schema", "")),)
+                for attr in ("parse_failures", "reasks", "wasted_tokens"):
+                    if attrs.get(attr):
+                        self._counters[(f"structured_{attr}_total", schema)] += attrs[attr]
+            if span.kind == "context":
+                for attr in ("prompt_tokens", "saved_tokens", "over_budget"):
+                    if attrs.get(attr):
+                        self._counters[(f"context_{attr}_total", ())] += int(attrs[attr])
+            if span.kind == "singleflight":
+                model = (("model", attrs.get("model", "")),)
+                self._counters[(f"singleflight_{span.name}_total", model)] += 1
+            if span.kind == "residency" and span.status == "ok":
+                model = (("model", attrs.get("model", "")),)
+                self._counters[(f"residency_{span.name}s_total", model)] += 1
+                if attrs.get("evicted"):
+                    self._counters[("residency_swaps_total", model)] += 1
+            if span.kind == "hedge":
+                model = (("model", attrs.get("model", "")),)
+                self._counters[("hedge_calls_total", model)] += 1
+                if attrs.get("fired"):
+                    self._counters[("hedge_fired_total", model)] += 1
+                if attrs.get("winner") == "backup":
+                    self._counters[("hedge_backup_wins_total", model)] += 1
+
+    def render(self) -> str:
+        p = self.prefix
+        lines = []
+        with self._lock:
+            for metric, histograms in (
+                ("span_duration_seconds", self._durations),
+                ("model_ttft_seconds", self._ttft),
+                ("model_prompt_eval_seconds", self._prompt_eval),
+                ("model_server_seconds", self._server_time),
+            ):
+                lines.append(f"# TYPE {p}_{metric} histogram")
+                for labels, h in sorted(histograms.items()):
+                    for bound, count in zip(DURATION_BUCKETS, h.buckets):
+                        le = labels + (("le", str(bound)),)
+                        lines.append(f"{p}_{metric}_bucket{_labels(le)} {count}")
+                    le = labels + (("le", "+Inf"),)
+                    lines.append(f"{p}_{metric}_bucket{_labels(le)} {h.count}")
+                    lines.append(f"{p}_{metric}_sum{_labels(labels)} {h.sum}")
+                    lines.append(f"{p}_{metric}_count{_labels(labels)} {h.count}")
+            names = sorted({name for name, _ in self._counters})
+            for name in names:
+                lines.append(f"# TYPE {p}_{name} counter")
+                for (metric, labels), value in sorted(self._counters.items()):
+                    if metric == name:
+                        lines.append(f"{p}_{name}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str | pathlib.Path) -> None:
+        path = pathlib.Path(path)
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_text(self.render())
+        os.replace(tmp, path)
+
+    def serve(self, port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve `/metrics` from a background thread."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                data = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server
+
+
+def _usage(value: Any) -> Dict[str, int]:
+    usage = getattr(value, "usage_metadata", None) or {}
+    return {
+        "prompt_tokens": usage.get("input_tokens", 0),
+        "completion_tokens": usage.get("output_tokens", 0),
+    }
+
+
+# Server-side timings Ollama reports with the last chunk, in nanoseconds.
+_TIMINGS = {
+    "load_duration": "load_seconds",
+    "prompt_eval_duration": "prompt_eval_seconds",
+    "eval_duration": "eval_seconds",
+    "total_duration": "server_seconds",
+}
+
+
+def _timings(value: Any) -> Dict[str, float]:
+    metadata = getattr(value, "response_metadata", None) or {}
+    return {
+        attr: metadata[key] / 1e9
+        for key, attr in _TIMINGS.items()
+        if isinstance(metadata.get(key), (int, float))
+    }
+
+
+def _has_text(chunk: Any) -> bool:
+    return bool(chunk if isinstance(chunk, str) else getattr(chunk, "content", None))
+
+
+_END = object()
+
+
+def _observe_chunk(span: Span, chunk: Any, started: float, totals: Dict[str, int]) -> None:
+    if "ttft" not in span.attributes and _has_text(chunk):
+        span.set(ttft=time.perf_counter() - started)
+    for key, value in _usage(chunk).items():
+        totals[key] += value
+    span.set(**_timings(chunk))
+
+
+class TracedModel(ModelWrapper):
+    """
+    Record a `model` span per call with token counts, for streams TTFT, and
+    the server's load / prompt-eval / eval / total time when it reports them.
+    A prompt-eval time that is small next to the total shows that the
+    backend reused its cache for the prompt's prefix.
+    """
+
+    def __init__(self, model: BaseModel, tracer: Tracer | None = None) -> None:
+        super().__init__(model)
+        self.tracer = tracer or default_tracer
+
+    def invoke(self, *args, **kwargs) -> Any:
+        with self.tracer.span("invoke", kind="model", model=self.name) as span:
+            result = self.inner.invoke(*args, **kwargs)
+            span.set(**_usage(result), **_timings(result))
+            return result
+
+    async def ainvoke(self, *args, **kwargs) -> Any:
+        with self.tracer.span("invoke", kind="model", model=self.name) as span:
+            result = await self.inner.ainvoke(*args, **kwargs)
+            span.set(**_usage(result), **_timings(result))
+            return result
+
+    def stream(self, *args, **kwargs) -> Iterator[Any]:
+        # The span is current only while the inner stream runs, never across
+        # a yield, so the consumer's own spans do not nest under it.
+        span = self.tracer.start("stream", kind="model", model=self.name)
+        started = time.perf_counter()
+        totals = {"prompt_tokens": 0, "completion_tokens": 0}
+        try:
+            with self.tracer.activate(span):
+                chunks = iter(self.inner.stream(*args, **kwargs))
+            while True:
+                with self.tracer.activate(span):
+                    chunk = next(chunks, _END)
+                if chunk is _END:
+                    break
+                _observe_chunk(span, chunk, started, totals)
+                yield chunk
+            span.set(**totals)
+        except BaseException as e:
+            self.tracer.finish(span, e)
+            raise
+        self.tracer.finish(span)
+
+    async def astream(self, *args, **kwargs) -> AsyncIterator[Any]:
+        span = self.tracer.start("stream", kind="model", model=self.name)
+        started = time.perf_counter()
+        totals = {"prompt_tokens": 0, "completion_tokens": 0}
+        try:
+            with self.tracer.activate(span):
+                chunks = aiter(self.inner.astream(*args, **kwargs))
+            while True:
+                with self.tracer.activate(span):
+                    chunk = await anext(chunks, _END)
+                if chunk is _END:
+                    break
+                _observe_chunk(span, chunk, started, totals)
+                yield chunk
+            span.set(**totals)
+        except BaseException as e:
+            self.tracer.finish(span, e)
+            raise
+        self.tracer.finish(span)
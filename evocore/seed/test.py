@@ -1,23 +1,23 @@
-from typing import TypedDict
-from langchain_ollama.chat_models import ChatOllama
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 from prompts import architect_prompt, format_instructions
 from time import time
 
+from evocore.model.model_manager import ModelManager
+
 # system_prompt = architect_prompt.format(format_instructions=format_instructions)
 human_prompt = "generate the project architecture according to the requirement of the user: {description}"
 
 
+# Registry names; models are built on first use and share one HTTP pool.
 llms = {
-    "llama_it": ChatOllama(model="llama3:instruct"),
-    "llama": ChatOllama(model="llama3.1:8b"),
-    "gemma27": ChatOllama(model="gemma3:27b"),
-    "gemma12": ChatOllama(model="gemma3:12b"),
-    "gemma": ChatOllama(model="gemma3:latest"),
-    "gpt": ChatOllama(model="gpt-oss:20b"),
-    "qwen": ChatOllama(model="qwen3:30b"),
-    "qwen_code": ChatOllama(model="qwen3-coder:30b"),
+    "llama_it": "llama-instruct-local",
+    "llama": "llama-local",
+    "gemma27": "gemma3_27b_local",
+    "gemma12": "gemma3_12b_local",
+    "gemma": "gemma3_local",
+    "gpt": "gpt-local",
+    "qwen": "qwen_local",
+    "qwen_code": "qwen_code_local",
 }
 
 prompt = ChatPromptTemplate.from_messages(
@@ -29,12 +29,12 @@ prompt = ChatPromptTemplate.from_messages(
 
 description = "this is a code agent, deploy on the GCP's cloud run, using langgraph as the agent base platform, using fastapi for the backend."
 
-chain = prompt | llms["gemma"] | StrOutputParser()
-resp = chain.invoke({"description": description})
+if __name__ == "__main__":
+    messages = prompt.invoke({"description": description})
+    resp = ModelManager.get_model(llms["gemma"]).invoke(messages).content
 
-print(resp)
+    print(resp)
 
-# for name in llms:
-#     state = time()
-#     chain = prompt | llms[name] | StrOutputParser
-#     chain.invoke({"description": description})
+    # for name in llms:
+    #     state = time()
+    #     ModelManager.get_model(llms[name]).invoke(messages)
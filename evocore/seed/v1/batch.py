@@ -0,0 +1,249 @@
+"""
+Run the seed graph over a JSONL file of descriptions.
+
+    python -m evocore.seed.v1.batch jobs.jsonl --output results.jsonl --workers 4
+
+Each input line is `{"id": ..., "description": ...}` (`request_id` and `body`
+are accepted as well) or a bare description string, identified by its line
+number. Jobs are read lazily and run on a bounded pool of worker threads.
+The work is I/O-bound on the inference server, and threads share the process's
+HTTP pool, response cache and residency manager. One result line is appended
+to the output per job as soon as it finishes, so a crashed run is resumed by
+running the same command again: ids already recorded as "ok" are skipped and
+failed jobs are retried. A line that is not a valid job is recorded as a
+failed job, under its line number, and the batch goes on. So is a job whose id
+is not a safe relative path when files are written to an output directory.
+Progress, throughput and ETA go to stderr.
+"""
+
+import argparse
+import json
+import pathlib
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, Set, Sequence, Tuple
+
+from evocore.seed.v1 import main as seed
+from evocore.seed.v1.files import safe_target
+
+
+def _job(number: int, item: Any) -> Tuple[str, str]:
+    if isinstance(item, str):
+        return str(number), item
+    if not isinstance(item, dict):
+        raise ValueError(f"line {number}: expected an object or a string")
+    job_id = item.get("id", item.get("request_id", number))
+    description = item.get("description") or item.get("body")
+    if not description:
+        raise ValueError(f"line {number}: no description")
+    if item.get("title") and "description" not in item:
+        description = f"{item['title']}\n\n{description}"
+    return str(job_id), description
+
+
+def read_jobs(
+    path: str | pathlib.Path, on_error: Callable[[int, str], None] | None = None
+) -> Iterator[Tuple[str, str]]:
+    """
+    Yield `(id, description)` per non-empty line of `path`. A line that is not
+    a valid job raises ValueError, or with `on_error` is passed to
+    `on_error(line number, error)` and skipped.
+    """
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"line {number}: invalid JSON: {e}") from e
+                job = _job(number, item)
+            except ValueError as e:
+                if on_error is None:
+                    raise
+                on_error(number, str(e))
+                continue
+            yield job
+
+
+def finished_ids(path: str | pathlib.Path) -> Set[str]:
+    """Ids recorded as "ok" in an earlier run's output. A torn last line is ignored."""
+    path = pathlib.Path(path)
+    if not path.exists():
+        return set()
+    done = set()
+    for line in path.read_text().splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict) and record.get("status") == "ok" and "id" in record:
+            done.add(str(record["id"]))
+    return done
+
+
+def _format_seconds(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+@dataclass
+class BatchProgress:
+    total: int
+    skipped: int = 0
+    done: int = 0
+    failed: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    def rate(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return (self.done + self.failed) / elapsed if elapsed > 0 else 0.0
+
+    def eta(self) -> float | None:
+        rate = self.rate()
+        remaining = self.total - self.skipped - self.done - self.failed
+        return remaining / rate if rate > 0 else None
+
+    def line(self) -> str:
+        eta = self.eta()
+        return (
+            f"{self.done + self.failed + self.skipped}/{self.total} "
+            f"({self.done} ok, {self.failed} failed, {self.skipped} skipped) "
+            f"{self.rate() * 60:.1f} jobs/min, "
+            f"ETA {_format_seconds(eta) if eta is not None else '?'}"
+        )
+
+
+def run_job(
+    graph: Any, job_id: str, description: str, output_dir: str | pathlib.Path | None = None
+) -> Dict[str, Any]:
+    # The id comes from the jobs file; it must not lead out of `output_dir`.
+    target = safe_target(pathlib.Path(output_dir), job_id) if output_dir else None
+    if output_dir and target is None:
+        raise ValueError(f"job id {job_id!r} is not a safe directory name")
+    inputs = {"description": description, "output_dir": str(target) if target else None}
+    config = None
+    if getattr(graph, "checkpointer", None):
+        # Each job is its own thread, so an interrupted job resumes as well.
+        config = seed.run_config(inputs, job_id)
+        inputs = seed.start_or_resume(graph, inputs, config)
+    start = time.perf_counter()
+    result = graph.invoke(inputs, config)
+    architecture = result.get("architecture")
+    return {
+        "id": job_id,
+        "status": "ok",
+        "seconds": round(time.perf_counter() - start, 3),
+        "project_name": architecture.project_name if architecture else None,
+        "files": [file["path"] for file in result.get("files", [])],
+        "written": result.get("written", []),
+        "code": result.get("code"),
+    }
+
+
+def run_batch(
+    jobs_path: str | pathlib.Path,
+    output_path: str | pathlib.Path,
+    workers: int = 4,
+    graph: Any = None,
+    output_dir: str | pathlib.Path | None = None,
+    on_progress: Callable[[BatchProgress], None] | None = None,
+) -> BatchProgress:
+    """
+    Run every job of `jobs_path` not yet finished in `output_path`, at most
+    `workers` at once, appending one result line per job.
+    """
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    graph = graph or seed.graph
+    done = finished_ids(output_path)
+    # Counting is a cheap pass over the file; jobs are still read lazily below.
+    # Invalid lines count too, since each is recorded as a failed job.
+    invalid = []
+    jobs = sum(1 for _ in read_jobs(jobs_path, on_error=lambda *line: invalid.append(line)))
+    progress = BatchProgress(total=jobs + len(invalid))
+    output = pathlib.Path(output_path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    lock = threading.Lock()
+
+    with open(output, "a+") as out:
+        # Start on a fresh line if the previous run died mid-write.
+        out.seek(0, 2)
+        if out.tell():
+            out.seek(out.tell() - 1)
+            if out.read(1) != "\n":
+                out.write("\n")
+
+        def record(result: Dict[str, Any]) -> None:
+            with lock:
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+                if result["status"] == "ok":
+                    progress.done += 1
+                else:
+                    progress.failed += 1
+                if on_progress is not None:
+                    on_progress(progress)
+
+        def run(job_id: str, description: str) -> None:
+            try:
+                result = run_job(graph, job_id, description, output_dir)
+            except Exception as e:
+                result = {"id": job_id, "status": "error", "error": f"{type(e).__name__}: {e}"}
+            record(result)
+
+        def invalid_line(number: int, error: str) -> None:
+            # Identified by its line number, like a bare description.
+            record({"id": str(number), "status": "error", "error": error})
+
+        pending: Set[Future] = set()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as executor:
+            for job_id, description in read_jobs(jobs_path, on_error=invalid_line):
+                if job_id in done:
+                    progress.skipped += 1
+                    continue
+                done.add(job_id)
+                # At most 2 * workers jobs submitted at once: `workers` running
+                # and as many queued behind them.
+                if len(pending) >= 2 * workers:
+                    _, pending = wait(pending, return_when=FIRST_COMPLETED)
+                pending.add(executor.submit(run, job_id, description))
+            wait(pending)
+    return progress
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the seed graph over a JSONL file.")
+    parser.add_argument("jobs", help="JSONL file of descriptions")
+    parser.add_argument("--output", default="results.jsonl", help="JSONL results, appended to")
+    parser.add_argument("--workers", type=int, default=seed.MAX_CODER_CONCURRENCY)
+    parser.add_argument("--output-dir", help="write each job's files to <dir>/<id>")
+    parser.add_argument(
+        "--single-call", action="store_true", help="generate all files in one coder call"
+    )
+    args = parser.parse_args(argv)
+
+    graph = seed.graph
+    if args.single_call:
+        graph = seed.build_graph(per_file=False, checkpointer=seed.checkpointer)
+
+    def report(progress: BatchProgress) -> None:
+        print(progress.line(), file=sys.stderr, flush=True)
+
+    progress = run_batch(
+        args.jobs, args.output, args.workers, graph, args.output_dir, on_progress=report
+    )
+    print(f"results written to {args.output}: {progress.line()}")
+    return 1 if progress.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,442 @@
+"""
+End-to-end benchmark of the seed graph over a fixed corpus of descriptions.
+
+    python -m evocore.seed.v1.bench
+    python -m evocore.seed.v1.bench --backend live --record responses.sqlite
+    python -m evocore.seed.v1.bench --backend replay --record responses.sqlite
+    python -m evocore.seed.v1.bench --compare seed_bench/old.json seed_bench/new.json
+
+Every corpus entry runs through the graph as it ships (pipelined unless
+EVOCORE_PIPELINED=0 or `--no-pipelined`, with validation on) against a
+deterministic backend, one run at a time:
+
+- "mock" (default): a mock Ollama server scripted from the corpus. The
+  architect answers with the entry's `architecture`, and the coder writes a
+  plausible file per type. Files listed in `broken` come out invalid on the
+  first attempt, which exercises repair.
+- "replay": the responses of an earlier `--backend live --record` run, read
+  from its response cache; a prompt that was not recorded fails the run.
+- "live": the configured backend.
+
+Each run records its latency, per-node latency (from the node spans), prompt
+and completion tokens, file counts and validation results. Results go to a
+versioned JSON file (`seed_bench/<time>-<commit>.json` by default). Given a
+`--baseline` (or with `--compare`), a report lists latency, token and quality
+regressions, and the exit status is non-zero if there are any.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import pathlib
+import platform
+import re
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Sequence
+
+from evocore.model.cache import CachedModel, ResponseCache
+from evocore.model.mock_ollama import MockOllamaServer
+from evocore.model.model_manager import ModelManager
+from evocore.model.stats import flatten, percentile
+from evocore.model.tracing import Span, TracedModel
+from evocore.seed.v1 import main as seed
+from evocore.seed.v1.validate import validate_files
+
+# Bump when the layout of result files changes; results of different
+# versions are not compared.
+RESULT_VERSION = 1
+
+DEFAULT_CORPUS = pathlib.Path(__file__).with_name("bench_corpus.jsonl")
+BACKENDS = ("mock", "replay", "live")
+
+# Summary metrics where a drop is a regression; timings and token counts
+# regress when they grow.
+QUALITY_METRICS = ("validation_pass_rate", "first_pass_rate")
+
+
+def load_corpus(path: str | pathlib.Path = DEFAULT_CORPUS) -> List[Dict[str, Any]]:
+    """Entries of a JSONL corpus: `id`, `description` and, for the mock, `architecture`."""
+    entries = []
+    for number, line in enumerate(pathlib.Path(path).read_text().splitlines(), 1):
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        if not entry.get("description"):
+            raise ValueError(f"line {number}: no description")
+        entry.setdefault("id", str(number))
+        entries.append(entry)
+    if not entries:
+        raise ValueError(f"corpus {path} is empty")
+    return entries
+
+
+def _file_content(file: Dict[str, Any], broken: bool) -> str:
+    path = file["path"]
+    suffix = pathlib.PurePosixPath(path).suffix
+    if suffix == ".py":
+        if broken:
+            return "def run(:\n    pass\n"
+        name = re.sub(r"\W", "_", pathlib.PurePosixPath(path).stem)
+        if name.startswith("test_"):
+            return f"def {name}():\n    assert True\n"
+        return f"# {file['description']}\n\n\ndef run() -> None:\n    return None\n"
+    if suffix == ".json":
+        return '{"title": ' if broken else json.dumps({"title": file["description"]}) + "\n"
+    if suffix == ".toml":
+        return '[project]\nname = "demo"\n'
+    if suffix in (".yml", ".yaml"):
+        return "name: demo\non: [push]\n"
+    return f"{file['description']}\n{file['responsibilities']}\n"
+
+
+class ScriptedBackend:
+    """Responder for `MockOllamaServer` that plays architect and coder for a corpus."""
+
+    def __init__(self, corpus: Sequence[Dict[str, Any]]) -> None:
+        self.corpus = [entry for entry in corpus if entry.get("architecture")]
+
+    def _entry(self, text: str) -> Dict[str, Any]:
+        # The architect sees the description, coders the project name.
+        for entry in self.corpus:
+            name = json.dumps(entry["architecture"]["project_name"], ensure_ascii=False)
+            if entry["description"] in text or f'"project_name":{name}' in text:
+                return entry
+        raise ValueError("request does not match any corpus entry")
+
+    def __call__(self, request: Dict[str, Any]) -> str:
+        messages = request.get("messages") or [{"role": "user", "content": request["prompt"]}]
+        system = "\n".join(m["content"] for m in messages if m.get("role") == "system")
+        user = messages[-1]["content"]
+        entry = self._entry(user)
+        if "software architect" in system:
+            return json.dumps(entry["architecture"])
+        match = re.search(r"File to generate:\n(\{.*\})", user)
+        if match is None:
+            raise ValueError("coder request without a file to generate")
+        file = json.loads(match.group(1))
+        broken = file["path"] in entry.get("broken", ()) and "Previous attempt:" not in user
+        return _file_content(file, broken)
+
+
+def _models(backend: str, base_url: str | None, record: str | None) -> List[Any]:
+    cache = ResponseCache(record) if record else None
+    models = []
+    for key, profile in (seed.ARCHITECT_LLM, seed.CODER_LLM):
+        config = {"profile": profile}
+        if base_url:
+            config["base_url"] = base_url
+        model = ModelManager.get_model(seed.llms[key], config, pooled=False)
+        if cache is not None:
+            model = CachedModel(model, cache, replay=backend == "replay")
+        models.append(TracedModel(model))
+    return models
+
+
+@contextmanager
+def seed_backend(
+    backend: str = "mock",
+    corpus: Sequence[Dict[str, Any]] = (),
+    record: str | None = None,
+    ttft: float = 0.02,
+    token_latency: float = 0.002,
+) -> Iterator[Dict[str, Any]]:
+    """Point the seed graph's models at `backend` for the duration of the block."""
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown backend '{backend}', expected one of {BACKENDS}")
+    if backend == "replay" and not record:
+        raise ValueError("the replay backend needs the recorded response cache")
+    server = None
+    if backend == "mock":
+        server = MockOllamaServer(
+            responses=ScriptedBackend(corpus), ttft=ttft, token_latency=token_latency
+        ).start()
+    saved = (seed.llm_arch, seed.llm_code, seed.file_store)
+    try:
+        seed.llm_arch, seed.llm_code = _models(backend, server and server.url, record)
+        # Reusing files from an earlier run would skip the work being measured.
+        seed.file_store = None
+        yield {"backend": backend, "record": record, "mock_url": server and server.url}
+    finally:
+        seed.llm_arch, seed.llm_code, seed.file_store = saved
+        if server is not None:
+            server.stop()
+
+
+class _Collector:
+    def __init__(self) -> None:
+        self.spans: List[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+
+def _run_metrics(state: Dict[str, Any], spans: List[Span]) -> Dict[str, Any]:
+    nodes: Dict[str, Dict[str, float]] = {}
+    for span in spans:
+        if span.kind == "node":
+            node = nodes.setdefault(span.name, {"count": 0, "seconds": 0.0})
+            node["count"] += 1
+            node["seconds"] += span.duration or 0.0
+    models = [s for s in spans if s.kind == "model"]
+    architecture = state.get("architecture")
+    planned = [f.path for f in architecture.files] if architecture is not None else []
+    generated = {f["path"] for f in state.get("files", [])}
+    invalid = set(state.get("invalid") or {})
+    repaired = {s.attributes.get("path") for s in spans if s.kind == "node" and s.name == "repair"}
+    valid = [p for p in planned if p in generated and p not in invalid]
+    first_pass = [p for p in valid if p not in repaired]
+    return {
+        "nodes": nodes,
+        "prompt_tokens": sum(s.attributes.get("prompt_tokens", 0) for s in models),
+        "completion_tokens": sum(s.attributes.get("completion_tokens", 0) for s in models),
+        "model_calls": len(models),
+        "files": len(planned),
+        "generated": len(generated),
+        "invalid": sorted(invalid),
+        "repaired": len(repaired),
+        "repair_rounds": state.get("repair_rounds") or 0,
+        "valid": len(valid),
+        "first_pass": len(first_pass),
+    }
+
+
+def run_entry(graph, entry: Dict[str, Any]) -> Dict[str, Any]:
+    collector = _Collector()
+    seed.tracer.exporters.append(collector)
+    start = time.perf_counter()
+    state: Dict[str, Any] = {}
+    error = None
+    try:
+        with seed.tracer.span("seed", kind="run", job=entry["id"]):
+            state = graph.invoke({"description": entry["description"]})
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        seed.tracer.exporters.remove(collector)
+    record = {"ok": error is None, "seconds": time.perf_counter() - start}
+    if error is not None:
+        record["error"] = error
+    record.update(_run_metrics(state, collector.spans))
+    return record
+
+
+def summarize(runs: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    ok = [r for r in runs.values() if r["ok"]]
+    seconds = [r["seconds"] for r in ok]
+    names = sorted({name for r in ok for name in r["nodes"]})
+    nodes = {}
+    for name in names:
+        per_run = [r["nodes"][name]["seconds"] for r in ok if name in r["nodes"]]
+        nodes[name] = {
+            "seconds_p50": percentile(per_run, 50),
+            "seconds_p95": percentile(per_run, 95),
+        }
+    files = sum(r["files"] for r in ok)
+    return {
+        "runs": len(runs),
+        "failed": len(runs) - len(ok),
+        "latency_p50": percentile(seconds, 50),
+        "latency_p95": percentile(seconds, 95),
+        "nodes": nodes,
+        "prompt_tokens": sum(r["prompt_tokens"] for r in ok),
+        "completion_tokens": sum(r["completion_tokens"] for r in ok),
+        "files": files,
+        "invalid": sum(len(r["invalid"]) for r in ok),
+        "repaired": sum(r["repaired"] for r in ok),
+        "validation_pass_rate": sum(r["valid"] for r in ok) / files if files else math.nan,
+        "first_pass_rate": sum(r["first_pass"] for r in ok) / files if files else math.nan,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=pathlib.Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run(
+    corpus: Sequence[Dict[str, Any]],
+    backend: str = "mock",
+    record: str | None = None,
+    pipelined: bool = seed.PIPELINED,
+    repair_rounds: int = seed.MAX_REPAIR_ROUNDS,
+    ttft: float = 0.02,
+    token_latency: float = 0.002,
+) -> Dict[str, Any]:
+    corpus_text = json.dumps(list(corpus), sort_keys=True)
+    result: Dict[str, Any] = {
+        "version": RESULT_VERSION,
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "host": platform.node(),
+            "backend": backend,
+            "corpus_size": len(corpus),
+            "corpus_sha256": hashlib.sha256(corpus_text.encode("utf-8")).hexdigest(),
+            "graph": {"pipelined": pipelined, "repair_rounds": repair_rounds},
+        },
+        "runs": {},
+    }
+    with seed_backend(backend, corpus, record, ttft, token_latency):
+        graph = seed.build_graph(pipelined=pipelined, validate=True, repair_rounds=repair_rounds)
+        # Start the validation checkers now rather than in the first run.
+        validate_files({f"warmup_{i}.py": "" for i in range(16)})
+        for entry in corpus:
+            result["runs"][entry["id"]] = run_entry(graph, entry)
+    result["summary"] = summarize(result["runs"])
+    return result
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = 0.2,
+    min_delta: float = 0.01,
+    quality_tolerance: float = 0.0,
+) -> List[str]:
+    """
+    Describe every regression from `baseline` to `current`: latencies or
+    token counts up by more than `threshold` (relative, and `min_delta`
+    seconds for timings), pass rates down by more than `quality_tolerance`,
+    and runs or files that worked before and no longer do.
+    """
+    if baseline.get("version") != current.get("version"):
+        raise ValueError(
+            f"result versions differ ({baseline.get('version')} vs {current.get('version')})"
+        )
+    regressions = []
+    old, new = flatten(baseline["summary"]), flatten(current["summary"])
+    for key in sorted(old.keys() & new.keys()):
+        before, after = old[key], new[key]
+        if math.isnan(before) or math.isnan(after):
+            continue
+        line = f"{key}: {before:.4g} -> {after:.4g}"
+        if key in QUALITY_METRICS:
+            if before - after > quality_tolerance:
+                regressions.append(f"quality {line}")
+        elif key == "failed":
+            if after > before:
+                regressions.append(f"quality {line}")
+        elif key.startswith(("latency_", "nodes.")):
+            if before > 0 and (after - before) / before > threshold and after - before > min_delta:
+                regressions.append(f"latency {line} ({(after - before) / before:+.1%})")
+        elif key.endswith("_tokens"):
+            if before > 0 and (after - before) / before > threshold:
+                regressions.append(f"tokens {line} ({(after - before) / before:+.1%})")
+
+    for run_id, before in sorted(baseline["runs"].items()):
+        after = current["runs"].get(run_id)
+        if after is None:
+            continue
+        if before["ok"] and not after["ok"]:
+            regressions.append(f"quality run {run_id} failed: {after.get('error')}")
+            continue
+        broken = sorted(set(after.get("invalid", ())) - set(before.get("invalid", ())))
+        if broken:
+            regressions.append(f"quality run {run_id} invalid files: {', '.join(broken)}")
+    return regressions
+
+
+def report(baseline: Dict[str, Any], current: Dict[str, Any], **thresholds: Any) -> str:
+    """A side-by-side table of the summaries followed by the regressions."""
+    old, new = flatten(baseline["summary"]), flatten(current["summary"])
+    width = max(len(key) for key in old.keys() | new.keys())
+    lines = [
+        f"{'metric':<{width}}  {'baseline':>10}  {'current':>10}  change",
+    ]
+    for key in sorted(old.keys() | new.keys()):
+        before, after = old.get(key, math.nan), new.get(key, math.nan)
+        change = (after - before) / before if before and not math.isnan(before) else math.nan
+        lines.append(
+            f"{key:<{width}}  {before:>10.4g}  {after:>10.4g}  "
+            + ("" if math.isnan(change) else f"{change:+.1%}")
+        )
+    regressions = compare(baseline, current, **thresholds)
+    lines.append("")
+    lines.extend(f"REGRESSION {line}" for line in regressions)
+    if not regressions:
+        lines.append("no regressions")
+    return "\n".join(lines)
+
+
+def default_output(result: Dict[str, Any]) -> pathlib.Path:
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return pathlib.Path("seed_bench") / f"{stamp}-{result['meta']['commit'] or 'nogit'}.json"
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--corpus", default=str(DEFAULT_CORPUS), help="JSONL corpus")
+    parser.add_argument("--backend", choices=BACKENDS, default="mock")
+    parser.add_argument("--record", help="response cache to record into or replay from")
+    parser.add_argument(
+        "--no-pipelined",
+        dest="pipelined",
+        action="store_false",
+        help="plan and code in separate steps (default: as EVOCORE_PIPELINED)",
+    )
+    parser.set_defaults(pipelined=seed.PIPELINED)
+    parser.add_argument("--repair-rounds", type=int, default=seed.MAX_REPAIR_ROUNDS)
+    parser.add_argument("--mock-ttft", type=float, default=0.02)
+    parser.add_argument("--mock-token-latency", type=float, default=0.002)
+    parser.add_argument("--output", help="result file (default: seed_bench/<time>-<commit>.json)")
+    parser.add_argument("--baseline", help="earlier results to compare against")
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="only compare two results"
+    )
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--quality-tolerance", type=float, default=0.0)
+    args = parser.parse_args(argv)
+    thresholds = {"threshold": args.threshold, "quality_tolerance": args.quality_tolerance}
+
+    if args.compare:
+        baseline, current = (json.loads(pathlib.Path(p).read_text()) for p in args.compare)
+        print(report(baseline, current, **thresholds))
+        return 1 if compare(baseline, current, **thresholds) else 0
+
+    result = run(
+        load_corpus(args.corpus),
+        args.backend,
+        args.record,
+        args.pipelined,
+        args.repair_rounds,
+        args.mock_ttft,
+        args.mock_token_latency,
+    )
+    output = pathlib.Path(args.output) if args.output else default_output(result)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+    print(f"results written to {output}")
+
+    summary = result["summary"]
+    print(
+        f"{summary['runs']} runs ({summary['failed']} failed), "
+        f"p50 {summary['latency_p50']:.3f}s, "
+        f"{summary['prompt_tokens']} prompt / {summary['completion_tokens']} completion tokens, "
+        f"pass rate {summary['validation_pass_rate']:.1%} "
+        f"(first pass {summary['first_pass_rate']:.1%})"
+    )
+
+    if args.baseline:
+        baseline = json.loads(pathlib.Path(args.baseline).read_text())
+        print(report(baseline, result, **thresholds))
+        if compare(baseline, result, **thresholds):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
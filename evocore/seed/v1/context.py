@@ -0,0 +1,168 @@
+"""
+Per-file coder context: only what one file needs, within a token budget.
+
+    builder = ContextBuilder(budget=2048)
+    context = builder.build(architecture, file)
+    messages = PromptLayout(SYSTEM).extend(*context.static).render(*context.dynamic)
+
+Instead of the whole architecture, a per-file coder call gets the
+project-wide fields (name, type, tech stack, global requirements), the list
+of project paths, the specs of the files it depends on and the file to
+generate. Dependencies are the file's `dependencies` plus every file whose
+path or dotted module name its description or responsibilities mention.
+
+When the context is estimated at more than `budget` tokens, detail is
+dropped until it fits: first the path list, then the dependencies'
+responsibilities, then their descriptions. The project-wide fields and the
+file itself are always kept; a context that still does not fit is counted
+as over budget. `stats()` compares the prompt tokens sent with what the
+whole spec would have cost.
+"""
+
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, List
+
+from evocore.model.generation import CHARS_PER_TOKEN, estimate_tokens
+from evocore.model.prompts import section, stable_json
+from evocore.model.tracing import Tracer, default_tracer
+
+# (include the path list, dependency fields) per level, most detailed first.
+_LEVELS = (
+    (True, ("path", "description", "responsibilities")),
+    (False, ("path", "description", "responsibilities")),
+    (False, ("path", "description")),
+    (False, ("path",)),
+)
+
+
+@dataclass
+class ContextStats:
+    calls: int = 0
+    # Estimated tokens of the context sections sent, and of the whole spec.
+    prompt_tokens: int = 0
+    full_tokens: int = 0
+    over_budget: int = 0
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.full_tokens - self.prompt_tokens
+
+
+@dataclass
+class FileContext:
+    # Sections shared by every file of a run, then the per-file ones.
+    static: List[str]
+    dynamic: List[str]
+    dependencies: List[str] = field(default_factory=list)
+    tokens: int = 0
+    full_tokens: int = 0
+
+
+def _module(path: str) -> str:
+    stem = path.rsplit(".", 1)[0] if "." in path.rsplit("/", 1)[-1] else path
+    return stem.replace("/", ".")
+
+
+def _names(path: str) -> List[str]:
+    names = {path, path.rsplit("/", 1)[-1]}
+    if "/" in path:
+        names.add(_module(path))
+    return sorted(names)
+
+
+def _mentions(text: str, name: str) -> bool:
+    return re.search(rf"(?<![\w./]){re.escape(name)}(?![\w/])", text) is not None
+
+
+def dependencies(architecture: Any, file: Any) -> List[Any]:
+    """The specs `file` depends on, in architecture order."""
+    declared = set(getattr(file, "dependencies", None) or ())
+    text = f"{file.description}\n{file.responsibilities}"
+    found = []
+    for other in architecture.files:
+        if other.path == file.path:
+            continue
+        names = _names(other.path)
+        if declared.intersection(names) or any(_mentions(text, n) for n in names):
+            found.append(other)
+    return found
+
+
+def full_sections(architecture: Any, file: Any) -> FileContext:
+    """The unsliced context: the whole architecture, then the file to generate."""
+    return FileContext(
+        static=[
+            section("Architecture specification", stable_json(architecture, exclude=["files"])),
+            section("Files", "\n".join(stable_json(f) for f in architecture.files)),
+        ],
+        dynamic=[section("File to generate", stable_json(file))],
+    )
+
+
+class ContextBuilder:
+    """Slice the architecture per file; see the module docstring."""
+
+    def __init__(
+        self,
+        budget: int = 2048,
+        chars_per_token: float = CHARS_PER_TOKEN,
+        tracer: Tracer | None = None,
+    ) -> None:
+        if budget <= 0:
+            raise ValueError("context budget must be positive")
+        self.budget = budget
+        self.chars_per_token = chars_per_token
+        self.tracer = tracer or default_tracer
+        self._lock = threading.Lock()
+        self._stats = ContextStats()
+
+    def stats(self) -> ContextStats:
+        with self._lock:
+            return ContextStats(**vars(self._stats))
+
+    def _tokens(self, sections: List[str]) -> int:
+        return estimate_tokens("\n\n".join(sections), self.chars_per_token)
+
+    def _level(self, architecture: Any, file: Any, deps: List[Any], level: int) -> FileContext:
+        paths, detail = _LEVELS[level]
+        static = [
+            section("Architecture specification", stable_json(architecture, exclude=["files"]))
+        ]
+        if paths:
+            static.append(section("Project files", "\n".join(f.path for f in architecture.files)))
+        dynamic = []
+        if deps:
+            lines = [stable_json({k: getattr(d, k) for k in detail}) for d in deps]
+            dynamic.append(section("Depends on", "\n".join(lines)))
+        dynamic.append(section("File to generate", stable_json(file)))
+        return FileContext(
+            static=static,
+            dynamic=dynamic,
+            dependencies=[d.path for d in deps],
+            tokens=self._tokens(static + dynamic),
+        )
+
+    def build(self, architecture: Any, file: Any) -> FileContext:
+        with self.tracer.span("slice", kind="context", path=file.path) as span:
+            full = full_sections(architecture, file)
+            full_tokens = self._tokens(full.static + full.dynamic)
+            deps = dependencies(architecture, file)
+            for level in range(len(_LEVELS)):
+                context = self._level(architecture, file, deps, level)
+                if context.tokens <= self.budget:
+                    break
+            over = context.tokens > self.budget
+            context.full_tokens = full_tokens
+            with self._lock:
+                self._stats.calls += 1
+                self._stats.prompt_tokens += context.tokens
+                self._stats.full_tokens += full_tokens
+                self._stats.over_budget += over
+            span.set(
+                prompt_tokens=context.tokens,
+                saved_tokens=full_tokens - context.tokens,
+                over_budget=over,
+            )
+            return context
@@ -0,0 +1,140 @@
+import os
+import pathlib
+import tempfile
+from dataclasses import dataclass
+from typing import IO, List
+
+FILE_HEADER = "FILE:"
+
+
+@dataclass
+class FileWritten:
+    path: str
+    target: pathlib.Path
+    size: int
+
+
+def safe_target(out_dir: pathlib.Path, path: str) -> pathlib.Path | None:
+    """Resolve a generated path under `out_dir`, or None if it would escape it."""
+    relative = pathlib.PurePosixPath(path.strip())
+    if not relative.parts or relative.is_absolute() or ".." in relative.parts:
+        return None
+    return out_dir.joinpath(*relative.parts)
+
+
+def write_atomic(target: pathlib.Path, content: str) -> int:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            size = f.write(content)
+        os.replace(tmp, target)
+    except BaseException:
+        pathlib.Path(tmp).unlink(missing_ok=True)
+        raise
+    return size
+
+
+class FileBlockWriter:
+    """
+    Split a `FILE: <path>` token stream into files as it arrives.
+
+    Each chunk is scanned once: complete lines are appended to the open block's
+    temp file and only the trailing partial line is buffered. A block is moved
+    into place atomically when the next header (or `close()`) ends it. Markdown
+    fences and blank lines around a block's content are dropped. Paths that
+    would escape `out_dir` are skipped and listed in `rejected`.
+    """
+
+    def __init__(self, out_dir: str | pathlib.Path) -> None:
+        self.out_dir = pathlib.Path(out_dir)
+        self.rejected: List[str] = []
+        self._partial: List[str] = []
+        self._path: str | None = None
+        self._target: pathlib.Path | None = None
+        self._file: IO[str] | None = None
+        self._tmp: str | None = None
+        self._size = 0
+        self._started = False
+        self._held: List[str] = []
+
+    def feed(self, chunk: str) -> List[FileWritten]:
+        events: List[FileWritten] = []
+        end = chunk.rfind("\n")
+        if end == -1:
+            self._partial.append(chunk)
+            return events
+
+        self._partial.append(chunk[:end])
+        lines = "".join(self._partial).split("\n")
+        self._partial = [chunk[end + 1 :]]
+        for line in lines:
+            self._line(line, events)
+        return events
+
+    def close(self) -> List[FileWritten]:
+        events: List[FileWritten] = []
+        rest = "".join(self._partial)
+        self._partial = []
+        if rest:
+            self._line(rest, events)
+        self._finish(events)
+        return events
+
+    def abort(self) -> None:
+        """Discard the block in progress without moving it into place."""
+        if self._file is not None:
+            self._file.close()
+            pathlib.Path(self._tmp).unlink(missing_ok=True)
+        self._file = None
+        self._finish([])
+
+    def _line(self, line: str, events: List[FileWritten]) -> None:
+        if line.startswith(FILE_HEADER):
+            self._finish(events)
+            self._open(line[len(FILE_HEADER) :].strip())
+            return
+        if self._path is None:
+            return
+
+        stripped = line.strip()
+        if not self._started:
+            if not stripped or stripped.startswith("```"):
+                return
+            self._started = True
+
+        if not stripped or stripped == "```":
+            self._held.append(line)
+            return
+        for held in self._held:
+            self._write(held)
+        self._held = []
+        self._write(line)
+
+    def _open(self, path: str) -> None:
+        target = safe_target(self.out_dir, path)
+        if target is None:
+            self.rejected.append(path)
+            self._path = ""
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, self._tmp = tempfile.mkstemp(
+            dir=target.parent, prefix=f".{target.name}.", suffix=".tmp"
+        )
+        self._file = os.fdopen(fd, "w")
+        self._path = path
+        self._target = target
+
+    def _write(self, line: str) -> None:
+        if self._file is not None:
+            self._size += self._file.write(line + "\n")
+
+    def _finish(self, events: List[FileWritten]) -> None:
+        if self._file is not None:
+            self._file.close()
+            os.replace(self._tmp, self._target)
+            events.append(FileWritten(self._path, self._target, self._size))
+        self._path = self._target = self._file = self._tmp = None
+        self._size = 0
+        self._started = False
+        self._held = []
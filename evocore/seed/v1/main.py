@@ -1,10 +1,34 @@
-from time import time
-from typing import List, TypedDict, Annotated
-from pydantic import BaseModel
-from langchain_ollama import ChatOllama
+import contextvars
+import functools
+import hashlib
+import json
+import operator
+import os
+import pathlib
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Tuple, TypedDict, Annotated
+from pydantic import BaseModel, ValidationError
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser, StrOutputParser
+from langchain_core.output_parsers import PydanticOutputParser
+from langgraph.config import get_config, get_stream_writer
 from langgraph.graph import StateGraph, END
+from langgraph.types import RetryPolicy, Send
+
+from evocore.model.cache import CachedModel, ResponseCache
+from evocore.model.model_manager import ModelManager, model_name
+from evocore.model.prompts import PromptLayout, section, stable_json
+from evocore.model.hedging import HedgedModel
+from evocore.model.residency import ResidencyManager, ResidentModel, backend_model_id
+from evocore.model.singleflight import SingleflightModel
+from evocore.model.structured import StructuredOutput
+from evocore.model.tracing import JsonlExporter, MetricsExporter, TracedModel
+from evocore.model.tracing import default_tracer as tracer
+from evocore.seed.v1.checkpoint import GeneratedFileStore, SqliteSaver, spec_hash
+from evocore.seed.v1.context import ContextBuilder, dependencies, full_sections
+from evocore.seed.v1.files import FileBlockWriter, safe_target, write_atomic
+from evocore.seed.v1.spec_stream import JsonArrayStream
+from evocore.seed.v1.validate import run_tests, tests_allowed, validate_files
 
 
 ARCHITECT_SYSTEM_PROMPT = """
@@ -45,16 +69,46 @@ FILE: <path>
 Do not include explanations.
 """
 
-CODER_HUMAN_PROMPT = """
-Architecture specification:
-{architecture_json}
+FILE_CODER_SYSTEM_PROMPT = """
+You are a senior software engineer.
+
+Your task:
+- Generate the complete, correct content of ONE file.
+- Follow the architecture specification EXACTLY.
+- Only implement the responsibilities of the requested file.
+- Rely on the other files exactly as the specification describes them.
+
+Output ONLY the file content.
+Do not include the file path, markdown fences or explanations.
 """
 
+REPAIR_INSTRUCTION = """
+The previous attempt at this file failed validation with the error above.
+Fix it and output the complete corrected file.
+"""
+
+# Upper bound on concurrent per-file coder calls.
+MAX_CODER_CONCURRENCY = int(os.environ.get("EVOCORE_CODER_CONCURRENCY", "4"))
+
+FILE_CODER_RETRY = RetryPolicy(max_attempts=3)
+
+# Generated files are checked after coding (EVOCORE_VALIDATE=0 skips it), and
+# the failing ones are repaired for at most EVOCORE_REPAIR_ROUNDS rounds.
+# EVOCORE_RUN_GENERATED_TESTS=1 also runs the generated tests, in a sandbox.
+VALIDATE = os.environ.get("EVOCORE_VALIDATE", "1") != "0"
+MAX_REPAIR_ROUNDS = int(os.environ.get("EVOCORE_REPAIR_ROUNDS", "2"))
+VALIDATE_TESTS = tests_allowed()
+
+# The graph plans and codes at once unless EVOCORE_PIPELINED=0.
+PIPELINED = os.environ.get("EVOCORE_PIPELINED", "1") != "0"
+
 
 class FileSpec(BaseModel):
     path: str
     description: str
     responsibilities: str
+    # Paths of the project files this one imports or calls into.
+    dependencies: List[str] = []
 
 
 class ArchitectureSpec(BaseModel):
@@ -66,30 +120,168 @@ class ArchitectureSpec(BaseModel):
 
 
 llms = {
-    "llama_it": ChatOllama(model="llama3:instruct"),
-    "llama": ChatOllama(model="llama3.1:8b"),
-    "gemma27": ChatOllama(model="gemma3:27b"),
-    "gemma12": ChatOllama(model="gemma3:12b"),
-    "gemma": ChatOllama(model="gemma3:latest"),
-    "gpt": ChatOllama(model="gpt-oss:20b"),
-    "qwen": ChatOllama(model="qwen3:30b"),
-    "qwen_code": ChatOllama(model="qwen3-coder:30b"),
+    "llama_it": "llama-instruct-local",
+    "llama": "llama-local",
+    "gemma27": "gemma3_27b_local",
+    "gemma12": "gemma3_12b_local",
+    "gemma": "gemma3_local",
+    "gpt": "gpt-local",
+    "qwen": "qwen_local",
+    "qwen_code": "qwen_code_local",
 }
 
-
-llm_arch = llms["gpt"]
-llm_code = llms["qwen_code"]
+# Opt-in: EVOCORE_RESPONSE_CACHE=<sqlite path> replays identical calls from disk.
+response_cache = (
+    ResponseCache(os.environ["EVOCORE_RESPONSE_CACHE"])
+    if os.environ.get("EVOCORE_RESPONSE_CACHE")
+    else None
+)
+
+
+# Opt-in: EVOCORE_MEMORY_BUDGET_GB=<GB> schedules model residency on the
+# inference box so the architect and coder models are not swapped per call.
+residency = (
+    ResidencyManager(float(os.environ["EVOCORE_MEMORY_BUDGET_GB"]))
+    if os.environ.get("EVOCORE_MEMORY_BUDGET_GB")
+    else None
+)
+
+# Per-file coder calls get only the project-wide fields, the files they depend
+# on and the file itself, within EVOCORE_CONTEXT_BUDGET estimated tokens;
+# EVOCORE_CONTEXT_SLICING=0 sends the whole architecture instead.
+context_builder = (
+    ContextBuilder(int(os.environ.get("EVOCORE_CONTEXT_BUDGET", "2048")))
+    if os.environ.get("EVOCORE_CONTEXT_SLICING", "1") != "0"
+    else None
+)
+
+# Opt-in: EVOCORE_CHECKPOINT_DB=<sqlite path> checkpoints every finished node so
+# an interrupted run resumes where it stopped, and keeps generated files by
+# spec hash so reruns only regenerate the files whose spec changed.
+checkpointer = (
+    SqliteSaver(os.environ["EVOCORE_CHECKPOINT_DB"])
+    if os.environ.get("EVOCORE_CHECKPOINT_DB")
+    else None
+)
+file_store = (
+    GeneratedFileStore(os.environ["EVOCORE_CHECKPOINT_DB"])
+    if os.environ.get("EVOCORE_CHECKPOINT_DB")
+    else None
+)
+
+
+# Opt-in: EVOCORE_HEDGE=<backups> sends calls that are slow to answer (or
+# fail) to a backup as well and keeps the first answer. Each comma-separated
+# backup is an Ollama URL serving the same model or another `llms` key;
+# EVOCORE_HEDGE_DELAY=<seconds> fixes the delay instead of the observed p95.
+HEDGE_BACKUPS = [b.strip() for b in os.environ.get("EVOCORE_HEDGE", "").split(",") if b.strip()]
+HEDGE_DELAY = (
+    float(os.environ["EVOCORE_HEDGE_DELAY"]) if os.environ.get("EVOCORE_HEDGE_DELAY") else None
+)
+
+
+def _backup_model(backup: str, key: str, profile: str | None):
+    config = {"profile": profile} if profile else {}
+    if "://" in backup:
+        return ModelManager.get_model(llms[key], {**config, "base_url": backup})
+    return ModelManager.get_model(llms.get(backup, backup), config or None)
+
+
+def get_llm(key: str, profile: str | None = None):
+    config = {"profile": profile} if profile else None
+    model = ModelManager.get_model(llms[key], config)
+    if residency is not None:
+        model = ResidentModel(model, residency)
+    if response_cache is not None:
+        model = CachedModel(model, response_cache)
+    # Above the cache, so a backup's answer is never stored as the primary's;
+    # a cached answer returns before any hedge fires.
+    if HEDGE_BACKUPS:
+        backups = [_backup_model(b, key, profile) for b in HEDGE_BACKUPS]
+        model = HedgedModel(model, backups, delay=HEDGE_DELAY)
+    # Identical calls in flight at once (e.g. duplicate batch jobs) share one
+    # request; EVOCORE_SINGLEFLIGHT=0 turns that off.
+    if os.environ.get("EVOCORE_SINGLEFLIGHT", "1") != "0":
+        model = SingleflightModel(model)
+    return TracedModel(model)
+
+
+# (llms key, generation profile) of each agent's model.
+ARCHITECT_LLM = ("gpt", "fast-architect")
+CODER_LLM = ("qwen_code", "long-context-coder")
+
+llm_arch = get_llm(*ARCHITECT_LLM)
+llm_code = get_llm(*CODER_LLM)
+
+# Schema-constrained decoding for the architect, with repair and re-ask.
+architecture_output = StructuredOutput(ArchitectureSpec)
+
+
+def _text(chunk: Any) -> str:
+    return getattr(chunk, "content", chunk)
+
+
+def _strip_fences(code: str) -> str:
+    lines = code.strip("\n").splitlines()
+    if len(lines) >= 2 and lines[0].startswith("```") and lines[-1].strip() == "```":
+        lines = lines[1:-1]
+    return "\n".join(lines) + "\n"
+
+
+class GeneratedFile(TypedDict):
+    path: str
+    code: str
 
 
 class AgentState(TypedDict):
     description: str
+    # When set, generated files are written here as soon as each one is done.
+    output_dir: str | None
     architecture: ArchitectureSpec | None
+    files: Annotated[List[GeneratedFile], operator.add]
+    written: Annotated[List[str], operator.add]
     code: str | None
+    # Errors by path of the files that failed validation, and the number of
+    # repair rounds run so far.
+    invalid: Dict[str, str]
+    repair_rounds: int
 
 
-def architect_agent(state: AgentState) -> dict:
-    state_time = time()
+class FileTask(TypedDict):
+    architecture: ArchitectureSpec
+    file: FileSpec
+    output_dir: str | None
+
+
+class RepairTask(FileTask):
+    code: str
+    error: str
+    round: int
+
+
+def traced_node(name: str, fn: Callable[[Any], dict]) -> Callable[[Any], dict]:
+    """
+    Run a graph node inside a `node` span. LangGraph keeps a task's checkpoint
+    namespace across retries, so it identifies the attempt being made.
+    """
+
+    @functools.wraps(fn)
+    def run(state: Any) -> dict:
+        task = get_config().get("metadata", {}).get("langgraph_checkpoint_ns", name)
+        attempt = tracer.attempt(task)
+        attrs = {"attempt": attempt}
+        if isinstance(state, dict) and "file" in state:
+            attrs["path"] = state["file"].path
+        with tracer.span(name, kind="node", **attrs) as span:
+            result = fn(state)
+            span.set(retries=attempt - 1)
+        tracer.succeeded(task)
+        return result
 
+    return run
+
+
+def _architect_messages(state: AgentState):
     parser = PydanticOutputParser(pydantic_object=ArchitectureSpec)
     prompt = ChatPromptTemplate.from_messages(
         [
@@ -98,48 +290,468 @@ def architect_agent(state: AgentState) -> dict:
         ]
     ).partial(format_instructions=parser.get_format_instructions())
 
-    chain = prompt | llm_arch | parser
+    return prompt.invoke({"description": state["description"]})
 
-    architecture = chain.invoke({"description": state["description"]})
 
-    end_time = time()
-    print(f"architect agent using time: {end_time-state_time}")
-    print(f"architecture: {architecture}")
+def architect_agent(state: AgentState) -> dict:
+    messages = _architect_messages(state)
+    architecture = architecture_output.invoke(llm_arch, messages)
 
     return {"architecture": architecture}
 
 
 def coder_agent(state: AgentState) -> dict:
-    state_time = time()
-
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", CODER_SYSTEM_PROMPT),
-            ("human", CODER_HUMAN_PROMPT),
-        ]
+    messages = PromptLayout(CODER_SYSTEM_PROMPT).render(
+        section("Architecture specification", stable_json(state["architecture"]))
     )
 
-    chain = prompt | llm_code | StrOutputParser()
+    # Forward tokens as they arrive; callers see them with stream_mode="custom".
+    # With an output_dir the files are split out of the stream and written as
+    # each block closes instead of being kept in memory.
+    writer = get_stream_writer()
+    output_dir = state.get("output_dir")
+    blocks = FileBlockWriter(output_dir) if output_dir else None
+    chunks = []
+    written = []
+
+    def on_written(events) -> None:
+        for event in events:
+            written.append(event.path)
+            writer({"node": "coder", "file_written": event.path})
+
+    try:
+        for chunk in llm_code.stream(messages):
+            token = _text(chunk)
+            writer({"node": "coder", "token": token})
+            if blocks is None:
+                chunks.append(token)
+            else:
+                on_written(blocks.feed(token))
+        if blocks is not None:
+            on_written(blocks.close())
+    except BaseException:
+        if blocks is not None:
+            blocks.abort()
+        raise
+
+    return {"code": None if blocks is not None else "".join(chunks), "written": written}
+
+
+def fan_out_files(state: AgentState, done: str = "assemble") -> List[Send] | str:
+    """One file_coder task per file not coded yet; `done` once every file is."""
+    files = state["architecture"].files
+    if not files:
+        return "assemble"
+    coded = {file["path"] for file in state.get("files") or []}
+    if all(file.path in coded for file in files):
+        return done
+    return [
+        Send(
+            "file_coder",
+            {
+                "architecture": state["architecture"],
+                "file": file,
+                "output_dir": state.get("output_dir"),
+            },
+        )
+        for file in files
+        if file.path not in coded
+    ]
+
+
+def _file_coder_context(architecture: ArchitectureSpec, file: FileSpec):
+    if context_builder is None:
+        return full_sections(architecture, file)
+    return context_builder.build(architecture, file)
+
+
+def _file_coder_messages(context, *extra: str):
+    """
+    Static first, so the backend can reuse its prompt cache: the system
+    prompt and project-wide sections are identical for every file of a run
+    (and only grow at their end while the pipelined architect plans). The
+    per-file sections, then any `extra` ones, come last.
+    """
+    layout = PromptLayout(FILE_CODER_SYSTEM_PROMPT).extend(*context.static)
+    return layout.render(*context.dynamic, *extra)
+
+
+def _file_key(task: FileTask, context) -> str:
+    # The specs of the file's dependencies are part of the key when they are sent.
+    deps = [f for f in task["architecture"].files if f.path in context.dependencies]
+    return spec_hash(task["architecture"], task["file"], model_name(llm_code), deps)
+
+
+def _write_output(task: FileTask, node: str, code: str) -> List[str]:
+    path = task["file"].path
+    output_dir = task.get("output_dir")
+    target = safe_target(pathlib.Path(output_dir), path) if output_dir else None
+    if target is None:
+        return []
+    write_atomic(target, code)
+    get_stream_writer()({"node": node, "file_written": path})
+    return [path]
+
+
+def file_coder_agent(task: FileTask) -> dict:
+    path = task["file"].path
+    writer = get_stream_writer()
+
+    # A file whose spec is unchanged since an earlier run is reused as is.
+    context = _file_coder_context(task["architecture"], task["file"])
+    key = _file_key(task, context)
+    code = file_store.get(key) if file_store is not None else None
+    if code is not None:
+        writer({"node": "file_coder", "path": path, "reused": True})
+    else:
+        messages = _file_coder_messages(context)
+        chunks = []
+        for chunk in llm_code.stream(messages):
+            token = _text(chunk)
+            chunks.append(token)
+            writer({"node": "file_coder", "path": path, "token": token})
+        code = _strip_fences("".join(chunks))
+        if file_store is not None:
+            file_store.put(key, path, code)
+
+    written = _write_output(task, "file_coder", code)
+    return {"files": [{"path": path, "code": code}], "written": written}
+
+
+def _latest_files(state: AgentState) -> Dict[str, str]:
+    # Repairs append a newer version of a file; the last one wins.
+    return {file["path"]: file["code"] for file in state["files"]}
+
+
+def validate_agent(state: AgentState) -> dict:
+    """
+    Check the generated files in the validation thread pool. After a repair
+    round only the repaired files are checked again; the generated tests
+    (with VALIDATE_TESTS) run on the whole project every time.
+    """
+    latest = _latest_files(state)
+    previous = state.get("invalid") or {}
+    rounds = (state.get("repair_rounds") or 0) + (1 if previous else 0)
+    checked = {path: latest[path] for path in previous if path in latest} if previous else latest
+    errors = validate_files(checked)
+    if VALIDATE_TESTS and not errors:
+        errors = run_tests(latest)
+
+    writer = get_stream_writer()
+    for path, error in errors.items():
+        writer({"node": "validate", "path": path, "error": error})
+    return {"invalid": errors, "repair_rounds": rounds}
+
+
+def fan_out_repairs(state: AgentState, max_rounds: int = MAX_REPAIR_ROUNDS) -> List[Send] | str:
+    invalid = state.get("invalid") or {}
+    rounds = state.get("repair_rounds") or 0
+    specs = {file.path: file for file in state["architecture"].files}
+    latest = _latest_files(state)
+    if rounds >= max_rounds:
+        return "assemble"
+    sends = [
+        Send(
+            "repair",
+            {
+                "architecture": state["architecture"],
+                "file": specs[path],
+                "output_dir": state.get("output_dir"),
+                "code": latest[path],
+                "error": error,
+                "round": rounds + 1,
+            },
+        )
+        for path, error in invalid.items()
+        if path in specs and path in latest
+    ]
+    return sends or "assemble"
+
+
+def repair_agent(task: RepairTask) -> dict:
+    """Regenerate one file that failed validation, given its code and the error."""
+    path = task["file"].path
+    writer = get_stream_writer()
+    writer({"node": "repair", "path": path, "round": task["round"]})
+
+    context = _file_coder_context(task["architecture"], task["file"])
+    messages = _file_coder_messages(
+        context,
+        section("Previous attempt", task["code"]),
+        section("Error", task["error"]),
+        REPAIR_INSTRUCTION.strip(),
+    )
+    chunks = []
+    for chunk in llm_code.stream(messages):
+        token = _text(chunk)
+        chunks.append(token)
+        writer({"node": "repair", "path": path, "token": token})
+    code = _strip_fences("".join(chunks))
+    if file_store is not None:
+        file_store.put(_file_key(task, context), path, code)
+
+    _write_output(task, "repair", code)
+    # The first version was already counted in `written`.
+    return {"files": [{"path": path, "code": code}]}
+
+
+def _should_retry(policy: RetryPolicy, error: Exception) -> bool:
+    retry_on = policy.retry_on
+    if isinstance(retry_on, type):
+        return isinstance(error, retry_on)
+    if isinstance(retry_on, (list, tuple)):
+        return isinstance(error, tuple(retry_on))
+    return retry_on(error)
+
+
+def code_file(task: FileTask, policy: RetryPolicy | None = None) -> dict:
+    """
+    Run `file_coder_agent` outside a graph task, retried like the graph's
+    file_coder node (`FILE_CODER_RETRY` by default) and traced as one.
+    """
+    policy = policy or FILE_CODER_RETRY
+    interval = policy.initial_interval
+    for attempt in range(1, policy.max_attempts + 1):
+        try:
+            with tracer.span(
+                "file_coder", kind="node", path=task["file"].path, attempt=attempt
+            ) as span:
+                result = file_coder_agent(task)
+                span.set(retries=attempt - 1)
+                return result
+        except Exception as e:
+            if attempt == policy.max_attempts or not _should_retry(policy, e):
+                raise
+        time.sleep(min(interval, policy.max_interval))
+        interval *= policy.backoff_factor
+
+
+def _partial_architecture(planned: Dict[str, Any], files: List[FileSpec]) -> ArchitectureSpec:
+    """
+    The architecture as planned so far, for files coded before it is
+    complete: the project-wide fields streamed so far (`planned`) and `files`.
+    """
+    fields = {
+        "project_name": "",
+        "project_type": "",
+        "tech_stack": {},
+        "global_requirements": [],
+    }
+    fields.update({k: planned[k] for k in fields if k in planned})
+    try:
+        return ArchitectureSpec(**fields, files=files)
+    except ValidationError:
+        return ArchitectureSpec(
+            project_name="", project_type="", tech_stack={}, global_requirements=[], files=files
+        )
+
+
+def _coder_inputs(
+    architecture: ArchitectureSpec, file: FileSpec
+) -> Tuple[str, FileSpec, List[FileSpec]]:
+    """
+    What a file's coder depends on: the project-wide fields, its spec and the
+    specs of its dependencies. These also make up its `file_store` key.
+    """
+    return stable_json(architecture, exclude=["files"]), file, dependencies(architecture, file)
+
+
+def pipelined_architect_agent(state: AgentState) -> dict:
+    """
+    Plan and code at once. The architect's answer is parsed as it streams,
+    and each FileSpec goes to a file coder as soon as its object closes. The
+    coder sees the architecture as planned up to that point. Files whose spec,
+    whose dependencies' specs or whose project-wide fields differ in the
+    final, validated architecture (e.g. a dependency planned after the file)
+    are coded again, and files dropped from it are discarded. So every file
+    kept was coded, and stored, under its key in the final architecture.
+
+    Each coder makes a single attempt. The node returns the architecture and
+    the files that were coded; the others are left to the graph's file_coder
+    tasks (see `fan_out_files`), which retry them and are checkpointed, so a
+    failed file never makes the architect run again.
+    """
+    messages = _architect_messages(state)
+    writer = get_stream_writer()
+    output_dir = state.get("output_dir")
+    max_workers = get_config().get("max_concurrency") or MAX_CODER_CONCURRENCY
+    stream = JsonArrayStream("files")
+    # path -> (the coder's inputs, its future), in planning order
+    tasks: Dict[str, Tuple[Tuple[str, FileSpec, List[FileSpec]], Future]] = {}
+
+    def run(task: FileTask, previous: Future | None) -> dict:
+        # A file coded again must not race the superseded attempt's write.
+        if previous is not None:
+            wait([previous])
+        return code_file(task, RetryPolicy(max_attempts=1))
+
+    def submit(file: FileSpec, architecture: ArchitectureSpec) -> None:
+        previous = tasks.get(file.path)
+        if previous is not None and not previous[1].cancel():
+            previous = previous[1]
+        else:
+            previous = None
+        task = {"architecture": architecture, "file": file, "output_dir": output_dir}
+        # Each coder runs in a copy of this node's context so its stream
+        # writer and trace span point back at the graph run.
+        future = executor.submit(contextvars.copy_context().run, run, task, previous)
+        tasks[file.path] = (_coder_inputs(architecture, file), future)
+        writer({"node": "architect", "file_spec": file.path})
+
+    def on_chunk(token: str) -> None:
+        for item in stream.feed(token):
+            try:
+                file = FileSpec.model_validate(item)
+            except ValidationError:
+                continue
+            if file.path not in tasks:
+                planned = [inputs[1] for inputs, _ in tasks.values()] + [file]
+                submit(file, _partial_architecture(stream.fields(), planned))
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="file_coder")
+    try:
+        architecture = architecture_output.invoke(llm_arch, messages, on_chunk=on_chunk)
+        final = {file.path for file in architecture.files}
+        for file in architecture.files:
+            if file.path not in tasks or tasks[file.path][0] != _coder_inputs(architecture, file):
+                submit(file, architecture)
+
+        files, written = [], []
+        for path, (_, future) in tasks.items():
+            try:
+                result = future.result()
+            except Exception as e:
+                if path in final:
+                    writer({"node": "architect", "path": path, "error": str(e)})
+                continue
+            if path in final:
+                files.extend(result["files"])
+                written.extend(result["written"])
+            elif result["written"]:
+                safe_target(pathlib.Path(output_dir), path).unlink(missing_ok=True)
+    except BaseException:
+        for _, future in tasks.values():
+            future.cancel()
+        raise
+    finally:
+        executor.shutdown(wait=True)
+
+    return {"architecture": architecture, "files": files, "written": written}
+
+
+def assemble_code(state: AgentState) -> dict:
+    generated = _latest_files(state)
+    code = "\n".join(
+        f"FILE: {file.path}\n{generated[file.path]}"
+        for file in state["architecture"].files
+        if file.path in generated
+    )
+    return {"code": code}
 
-    code = chain.invoke({"architecture_json": state["architecture"].json()})
 
-    end_time = time()
-    print(f"architect agent using time: {end_time-state_time}")
-    print(f"code: {code}")
+def build_graph(
+    per_file: bool = True,
+    max_concurrency: int = MAX_CODER_CONCURRENCY,
+    pipelined: bool = False,
+    checkpointer: SqliteSaver | None = None,
+    validate: bool = VALIDATE,
+    repair_rounds: int = MAX_REPAIR_ROUNDS,
+):
+    """
+    Compile the seed graph.
+
+    With `per_file` the coder is a map-reduce: one concurrent call per FileSpec
+    (at most `max_concurrency` at once, each retried on failure), then an
+    assemble step. Otherwise a single call generates every file.
+
+    `pipelined` starts each file's coder while the architect is still
+    planning the rest (see `pipelined_architect_agent`), so the stages overlap
+    instead of running back to back.
+
+    With `validate` (per-file and pipelined graphs), the generated files are
+    checked before assembly and the failing ones are repaired concurrently,
+    for at most `repair_rounds` rounds; files that still fail are assembled
+    as they are and listed in the state's `invalid`.
+
+    With a `checkpointer`, state is saved after every node (and every finished
+    file_coder task), so a failed run resumes from there; see `start_or_resume`.
+    In the pipelined graph, files whose coder failed while the architect was
+    planning go on to file_coder tasks, so a resumed run does not call the
+    architect again.
+    """
+    builder = StateGraph(AgentState)
+    builder.set_entry_point("architect")
+
+    def finish(coded: str) -> None:
+        builder.add_node("assemble", traced_node("assemble", assemble_code))
+        builder.add_edge("assemble", END)
+        if not validate:
+            builder.add_edge(coded, "assemble")
+            return
+        builder.add_node("validate", traced_node("validate", validate_agent))
+        builder.add_node(
+            "repair", traced_node("repair", repair_agent), retry_policy=FILE_CODER_RETRY
+        )
+        builder.add_edge(coded, "validate")
+        builder.add_conditional_edges(
+            "validate",
+            functools.partial(fan_out_repairs, max_rounds=repair_rounds),
+            ["repair", "assemble"],
+        )
+        builder.add_edge("repair", "validate")
+
+    if pipelined:
+        builder.add_node("architect", traced_node("architect", pipelined_architect_agent))
+    else:
+        builder.add_node("architect", traced_node("architect", architect_agent))
+    if per_file or pipelined:
+        builder.add_node(
+            "file_coder",
+            traced_node("file_coder", file_coder_agent),
+            retry_policy=FILE_CODER_RETRY,
+        )
+        # After the pipelined architect, only the files it failed to code are left.
+        coded = "validate" if validate else "assemble"
+        builder.add_conditional_edges(
+            "architect",
+            functools.partial(fan_out_files, done=coded),
+            ["file_coder", "assemble"] + (["validate"] if validate else []),
+        )
+        finish("file_coder")
+    else:
+        builder.add_node("coder", traced_node("coder", coder_agent))
+        builder.add_edge("architect", "coder")
+        builder.add_edge("coder", END)
+
+    return builder.compile(checkpointer=checkpointer).with_config(
+        max_concurrency=max_concurrency
+    )
 
-    return {"code": code}
 
+def run_config(inputs: Dict[str, Any], thread_id: str | None = None) -> Dict[str, Any]:
+    """Config for a checkpointed run; the thread defaults to a hash of `inputs`."""
+    if thread_id is None:
+        payload = json.dumps(inputs, sort_keys=True).encode("utf-8")
+        thread_id = hashlib.sha256(payload).hexdigest()[:16]
+    return {"configurable": {"thread_id": thread_id}}
 
-builder = StateGraph(AgentState)
 
-builder.add_node("architect", architect_agent)
-builder.add_node("coder", coder_agent)
+def start_or_resume(graph, inputs: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any] | None:
+    """
+    The input to run `graph` with on `config`'s thread: None to resume a run
+    that stopped before END, otherwise `inputs` for a fresh run. A finished
+    run on the thread is discarded first, since `files` and `written`
+    accumulate across runs.
+    """
+    snapshot = graph.get_state(config)
+    if snapshot.next:
+        return None
+    if snapshot.values:
+        graph.checkpointer.delete_thread(config["configurable"]["thread_id"])
+    return inputs
 
-builder.set_entry_point("architect")
-builder.add_edge("architect", "coder")
-builder.add_edge("coder", END)
 
-graph = builder.compile()
+graph = build_graph(pipelined=PIPELINED, checkpointer=checkpointer)
 
 # if __name__ == "__main__":
 #     description = (
@@ -161,26 +773,76 @@ if __name__ == "__main__":
         "Use FastAPI as backend."
     )
 
-    # Use stream instead of invoke
-    # The 'stream_mode' can be "updates" (default) or "values"
-    print("--- Starting Agent Workflow ---\n")
-
-    stream_iterator = graph.stream({"description": description}, stream_mode="updates")
+    # Spans go to EVOCORE_TRACE_FILE as JSONL; Prometheus metrics are written
+    # to EVOCORE_METRICS_FILE and/or served on EVOCORE_METRICS_PORT.
+    metrics = MetricsExporter()
+    tracer.exporters.append(metrics)
+    if os.environ.get("EVOCORE_TRACE_FILE"):
+        tracer.exporters.append(JsonlExporter(os.environ["EVOCORE_TRACE_FILE"]))
+    if os.environ.get("EVOCORE_METRICS_PORT"):
+        metrics.serve(int(os.environ["EVOCORE_METRICS_PORT"]))
 
-    final_result = {}
-
-    for event in stream_iterator:
-        for node_name, state_update in event.items():
-            print(f"\n>>> Finished Node: {node_name} <<<")
-
-            # If you want to see the JSON architecture as soon as it's ready:
-            if node_name == "architect":
-                print(f"Plan created: {state_update['architecture'].project_name}")
-
-            # Store the state update to access the final code at the end
-            final_result.update(state_update)
+    # "updates" reports finished nodes, "custom" carries the coder's tokens
+    print("--- Starting Agent Workflow ---\n")
 
-    print("\n====== FINAL GENERATED CODE ======\n")
-    # Access the 'code' key from the accumulated result
-    if "code" in final_result:
-        print(final_result["code"])
+    if residency is not None:
+        residency.preload(backend_model_id(llm_arch))
+
+    inputs = {"description": description, "output_dir": os.environ.get("EVOCORE_OUTPUT_DIR")}
+    config = None
+    if checkpointer is not None:
+        config = run_config(inputs, os.environ.get("EVOCORE_THREAD_ID"))
+        inputs = start_or_resume(graph, inputs, config)
+        if inputs is None:
+            print(f"Resuming thread {config['configurable']['thread_id']}\n")
+
+    with tracer.span("seed", kind="run"):
+        stream_iterator = graph.stream(inputs, config, stream_mode=["updates", "custom"])
+
+        final_result = {}
+
+        for mode, event in stream_iterator:
+            if mode == "custom":
+                # Per-file coders run concurrently, so only the single-call coder's
+                # tokens are printed live; per-file results print as they finish.
+                if "token" in event and "path" not in event:
+                    print(event["token"], end="", flush=True)
+                elif "file_written" in event:
+                    print(f"\n>>> Wrote {event['file_written']} <<<")
+                elif event.get("reused"):
+                    print(f"\n>>> Reused {event['path']} (spec unchanged) <<<")
+                elif "file_spec" in event:
+                    print(f"\n>>> Coding {event['file_spec']} while planning <<<")
+                elif "error" in event:
+                    print(f"\n>>> {event['path']} failed validation <<<\n{event['error']}")
+                elif "round" in event:
+                    print(f"\n>>> Repairing {event['path']} (round {event['round']}) <<<")
+                continue
+
+            for node_name, state_update in event.items():
+                print(f"\n>>> Finished Node: {node_name} <<<")
+
+                # If you want to see the JSON architecture as soon as it's ready:
+                if node_name == "architect":
+                    print(f"Plan created: {state_update['architecture'].project_name}")
+                    print(f"architecture: {state_update['architecture']}")
+                    print("\n====== GENERATED CODE ======\n")
+
+                # Pipelined runs report every file with the architect.
+                if node_name in ("file_coder", "architect") and state_update.get("files"):
+                    for file in state_update["files"]:
+                        print(f"FILE: {file['path']}\n{file['code']}")
+
+                # Store the state update to access the final code at the end
+                final_result.update(state_update)
+
+    if os.environ.get("EVOCORE_METRICS_FILE"):
+        metrics.write(os.environ["EVOCORE_METRICS_FILE"])
+    if residency is not None:
+        print(f"residency: {residency.stats()}")
+    if context_builder is not None and context_builder.stats().calls:
+        stats = context_builder.stats()
+        print(
+            f"context slicing: {stats.prompt_tokens} of {stats.full_tokens} prompt tokens "
+            f"sent ({stats.saved_tokens} saved, {stats.over_budget} over budget)"
+        )
@@ -0,0 +1,100 @@
+import json
+from typing import Any, Dict, List
+
+
+class JsonArrayStream:
+    """
+    Pick the objects of one array out of a streamed JSON document.
+
+    `feed()` returns every element of the array stored under the top-level
+    `key` whose closing brace arrived in the chunk, parsed with `json.loads`.
+    `fields()` returns the other top-level members whose value is complete.
+    Each character is scanned once; `text()` returns what has arrived so far.
+    """
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self._path = [("{", None), ("[", key)]
+        self._text: List[str] = []
+        # One entry per open container: (kind, key it is stored under)
+        self._stack: List[tuple] = []
+        self._key: str | None = None
+        self._string: List[str] | None = None
+        self._last_string: str | None = None
+        self._escaped = False
+        # Characters of the array element being read, if any.
+        self._item: List[str] | None = None
+        # Characters and key of the other top-level member being read, if any.
+        self._value: List[str] | None = None
+        self._value_key: str | None = None
+        self._fields: Dict[str, Any] = {}
+
+    def text(self) -> str:
+        return "".join(self._text)
+
+    def fields(self) -> Dict[str, Any]:
+        return dict(self._fields)
+
+    def _end_value(self) -> None:
+        # The value's characters end with the "," or "}" that closed it.
+        try:
+            self._fields[self._value_key] = json.loads("".join(self._value)[:-1])
+        except ValueError:
+            pass
+        self._value = None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self._text.append(chunk)
+        items = []
+        for char in chunk:
+            if self._item is not None:
+                self._item.append(char)
+            if self._value is not None:
+                self._value.append(char)
+            if self._string is not None:
+                if self._escaped:
+                    self._escaped = False
+                    self._string.append(char)
+                elif char == "\\":
+                    self._escaped = True
+                    self._string.append(char)
+                elif char == '"':
+                    # An invalid escape or a raw control character is left to
+                    # whoever validates the whole document.
+                    try:
+                        self._last_string = json.loads('"' + "".join(self._string) + '"')
+                    except ValueError:
+                        self._last_string = None
+                    self._string = None
+                else:
+                    self._string.append(char)
+                continue
+
+            if char == '"':
+                self._string = []
+            elif char == ":":
+                self._key = self._last_string
+                if self._stack == self._path[:1] and self._key not in (None, self.key):
+                    self._value, self._value_key = [], self._key
+            elif char in "{[":
+                parent = self._stack[-1] if self._stack else None
+                key = self._key if parent and parent[0] == "{" else None
+                if char == "{" and self._stack == self._path:
+                    self._item = [char]
+                self._stack.append((char, key))
+                self._key = None
+            elif char in "}]" and self._stack:
+                if self._value is not None and self._stack == self._path[:1]:
+                    self._end_value()
+                self._stack.pop()
+                if char == "}" and self._stack == self._path:
+                    try:
+                        items.append(json.loads("".join(self._item)))
+                    except ValueError:
+                        pass
+                    self._item = None
+            elif char == ",":
+                self._key = None
+                if self._value is not None and self._stack == self._path[:1]:
+                    self._end_value()
+        return items
@@ -0,0 +1,332 @@
+"""
+Check generated files so only the broken ones are sent back for repair.
+
+    errors = validate_files({"app/main.py": code, "pyproject.toml": text})
+
+Python files are compiled, JSON and TOML files parsed, and YAML files parsed
+when PyYAML is installed; anything else passes. The checks run in parallel in
+`EVOCORE_VALIDATE_WORKERS` checker processes shared by the whole process.
+Each one runs this file as a script and is fed over its pipes. Unlike a
+multiprocessing pool, it never re-imports the entry script.
+
+With `tests`, a project whose files all pass is also written to a temporary
+directory and its generated tests (`test_*.py`, `*_test.py`) are run there
+with pytest, in a sandboxed subprocess (see `SANDBOX_LIMITS`) with a timeout
+and a minimal environment. A failing run is blamed on the non-test project
+files named in its output, or else on the test files themselves. The sandbox
+keeps well-behaved code in its directory and off the network, but it is not
+a boundary against hostile code (ctypes gets around it). So running tests
+is refused unless EVOCORE_RUN_GENERATED_TESTS=1 is set.
+"""
+
+import ast
+import atexit
+import json
+import math
+import os
+import pathlib
+import re
+import runpy
+import subprocess
+import sys
+import tempfile
+import threading
+import tomllib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+_YAML_ERRORS = (yaml.YAMLError,) if yaml is not None else ()
+
+# Keeps repair prompts short; the end of a traceback is the useful part.
+MAX_ERROR_CHARS = 2000
+
+# Resource limits of a generated test run: address space, file size and open
+# files. CPU time is capped at the run's timeout.
+SANDBOX_LIMITS = {
+    "RLIMIT_AS": int(os.environ.get("EVOCORE_TEST_MEMORY_MB", "2048")) * 1024 * 1024,
+    "RLIMIT_FSIZE": 64 * 1024 * 1024,
+    "RLIMIT_NOFILE": 256,
+    "RLIMIT_CORE": 0,
+}
+
+
+def _tail(text: str) -> str:
+    text = text.strip()
+    return text if len(text) <= MAX_ERROR_CHARS else "..." + text[-MAX_ERROR_CHARS:]
+
+
+def check_file(path: str, code: str) -> str | None:
+    """The error that makes `code` invalid for its file type, or None."""
+    suffix = pathlib.PurePosixPath(path).suffix.lower()
+    try:
+        if suffix == ".py":
+            compile(code, path, "exec", dont_inherit=True)
+        elif suffix == ".json":
+            json.loads(code)
+        elif suffix == ".toml":
+            tomllib.loads(code)
+        elif suffix in (".yaml", ".yml") and yaml is not None:
+            list(yaml.safe_load_all(code))
+    except SyntaxError as e:
+        line = (e.text or "").rstrip()
+        return f"line {e.lineno}: {e.msg}" + (f"\n    {line}" if line else "")
+    except json.JSONDecodeError as e:
+        return f"line {e.lineno}: {e.msg}"
+    except (ValueError, *_YAML_ERRORS) as e:
+        return _tail(str(e))
+    return None
+
+
+def _serve() -> None:
+    """Checker process: answer each `[path, code]` line of stdin with its error."""
+    for line in sys.stdin:
+        sys.stdout.write(json.dumps(check_file(*json.loads(line))) + "\n")
+        sys.stdout.flush()
+
+
+# Each validation thread drives a checker process of its own.
+_local = threading.local()
+_checkers: List[subprocess.Popen] = []
+
+
+@atexit.register
+def _close_checkers() -> None:
+    for checker in _checkers:
+        if checker.poll() is None:
+            checker.stdin.close()
+            checker.wait()
+
+
+def _checker() -> subprocess.Popen:
+    checker = getattr(_local, "checker", None)
+    if checker is None or checker.poll() is not None:
+        # -P: this file's directory must not shadow the standard library.
+        checker = _local.checker = subprocess.Popen(
+            [sys.executable, "-P", __file__],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        _checkers.append(checker)
+    return checker
+
+
+def _check(item: Tuple[str, str]) -> Tuple[str, str | None]:
+    checker = _checker()
+    try:
+        checker.stdin.write(json.dumps(item) + "\n")
+        checker.stdin.flush()
+        reply = checker.stdout.readline()
+    except OSError:
+        reply = ""
+    if not reply:
+        # The file crashed the checker; the next one starts a new checker.
+        return item[0], f"checker exited with status {checker.wait()}"
+    return item[0], json.loads(reply)
+
+
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def get_validation_pool() -> ThreadPoolExecutor:
+    """The threads that hand files to the checker processes, one per checker."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = int(os.environ.get("EVOCORE_VALIDATE_WORKERS", min(4, os.cpu_count() or 1)))
+            _pool = ThreadPoolExecutor(workers, thread_name_prefix="validate")
+        return _pool
+
+
+def tests_allowed() -> bool:
+    """Whether generated tests may run on this host (EVOCORE_RUN_GENERATED_TESTS=1)."""
+    return os.environ.get("EVOCORE_RUN_GENERATED_TESTS") == "1"
+
+
+def is_test_file(path: str) -> bool:
+    name = pathlib.PurePosixPath(path).name
+    return name.endswith(".py") and (name.startswith("test_") or name.endswith("_test.py"))
+
+
+def _module(path: str) -> str:
+    parts = pathlib.PurePosixPath(path).with_suffix("").parts
+    return ".".join(parts[:-1] if parts[-1] == "__init__" else parts)
+
+
+def _imported(code: str, modules: Dict[str, str]) -> List[str]:
+    """Paths of the project modules `code` imports."""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return []
+    names = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names += [node.module] + [f"{node.module}.{alias.name}" for alias in node.names]
+    return [modules[name] for name in names if name in modules]
+
+
+# Audit events refused in the sandbox: new processes escape the audit hook,
+# and sockets reach the network.
+_SANDBOX_DENIED = (
+    "os.exec",
+    "os.fork",
+    "os.forkpty",
+    "os.posix_spawn",
+    "os.spawn",
+    "os.system",
+    "pty.spawn",
+    "subprocess.Popen",
+    "socket.bind",
+    "socket.connect",
+    "socket.getaddrinfo",
+    "socket.gethostbyname",
+    "socket.sendmsg",
+    "socket.sendto",
+)
+# Audit events that change the file system at their path arguments.
+_SANDBOX_WRITES = (
+    "os.chmod",
+    "os.chown",
+    "os.link",
+    "os.mkdir",
+    "os.remove",
+    "os.rename",
+    "os.rmdir",
+    "os.symlink",
+    "os.truncate",
+    "os.utime",
+    "shutil.rmtree",
+)
+_WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_CREAT | os.O_TRUNC | os.O_APPEND
+
+
+def _sandbox(root: str, cpu_seconds: int, args: List[str]) -> None:
+    """
+    Run pytest with `args` in `root`, limited by `SANDBOX_LIMITS` and
+    `cpu_seconds`, in its own network namespace where the OS allows it. An
+    audit hook also refuses sockets, new processes and writes outside `root`.
+    """
+    if resource is not None:
+        limits = dict(SANDBOX_LIMITS, RLIMIT_CPU=cpu_seconds)
+        for name, value in limits.items():
+            limit = getattr(resource, name)
+            hard = resource.getrlimit(limit)[1]
+            if hard != resource.RLIM_INFINITY:
+                value = min(value, hard)
+            resource.setrlimit(limit, (value, value))
+    if hasattr(os, "unshare"):
+        try:
+            os.unshare(os.CLONE_NEWUSER | os.CLONE_NEWNET)
+        except OSError:
+            pass
+    os.chdir(root)
+    root = os.path.realpath(root)
+    allowed = (root + os.sep, os.devnull)
+
+    def outside(path: Any) -> bool:
+        if isinstance(path, int):
+            return False
+        resolved = os.path.realpath(os.fsdecode(path))
+        return resolved != root and not resolved.startswith(allowed)
+
+    def hook(event: str, event_args: tuple) -> None:
+        if event.startswith(_SANDBOX_DENIED):
+            raise PermissionError(f"{event} is not allowed in the test sandbox")
+        if event == "open":
+            path, _, flags = event_args
+            writing = flags & _WRITE_FLAGS if isinstance(flags, int) else False
+        elif event in _SANDBOX_WRITES:
+            path, writing = event_args[0], True
+        else:
+            return
+        if writing and path is not None and outside(path):
+            raise PermissionError(f"writing {path} is not allowed in the test sandbox")
+
+    sys.argv = ["pytest", *args]
+    sys.addaudithook(hook)
+    runpy.run_module("pytest", run_name="__main__", alter_sys=True)
+
+
+def run_tests(files: Dict[str, str], timeout: float = 120.0) -> Dict[str, str]:
+    """Run the generated tests in a sandboxed scratch copy of the project; errors by blamed path."""
+    if not tests_allowed():
+        raise RuntimeError(
+            "running generated tests executes model-written code on this host; "
+            "set EVOCORE_RUN_GENERATED_TESTS=1 to allow it"
+        )
+    tests = [path for path in files if is_test_file(path)]
+    if not tests:
+        return {}
+    with tempfile.TemporaryDirectory(prefix="evocore-tests-") as root:
+        for path, code in files.items():
+            relative = pathlib.PurePosixPath(path.strip())
+            if relative.is_absolute() or ".." in relative.parts:
+                continue
+            target = pathlib.Path(root).joinpath(*relative.parts)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(code)
+        scratch = pathlib.Path(root, ".tmp")
+        scratch.mkdir(exist_ok=True)
+        env = {
+            "PATH": os.environ.get("PATH", ""),
+            "HOME": root,
+            "TMPDIR": str(scratch),
+            "PYTHONPATH": root,
+            "PYTHONDONTWRITEBYTECODE": "1",
+        }
+        command = [sys.executable, "-P", __file__, "--sandbox", root, str(math.ceil(timeout))]
+        command += ["-q", "-p", "no:cacheprovider", "--rootdir", root, "--ignore", str(scratch)]
+        try:
+            run = subprocess.run(
+                command, cwd=root, env=env, capture_output=True, text=True, timeout=timeout
+            )
+        except subprocess.TimeoutExpired:
+            return {path: f"tests timed out after {timeout:g}s" for path in tests}
+    # 5: no tests collected.
+    if run.returncode in (0, 5):
+        return {}
+    output = _tail(run.stdout + run.stderr)
+    named = [p for p in files if re.search(rf"(?<![\w/]){re.escape(p)}\b", output)]
+    failed = [p for p in named if p in tests] or tests
+    # A failing assertion usually only names the test, so the code under
+    # test is found through its imports.
+    modules = {_module(p): p for p in files if p.endswith(".py") and not is_test_file(p)}
+    blamed = {p for p in named if p in modules.values()}
+    for path in failed:
+        blamed.update(_imported(files[path], modules))
+    return {path: output for path in (sorted(blamed) or failed)}
+
+
+def validate_files(
+    files: Dict[str, str], tests: bool = False, timeout: float = 120.0
+) -> Dict[str, str]:
+    """Errors by path for the `files` (path -> content) that fail their checks."""
+    items: List[Tuple[str, str]] = list(files.items())
+    if not items:
+        return {}
+    results = get_validation_pool().map(_check, items)
+    errors = {path: error for path, error in results if error is not None}
+    if tests and not errors:
+        errors = run_tests(files, timeout)
+    return errors
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--sandbox"]:
+        _sandbox(sys.argv[2], int(sys.argv[3]), sys.argv[4:])
+    else:
+        _serve()
@@ -0,0 +1,79 @@
+import json
+
+from evocore.model import bench
+from evocore.model.model_manager import ModelManager
+
+
+def test_dummy_streams_configured_response():
+    model = ModelManager.get_model("dummy", {"response": "a b c"}, pooled=False)
+
+    assert list(model.stream("x")) == ["a", " b", " c"]
+    assert model.invoke("x") == "a b c"
+
+
+def test_run_offline_against_dummy():
+    config = {"response": "one two three four", "ttft": 0.01, "token_latency": 0.002}
+
+    result = bench.run(
+        ["dummy"], ["p1", "p2"], config, warm_runs=1, concurrency=(1, 4), startup=False
+    )
+
+    stats = result["models"]["dummy"]
+    assert stats["cold"]["tokens"] == 4
+    assert stats["warm"]["requests"] == 2
+    assert stats["warm"]["ttft_p50"] >= 0.01
+    assert stats["warm"]["latency_p50"] > stats["warm"]["ttft_p50"]
+    assert stats["warm"]["tokens_per_second"] > 0
+    assert set(stats["concurrency"]) == {"1", "4"}
+    assert stats["concurrency"]["4"]["requests"] == 8
+    assert stats["concurrency"]["4"]["errors"] == 0
+    assert (
+        stats["concurrency"]["4"]["throughput_rps"]
+        > stats["concurrency"]["1"]["throughput_rps"]
+    )
+
+
+def test_startup_measurement():
+    assert bench.measure_startup()["list_models_seconds"] > 0
+
+
+def test_compare_flags_regressions_in_both_directions():
+    baseline = {
+        "models": {
+            "m": {"warm": {"latency_p95": 1.0, "tokens_per_second": 100.0, "requests": 4}}
+        }
+    }
+    current = {
+        "models": {
+            "m": {"warm": {"latency_p95": 1.5, "tokens_per_second": 50.0, "requests": 8}}
+        }
+    }
+
+    regressions = bench.compare(baseline, current, threshold=0.2)
+
+    assert len(regressions) == 2
+    assert regressions[0].startswith("models.m.warm.latency_p95")
+    assert bench.compare(baseline, baseline) == []
+
+
+def test_compare_ignores_noise_below_min_delta():
+    baseline = {"models": {"m": {"warm": {"latency_p50": 0.0001}}}}
+    current = {"models": {"m": {"warm": {"latency_p50": 0.0003}}}}
+
+    assert bench.compare(baseline, current) == []
+
+
+def test_main_fails_on_regression(tmp_path):
+    corpus = tmp_path / "corpus.jsonl"
+    corpus.write_text('{"prompt": "hi"}\n"bare"\n')
+    baseline = tmp_path / "baseline.json"
+    output = tmp_path / "out.json"
+    args = ["--models", "dummy", "--corpus", str(corpus), "--no-startup",
+            "--concurrency", "1", "--warm-runs", "1"]
+
+    fast = args + ["--output", str(baseline), "--config", '{"ttft": 0}']
+    assert bench.main(fast) == 0
+    slow = args + ["--output", str(output), "--config", '{"ttft": 0.05}',
+                   "--baseline", str(baseline)]
+    assert bench.main(slow) == 1
+    assert json.loads(output.read_text())["meta"]["corpus_size"] == 2
@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+from evocore.model.cache import (
+    CachedModel,
+    ResponseCache,
+    make_key,
+)
+from evocore.model.model_manager import BaseModel
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingModel(BaseModel):
+    def __init__(self, config=None):
+        super().__init__(config)
+        self.calls = 0
+
+    def invoke(self, prompt, **kwargs):
+        self.calls += 1
+        return f"{prompt}:{self.calls}"
+
+    def stream(self, prompt, **kwargs):
+        self.calls += 1
+        yield prompt
+        yield "!"
+
+
+def test_make_key_covers_model_prompt_and_params():
+    base = make_key("m", "p", {"temperature": 0, "seed": 1})
+
+    assert base == make_key("m", "p", {"seed": 1, "temperature": 0})
+    assert base != make_key("other", "p", {"temperature": 0, "seed": 1})
+    assert base != make_key("m", "q", {"temperature": 0, "seed": 1})
+    assert base != make_key("m", "p", {"temperature": 1, "seed": 1})
+
+
+def test_get_put_persists_across_instances(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = ResponseCache(path)
+    cache.put("k", {"answer": 42})
+    cache.close()
+
+    reopened = ResponseCache(path)
+
+    assert reopened.get("k") == {"answer": 42}
+    assert reopened.get("missing", "default") == "default"
+    stats = reopened.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+
+
+def test_ttl_expiry(tmp_path):
+    clock = FakeClock()
+    cache = ResponseCache(tmp_path / "cache.sqlite", ttl=10, clock=clock)
+    cache.put("k", "v")
+
+    clock.now += 11
+
+    assert cache.get("k") is None
+    assert cache.stats().evictions == 1
+
+
+def test_size_bounded_lru_eviction(tmp_path):
+    clock = FakeClock()
+    cache = ResponseCache(tmp_path / "cache.sqlite", max_bytes=250, clock=clock)
+    cache.put("a", "x" * 100)
+    clock.now += 1
+    cache.put("b", "x" * 100)
+    clock.now += 1
+    cache.get("a")
+    clock.now += 1
+    cache.put("c", "x" * 100)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats().size_bytes <= 250
+
+
+def test_cached_model_invoke_and_bypass(tmp_path):
+    inner = CountingModel({"temperature": 0})
+    model = CachedModel(inner, ResponseCache(tmp_path / "cache.sqlite"))
+
+    assert model.invoke("p") == "p:1"
+    assert model.invoke("p") == "p:1"
+    assert model.invoke("q") == "q:2"
+    assert model.invoke("p", bypass_cache=True) == "p:3"
+    assert asyncio.run(model.ainvoke("p")) == "p:1"
+
+
+def test_cached_model_config_is_part_of_key(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+    CachedModel(CountingModel({"temperature": 0}), cache).invoke("p")
+    other = CountingModel({"temperature": 1})
+
+    CachedModel(other, cache).invoke("p")
+
+    assert other.calls == 1
+
+
+def test_cached_model_stream_stores_aggregate(tmp_path):
+    inner = CountingModel()
+    model = CachedModel(inner, ResponseCache(tmp_path / "cache.sqlite"))
+
+    assert list(model.stream("p")) == ["p", "!"]
+    assert list(model.stream("p")) == ["p!"]
+    assert inner.calls == 1
+
+
+def test_cached_model_replay_never_reaches_the_backend(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+    CachedModel(CountingModel(), cache).invoke("p")
+    inner = CountingModel()
+    model = CachedModel(inner, cache, replay=True)
+
+    assert model.invoke("p") == "p:1"
+    with pytest.raises(RuntimeError, match="no recorded response"):
+        model.invoke("q")
+    with pytest.raises(RuntimeError):
+        list(model.stream("q"))
+    assert inner.calls == 0
+
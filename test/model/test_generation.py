@@ -0,0 +1,158 @@
+import asyncio
+
+import pytest
+
+from evocore.model.generation import (
+    GenerationConfig,
+    estimate_tokens,
+    load_profiles,
+    prompt_text,
+    resolve_config,
+)
+from evocore.model.mock_ollama import MockOllamaServer
+from evocore.model.model_manager import ModelManager
+
+PROFILES = """
+[fast-dummy]
+model = "dummy"
+response = "one two three four"
+max_tokens = 2
+
+[tiny]
+num_ctx = 1024
+temperature = 0.0
+"""
+
+
+@pytest.fixture
+def profiles(tmp_path, monkeypatch):
+    path = tmp_path / "profiles.toml"
+    path.write_text(PROFILES)
+    monkeypatch.setenv("EVOCORE_PROFILES", str(path))
+    return path
+
+
+def test_from_config_picks_generation_keys():
+    config = GenerationConfig.from_config(
+        {"base_url": "http://x", "num_predict": 64, "temperature": 0.3, "keep_alive": "5m"}
+    )
+
+    assert config.max_tokens == 64
+    assert config.temperature == 0.3
+    assert config.keep_alive == "5m"
+
+
+@pytest.mark.parametrize(
+    "config", [{"max_tokens": 0}, {"num_ctx": "big"}, {"min_ctx": 4096, "max_ctx": 2048}]
+)
+def test_from_config_rejects_bad_values(config):
+    with pytest.raises(ValueError):
+        GenerationConfig.from_config(config)
+
+
+def test_context_size_is_bucketed_and_clamped():
+    config = GenerationConfig(max_tokens=512)
+
+    assert config.context_size(100) == 2048
+    assert config.context_size(2000) == 4096
+    assert config.context_size(3584) == 4096
+    assert config.context_size(3585) == 8192
+    assert config.context_size(10**6) == 32768
+    assert GenerationConfig(num_ctx=1000).context_size(10**6) == 1000
+    assert GenerationConfig(auto_ctx=False).context_size(10**6) is None
+
+
+def test_options_omit_unset_values():
+    config = GenerationConfig(max_tokens=128, temperature=0.0, stop=["END"])
+
+    assert config.options(10) == {
+        "num_predict": 128,
+        "num_ctx": 2048,
+        "temperature": 0.0,
+        "stop": ["END"],
+    }
+    assert config.override(max_tokens=None, top_k=5).options(10)["top_k"] == 5
+
+
+def test_prompt_text_and_estimate():
+    from langchain_core.prompts import ChatPromptTemplate
+
+    prompt = ChatPromptTemplate.from_messages([("human", "{x}")]).invoke({"x": "abc"})
+
+    assert prompt_text(prompt) == "Human: abc"
+    assert prompt_text(["a", "b"]) == "a\nb"
+    assert estimate_tokens("x" * 35) == 10
+
+
+def test_load_and_resolve_profiles(profiles):
+    loaded = load_profiles()
+
+    assert set(loaded) == {"fast-dummy", "tiny"}
+    assert resolve_config({"profile": "tiny", "num_ctx": 512}, loaded) == {
+        "num_ctx": 512,
+        "temperature": 0.0,
+    }
+    assert resolve_config({"profile": "fast-dummy"}, loaded)["max_tokens"] == 2
+    with pytest.raises(ValueError):
+        resolve_config({"profile": "missing"}, loaded)
+
+
+def test_load_profiles_validates(tmp_path):
+    path = tmp_path / "bad.toml"
+    path.write_text("[broken]\nmax_tokens = -1\n")
+
+    with pytest.raises(ValueError):
+        load_profiles(path)
+    assert load_profiles(tmp_path / "missing.toml") == {}
+
+
+def test_shipped_profiles_are_valid():
+    profiles = load_profiles()
+
+    assert {"fast-architect", "long-context-coder"} <= set(profiles)
+    assert all(p["model"] in ModelManager.list_models() for p in profiles.values())
+
+
+def test_get_model_applies_profile(profiles):
+    model = ModelManager.get_model("dummy", {"profile": "fast-dummy"}, pooled=False)
+
+    assert model.invoke("hi") == "one two"
+    assert model.invoke("hi", max_tokens=3) == "one two three"
+    assert ModelManager.from_profile("fast-dummy", pooled=False).invoke("hi") == "one two"
+    with pytest.raises(ValueError):
+        ModelManager.from_profile("tiny")
+
+
+def test_ollama_model_sends_options():
+    with MockOllamaServer(responses="hi") as server:
+        model = ModelManager.get_model(
+            "gpt-local",
+            {"base_url": server.url, "max_tokens": 256, "keep_alive": "10m", "temperature": 0},
+            pooled=False,
+        )
+        model.invoke("x" * 7000)
+        first = server.requests[-1]
+        model.invoke("short", max_tokens=16, top_k=4)
+        second = server.requests[-1]
+
+    assert first["options"]["num_predict"] == 256
+    assert first["options"]["num_ctx"] == 4096
+    assert first["options"]["temperature"] == 0
+    assert first["keep_alive"] == "10m"
+    assert second["options"]["num_predict"] == 16
+    assert second["options"]["top_k"] == 4
+    assert second["options"]["num_ctx"] == 2048
+
+
+def test_ollama_model_calibrates_from_prompt_counts():
+    # The mock reports len(prompt) // 4 prompt tokens.
+    with MockOllamaServer(responses="hi") as server:
+        model = ModelManager.get_model("gpt-local", {"base_url": server.url}, pooled=False)
+        list(model.stream("y" * 4000))
+
+        async def run():
+            return await model.ainvoke("z" * 4000)
+
+        asyncio.run(run())
+
+    assert model.chars_per_token == pytest.approx(4.0)
@@ -0,0 +1,221 @@
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from evocore.model.hedging import HedgedModel
+from evocore.model.model_manager import BaseModel
+from evocore.model.tracing import MetricsExporter, Tracer
+
+
+class Slow(BaseModel):
+    name = ""
+
+    def __init__(self, answer: str, delay: float = 0.0, fail: bool = False) -> None:
+        super().__init__()
+        self.answer = answer
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.closed = False
+        self.cancelled = False
+        self._lock = threading.Lock()
+
+    def _called(self) -> None:
+        with self._lock:
+            self.calls += 1
+        if self.fail:
+            raise ConnectionError("backend went away")
+
+    def invoke(self, prompt, **kwargs):
+        self._called()
+        time.sleep(self.delay)
+        return f"{self.answer} {prompt}"
+
+    async def ainvoke(self, prompt, **kwargs):
+        self._called()
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return f"{self.answer} {prompt}"
+
+    def stream(self, prompt, **kwargs):
+        self._called()
+        try:
+            for word in (self.answer, "b", "c"):
+                time.sleep(self.delay)
+                yield word
+        except GeneratorExit:
+            self.closed = True
+            raise
+
+    async def astream(self, prompt, **kwargs):
+        self._called()
+        try:
+            for word in (self.answer, "b", "c"):
+                await asyncio.sleep(self.delay)
+                yield word
+        except (asyncio.CancelledError, GeneratorExit):
+            self.cancelled = True
+            raise
+
+
+def test_fast_primary_is_not_hedged():
+    primary, backup = Slow("primary"), Slow("backup")
+    model = HedgedModel(primary, [backup], delay=0.5, tracer=Tracer())
+
+    assert model.invoke("x") == "primary x"
+    assert backup.calls == 0
+    assert model.stats().fired == 0
+
+
+def test_slow_primary_is_hedged_and_backup_wins():
+    metrics = MetricsExporter()
+    primary, backup = Slow("primary", delay=0.5), Slow("backup")
+    model = HedgedModel(primary, [backup], delay=0.05, budget=1.0, tracer=Tracer([metrics]))
+
+    started = time.perf_counter()
+    assert model.invoke("x") == "backup x"
+    assert time.perf_counter() - started < 0.4
+    stats = model.stats()
+    assert (stats.calls, stats.fired, stats.backup_wins) == (1, 1, 1)
+    text = metrics.render()
+    assert 'evocore_hedge_calls_total{model="Slow"} 1' in text
+    assert 'evocore_hedge_fired_total{model="Slow"} 1' in text
+    assert 'evocore_hedge_backup_wins_total{model="Slow"} 1' in text
+
+
+def test_failed_primary_falls_back_without_waiting():
+    primary, backup = Slow("primary", fail=True), Slow("backup")
+    model = HedgedModel(primary, [backup], delay=5.0, tracer=Tracer())
+
+    started = time.perf_counter()
+    assert model.invoke("x") == "backup x"
+    assert time.perf_counter() - started < 1.0
+
+
+def test_all_failures_raise_the_primary_error():
+    primary, backup = Slow("primary", fail=True), Slow("backup", fail=True)
+    model = HedgedModel(primary, [backup], delay=0.01, tracer=Tracer())
+
+    with pytest.raises(ConnectionError):
+        model.invoke("x")
+    assert model.stats().failures == 1
+
+
+def test_rejected_answer_is_hedged():
+    primary, backup = Slow("bad"), Slow("good")
+    model = HedgedModel(
+        primary, [backup], delay=5.0, accept=lambda r: r.startswith("good"), tracer=Tracer()
+    )
+
+    assert model.invoke("x") == "good x"
+
+
+def test_budget_limits_hedges():
+    primary, backup = Slow("primary", delay=0.05), Slow("backup", delay=0.05)
+    model = HedgedModel(primary, [backup], delay=0.0, budget=0.1, tracer=Tracer())
+
+    for _ in range(10):
+        model.invoke("x")
+
+    # 10% of the calls, plus one.
+    assert model.stats().fired == 2
+
+
+def test_delay_follows_the_primary_latency_percentile():
+    primary, backup = Slow("primary", delay=0.02), Slow("backup")
+    model = HedgedModel(
+        primary, [backup], percentile=90, initial_delay=3.0, min_samples=5, tracer=Tracer()
+    )
+
+    assert model.hedge_delay("invoke") == 3.0
+    for _ in range(5):
+        model.invoke("x")
+    assert 0.02 <= model.hedge_delay("invoke") < 0.5
+    assert model.hedge_delay("stream") == 3.0
+
+
+def test_failed_primary_calls_are_not_latency_samples():
+    primary, backup = Slow("primary", fail=True), Slow("backup")
+    model = HedgedModel(
+        primary, [backup], initial_delay=3.0, min_samples=2, budget=1.0, tracer=Tracer()
+    )
+
+    for _ in range(3):
+        model.invoke("x")
+
+    assert model.hedge_delay("invoke") == 3.0
+
+
+class Empty(Slow):
+    def stream(self, prompt, **kwargs):
+        self._called()
+        return iter(())
+
+
+def test_empty_primary_stream_loses_to_the_backup():
+    primary, backup = Empty("primary"), Slow("backup")
+    model = HedgedModel(primary, [backup], delay=5.0, tracer=Tracer())
+
+    assert list(model.stream("x")) == ["backup", "b", "c"]
+    assert model.stats().backup_wins == 1
+
+
+def test_empty_streams_everywhere_yield_nothing():
+    model = HedgedModel(Empty("primary"), [Empty("backup")], delay=0.01, tracer=Tracer())
+
+    assert list(model.stream("x")) == []
+    assert model.stats().failures == 0
+
+
+def test_stream_backup_wins_and_loser_is_closed():
+    primary, backup = Slow("primary", delay=0.3), Slow("backup", delay=0.01)
+    model = HedgedModel(primary, [backup], delay=0.05, budget=1.0, tracer=Tracer())
+
+    assert list(model.stream("x")) == ["backup", "b", "c"]
+    time.sleep(0.4)
+    assert primary.closed
+    assert model.stats().backup_wins == 1
+
+
+def test_async_loser_is_cancelled():
+    primary, backup = Slow("primary", delay=1.0), Slow("backup")
+    model = HedgedModel(primary, [backup], delay=0.05, budget=1.0, tracer=Tracer())
+
+    async def run():
+        return await model.ainvoke("x")
+
+    assert asyncio.run(run()) == "backup x"
+    assert primary.cancelled
+
+
+def test_astream_yields_the_winner():
+    primary, backup = Slow("primary", delay=1.0), Slow("backup", delay=0.01)
+    model = HedgedModel(primary, [backup], delay=0.05, budget=1.0, tracer=Tracer())
+
+    async def run():
+        return [chunk async for chunk in model.astream("x")]
+
+    assert asyncio.run(run()) == ["backup", "b", "c"]
+    assert primary.cancelled
+
+
+def test_backups_are_required():
+    with pytest.raises(ValueError):
+        HedgedModel(Slow("primary"), [])
+
+
+def test_importing_does_not_load_the_benchmarks():
+    code = (
+        "import sys, evocore.model.hedging; "
+        "print(sorted(m for m in sys.modules if 'bench' in m or 'mock_ollama' in m))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+
+    assert result.stdout.strip() == "[]", result.stderr
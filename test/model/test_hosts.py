@@ -0,0 +1,153 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from evocore.model import hosts
+from evocore.model.hosts import HostPool, get_host_pool
+from evocore.model.mock_ollama import MockOllamaServer
+from evocore.model.model_manager import ModelManager
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def fresh_pools(monkeypatch):
+    monkeypatch.setattr(hosts, "_pools", {})
+    monkeypatch.delenv("EVOCORE_OLLAMA_HOSTS", raising=False)
+
+
+@pytest.fixture
+def servers():
+    servers = [MockOllamaServer(responses="hi", ttft=0.05).start() for _ in range(3)]
+    yield servers
+    for server in servers:
+        server.stop()
+
+
+def model_for(servers, **config):
+    return ModelManager.get_model(
+        "gpt-local", {"hosts": [s.url for s in servers], **config}, pooled=False
+    )
+
+
+def test_sticky_until_the_pinned_host_is_busier():
+    pool = HostPool(["http://a", "http://b"], sticky_slack=1)
+
+    assert pool.choose("m") == "http://a"
+    pool.started("http://a")
+    assert pool.choose("m") == "http://a"
+    pool.started("http://a")
+    # Two in flight on a, none on b: the overflow spills to b, the pin stays.
+    assert pool.choose("m") == "http://b"
+    assert pool.pinned("m") == "http://a"
+    # Another model gets its own host.
+    assert pool.choose("other") == "http://b"
+
+
+def test_latency_strategy_prefers_fast_hosts():
+    pool = HostPool(["http://slow", "http://fast"], strategy="latency", sticky_slack=0)
+    pool.started("http://slow")
+    pool.finished("http://slow", 2.0, True)
+    pool.started("http://fast")
+    pool.finished("http://fast", 0.5, True)
+
+    assert pool.choose("m") == "http://fast"
+    for _ in range(3):
+        pool.started("http://fast")
+    # 4 x 0.5s queued on fast is worse than 1 x 2.0s on slow.
+    assert pool.choose("other") == "http://slow"
+
+
+def test_ejection_and_readmission():
+    clock = Clock()
+    pool = HostPool(["http://a", "http://b"], failure_threshold=2, ejection_seconds=10, clock=clock)
+    assert pool.choose("m") == "http://a"
+    for _ in range(2):
+        pool.started("http://a")
+        pool.finished("http://a", None, False)
+
+    assert pool.stats()["http://a"].ejected
+    assert pool.choose("m") == "http://b"
+    clock.now = 11
+    assert not pool.stats()["http://a"].ejected
+    pool.started("http://a")
+    pool.finished("http://a", None, False)
+    assert pool.stats()["http://a"].ejections == 2
+
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError):
+        HostPool(["http://a"], strategy="random")
+
+
+def test_concurrent_calls_spread_over_hosts(servers):
+    model = model_for(servers)
+
+    with ThreadPoolExecutor(max_workers=9) as executor:
+        results = list(executor.map(lambda _: model.invoke("x").content, range(9)))
+
+    assert results == ["hi"] * 9
+    assert all(server.counts["/api/chat"] >= 1 for server in servers)
+    stats = model.hosts.stats()
+    assert sum(s.requests for s in stats.values()) == 9
+    assert all(s.outstanding == 0 and s.latency >= 0.05 for s in stats.values())
+
+
+def test_sequential_calls_stay_on_one_host(servers):
+    model = model_for(servers)
+    other = ModelManager.get_model(
+        "qwen_local", {"hosts": [s.url for s in servers]}, pooled=False
+    )
+
+    for _ in range(4):
+        model.invoke("x")
+        assert "".join(c.content for c in other.stream("x")) == "hi"
+
+    assert [s.counts["/api/chat"] for s in servers] == [8, 0, 0]
+    assert model.hosts is other.hosts
+
+
+def test_failover_and_ejection(servers):
+    model = model_for(servers)
+    servers[0].fail_next(3)
+
+    for _ in range(3):
+        assert model.invoke("x").content == "hi"
+
+    stats = model.hosts.stats()
+    assert stats[servers[0].url].ejected
+    assert stats[servers[0].url].errors == 3
+    assert model.hosts.pinned(model.model_id) != servers[0].url
+
+
+def test_stream_fails_over_to_a_live_host(servers):
+    dead = MockOllamaServer().start()
+    dead.stop()
+    model = model_for([dead] + servers[:1])
+
+    assert "".join(c.content for c in model.stream("x")) == "hi"
+
+    async def run():
+        return [c.content async for c in model.astream("x")], await model.ainvoke("x")
+
+    chunks, message = asyncio.run(run())
+    assert "".join(chunks) == message.content == "hi"
+    assert model.hosts.stats()[dead.url].errors >= 1
+    assert model.hosts.probe() == {dead.url: False, servers[0].url: True}
+
+
+def test_hosts_from_env(monkeypatch, servers):
+    monkeypatch.setenv("EVOCORE_OLLAMA_HOSTS", f"{servers[0].url}, {servers[1].url}")
+
+    model = ModelManager.get_model("gpt-local", pooled=False)
+    direct = ModelManager.get_model("gpt-local", {"base_url": servers[2].url}, pooled=False)
+
+    assert model.hosts is get_host_pool([servers[0].url, servers[1].url])
+    assert direct.hosts is None
@@ -0,0 +1,115 @@
+import asyncio
+
+import httpx
+import pytest
+
+from evocore.model import http
+from evocore.model.http import HttpPool, HttpPoolConfig, configure_http_pool, get_http_pool
+from evocore.model.mock_ollama import MockOllamaServer
+from evocore.model.model_manager import ModelManager
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = HttpPool(HttpPoolConfig(max_connections=4, max_keepalive_connections=2))
+    monkeypatch.setattr(http, "_pool", pool)
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def server():
+    with MockOllamaServer(responses="hello there", token_latency=0.01) as server:
+        yield server
+
+
+def test_config_from_env(monkeypatch):
+    monkeypatch.setenv("EVOCORE_HTTP_MAX_CONNECTIONS", "64")
+    monkeypatch.setenv("EVOCORE_HTTP_READ_TIMEOUT", "120")
+    monkeypatch.setenv("EVOCORE_HTTP_POOL_TIMEOUT", "none")
+
+    config = HttpPoolConfig.from_env()
+
+    assert config.max_connections == 64
+    assert config.read_timeout == 120.0
+    assert config.pool_timeout is None
+    assert config.timeout().read == 120.0
+    assert config.limits().max_connections == 64
+
+
+def test_pool_is_created_lazily(pool):
+    assert pool._sync_transport is None
+    assert pool.stats() == http.HttpPoolStats()
+
+
+def test_models_share_connections(pool, server):
+    config = {"base_url": server.url}
+    models = [
+        ModelManager.get_model(name, config, pooled=False)
+        for name in ("gpt-local", "qwen_code_local", "llama-local")
+    ]
+    assert all(model._model is None for model in models)
+
+    for _ in range(3):
+        for model in models:
+            assert model.invoke("hi").content == "hello there"
+            assert "".join(c.content for c in model.stream("hi")) == "hello there"
+
+    stats = pool.stats()
+    assert stats.requests == 18
+    assert stats.in_flight == 0
+    # Sequential calls reuse one kept-alive connection across all models.
+    assert stats.connections_opened == 1
+
+
+def test_close_keeps_shared_connections(pool, server):
+    model = ModelManager.get_model("gpt-local", {"base_url": server.url}, pooled=False)
+    model.invoke("hi")
+    model.close()
+
+    other = ModelManager.get_model("qwen_local", {"base_url": server.url}, pooled=False)
+    other.invoke("hi")
+    assert model.invoke("hi").content == "hello there"
+    assert pool.stats().connections_opened == 1
+
+
+def test_async_requests_use_a_pool_per_loop(pool, server):
+    model = ModelManager.get_model("gpt-local", {"base_url": server.url}, pooled=False)
+
+    async def run():
+        results = await asyncio.gather(*(model.ainvoke("hi") for _ in range(6)))
+        chunks = [c.content async for c in model.astream("hi")]
+        return results, chunks
+
+    for _ in range(2):
+        results, chunks = asyncio.run(run())
+        assert [r.content for r in results] == ["hello there"] * 6
+        assert "".join(chunks) == "hello there"
+
+    stats = pool.stats()
+    assert stats.requests == 14
+    assert stats.in_flight == 0
+    assert 2 <= stats.peak_in_flight <= 6
+    # Each loop's stream reuses a connection kept alive by the gather.
+    assert stats.connections_opened <= stats.requests - 2
+
+
+def test_in_flight_counts_open_streams(pool, server):
+    client = httpx.Client(base_url=server.url, **pool.client_kwargs())
+    with client.stream("POST", "/api/chat", json={"model": "m", "messages": []}) as response:
+        assert pool.stats().in_flight == 1
+        response.read()
+    assert pool.stats().in_flight == 0
+    client.close()
+    assert pool._sync_transport is not None
+
+
+def test_configure_http_pool_replaces_global(monkeypatch):
+    monkeypatch.setattr(http, "_pool", None)
+
+    first = get_http_pool()
+    assert get_http_pool() is first
+    second = configure_http_pool(max_connections=8)
+    assert second is not first
+    assert get_http_pool().config.max_connections == 8
+    second.close()
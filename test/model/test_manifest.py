@@ -0,0 +1,124 @@
+import json
+import os
+import subprocess
+import sys
+import pathlib
+
+from evocore.model.manifest import scan_module, load_manifest
+
+
+MODEL_SOURCE = """
+from evocore.model.model_manager import BaseModel
+
+
+class Base(BaseModel):
+    pass
+
+
+class First(BaseModel):
+    name = "first"
+
+
+class Second(BaseModel):
+    name: str = "second"
+"""
+
+HELPER_SOURCE = """
+from evocore.model import model_manager
+
+
+class Settings:
+    name = "not-a-model"
+
+
+class Local(model_manager.BaseModel):
+    pass
+
+
+class Derived(Local):
+    name = "derived"
+"""
+
+
+def _write_models(path, files):
+    path.mkdir()
+    (path / "__init__.py").write_text("")
+    for name, source in files.items():
+        (path / f"{name}.py").write_text(source)
+    return path
+
+
+def test_scan_module_finds_named_classes():
+    assert scan_module(MODEL_SOURCE) == ["first", "second"]
+
+
+def test_scan_module_skips_classes_that_are_not_models():
+    assert scan_module(HELPER_SOURCE) == ["derived"]
+
+
+def test_load_manifest_indexes_modules(tmp_path):
+    models = _write_models(tmp_path / "models", {"pair": MODEL_SOURCE})
+    manifest = tmp_path / "manifest.json"
+
+    index = load_manifest(models, manifest)
+
+    assert index == {"first": "pair", "second": "pair"}
+    assert manifest.exists()
+
+
+def test_load_manifest_reuses_cached_entries(tmp_path):
+    models = _write_models(tmp_path / "models", {"pair": MODEL_SOURCE})
+    manifest = tmp_path / "manifest.json"
+    load_manifest(models, manifest)
+
+    data = json.loads(manifest.read_text())
+    data["modules"]["pair"]["models"] = ["from_cache"]
+    manifest.write_text(json.dumps(data))
+
+    assert load_manifest(models, manifest) == {"from_cache": "pair"}
+
+
+def test_load_manifest_rescans_changed_files(tmp_path):
+    models = _write_models(tmp_path / "models", {"pair": MODEL_SOURCE})
+    manifest = tmp_path / "manifest.json"
+    load_manifest(models, manifest)
+
+    module = models / "pair.py"
+    module.write_text(MODEL_SOURCE.replace('"second"', '"renamed"'))
+    stat = module.stat()
+    os.utime(module, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert load_manifest(models, manifest) == {"first": "pair", "renamed": "pair"}
+
+
+def test_load_manifest_drops_removed_files(tmp_path):
+    models = _write_models(
+        tmp_path / "models",
+        {"pair": MODEL_SOURCE, "extra": 'class X(BaseModel):\n    name = "extra"\n'},
+    )
+    manifest = tmp_path / "manifest.json"
+    assert "extra" in load_manifest(models, manifest)
+
+    (models / "extra.py").unlink()
+
+    assert "extra" not in load_manifest(models, manifest)
+
+
+def test_list_models_imports_nothing(tmp_path):
+    root = pathlib.Path(__file__).parents[2]
+    code = (
+        "import sys\n"
+        "from evocore.model.model_manager import ModelManager\n"
+        "assert 'gpt-local' in ModelManager.list_models()\n"
+        "ModelManager.get_model('dummy')\n"
+        "loaded = [m for m in sys.modules if m.startswith('evocore.model.models.')]\n"
+        "assert loaded == ['evocore.model.models.dummy'], loaded\n"
+        "assert 'langchain_ollama' not in sys.modules\n"
+    )
+    env = dict(os.environ, EVOCORE_CACHE_DIR=str(tmp_path))
+
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=root, env=env, capture_output=True, text=True
+    )
+
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,128 @@
+import time
+
+import ollama
+import pytest
+
+from evocore.model.mock_ollama import MockOllamaServer
+from evocore.model.model_manager import ModelManager
+from evocore.model.tracing import MetricsExporter, TracedModel, Tracer
+from test.model.test_tracing import Collector
+
+
+@pytest.fixture
+def server():
+    with MockOllamaServer(responses="hello from the mock") as server:
+        yield server
+
+
+@pytest.mark.parametrize(
+    "model_name", [m for m in ModelManager.list_models() if m != "dummy"]
+)
+def test_all_models_against_mock_server(server, model_name):
+    model = ModelManager.get_model(model_name, {"base_url": server.url}, pooled=False)
+
+    result = model.invoke("who are you?")
+
+    assert result.content == "hello from the mock"
+    assert server.requests[-1]["model"] == model.model_id
+    assert result.usage_metadata["output_tokens"] == 4
+
+
+def test_streaming_honours_ttft_and_token_latency():
+    with MockOllamaServer(responses="a b c d", ttft=0.1, token_latency=0.05) as server:
+        model = ModelManager.get_model("gpt-local", {"base_url": server.url}, pooled=False)
+        start = time.perf_counter()
+        arrivals = []
+        for chunk in model.stream("hi"):
+            if chunk.content:
+                arrivals.append((time.perf_counter() - start, chunk.content))
+
+    assert [text for _, text in arrivals] == ["a", " b", " c", " d"]
+    assert arrivals[0][0] >= 0.1
+    assert arrivals[-1][0] - arrivals[0][0] >= 0.1
+
+
+def test_scripted_and_callable_responses():
+    with MockOllamaServer(responses=["first", "second"]) as server:
+        model = ModelManager.get_model("gpt-local", {"base_url": server.url}, pooled=False)
+        assert [model.invoke("x").content for _ in range(3)] == ["first", "second", "first"]
+
+    echo = lambda request: request["messages"][-1]["content"].upper()
+    with MockOllamaServer(responses=echo) as server:
+        model = ModelManager.get_model("gpt-local", {"base_url": server.url}, pooled=False)
+        assert model.invoke("shout").content == "SHOUT"
+
+
+def test_error_injection():
+    with MockOllamaServer() as server:
+        model = ModelManager.get_model("gpt-local", {"base_url": server.url}, pooled=False)
+        server.fail_next()
+
+        with pytest.raises(ollama.ResponseError):
+            model.invoke("x")
+        assert model.invoke("x").content == "ok"
+        assert server.counts["errors"] == 1
+
+
+def test_error_rate_is_deterministic():
+    def failures(seed):
+        with MockOllamaServer(error_rate=0.5, seed=seed) as server:
+            client = ollama.Client(host=server.url)
+            pattern = []
+            for _ in range(10):
+                try:
+                    client.chat(model="m", messages=[{"role": "user", "content": "x"}])
+                    pattern.append(False)
+                except ollama.ResponseError:
+                    pattern.append(True)
+            return pattern
+
+    assert failures(1) == failures(1)
+    assert any(failures(1))
+
+
+def test_concurrent_requests_overlap():
+    with MockOllamaServer(ttft=0.1) as server:
+        model = ModelManager.get_model("gpt-local", {"base_url": server.url}, pooled=False)
+        start = time.perf_counter()
+        results = model.batch(["x"] * 8, max_concurrency=8)
+        elapsed = time.perf_counter() - start
+
+    assert not results.errors
+    assert server.peak_in_flight > 1
+    assert elapsed < 0.5
+
+
+def test_load_and_unload_simulation():
+    with MockOllamaServer(load_time=0.05) as server:
+        client = ollama.Client(host=server.url)
+        assert client.generate(model="other", prompt="hi").load_duration == 50_000_000
+        client.generate(model="big")
+        assert [m.model for m in client.ps().models] == ["big", "other"]
+
+        assert client.generate(model="big", prompt="hi").load_duration == 0
+
+        client.generate(model="big", keep_alive=0)
+        assert [m.model for m in client.ps().models] == ["other"]
+        assert (server.counts["load"], server.counts["unload"]) == (2, 1)
+
+
+def test_prompt_cache_reuses_the_shared_prefix():
+    metrics = MetricsExporter()
+    collector = Collector()
+    tracer = Tracer([collector, metrics])
+    shared = "spec " * 200
+    with MockOllamaServer(responses="ok", prompt_token_latency=0.001, prompt_cache=True) as server:
+        model = ModelManager.get_model("gpt-local", {"base_url": server.url}, pooled=False)
+        traced = TracedModel(model, tracer)
+        traced.invoke(shared + "first file")
+        calibrated = model.chars_per_token
+        traced.invoke(shared + "second file")
+
+    cold, warm = (s.attributes for s in collector.spans)
+    assert cold["prompt_tokens"] > 10 * warm["prompt_tokens"]
+    assert cold["prompt_eval_seconds"] >= 0.2 > warm["prompt_eval_seconds"]
+    assert cold["server_seconds"] >= cold["prompt_eval_seconds"]
+    # Cached prompt tokens are not reported, so they must not skew the estimate.
+    assert model.chars_per_token == calibrated
+    assert 'evocore_model_prompt_eval_seconds_count{model="gpt-local"} 2' in metrics.render()
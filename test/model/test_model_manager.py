@@ -1,9 +1,13 @@
+import asyncio
+import time
+
 import pytest
 
 from evocore.model.model_manager import (
     ModelManager,
     MODEL_REGISTRY,
     BaseModel,
+    BatchResult,
 )
 
 
@@ -32,6 +36,153 @@ def test_get_model_not_found():
         ModelManager.get_model("not_exist")
 
 
+def test_get_model_is_pooled_per_config():
+    first = ModelManager.get_model("dummy", config={"a": 1, "b": 2})
+    second = ModelManager.get_model("dummy", config={"b": 2, "a": 1})
+    other = ModelManager.get_model("dummy", config={"a": 2})
+
+    assert first is second
+    assert other is not first
+    assert ModelManager.get_model("dummy", config={"a": 1, "b": 2}, pooled=False) is not first
+
+
+def test_release_drops_pooled_model():
+    first = ModelManager.get_model("dummy", config={"release": True})
+
+    assert ModelManager.release("dummy", config={"release": True})
+    assert ModelManager.get_model("dummy", config={"release": True}) is not first
+
+
+def test_release_matches_profile_config(tmp_path, monkeypatch):
+    profiles = tmp_path / "profiles.toml"
+    profiles.write_text('[released]\nmodel = "dummy"\nmax_tokens = 8\n')
+    monkeypatch.setenv("EVOCORE_PROFILES", str(profiles))
+    first = ModelManager.get_model("dummy", config={"profile": "released"})
+
+    assert ModelManager.release("dummy", config={"profile": "released"})
+    assert ModelManager.get_model("dummy", config={"profile": "released"}) is not first
+
+
+def test_pool_stats_counts_hits():
+    before = ModelManager.pool_stats()
+    ModelManager.get_model("dummy", config={"stats": True})
+    ModelManager.get_model("dummy", config={"stats": True})
+    after = ModelManager.pool_stats()
+
+    assert after.misses - before.misses == 1
+    assert after.hits - before.hits == 1
+
+
+class SlowModel(BaseModel):
+    def __init__(self, delay: float = 0.05) -> None:
+        super().__init__()
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+
+    def invoke(self, prompt):
+        return prompt
+
+    async def ainvoke(self, prompt):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay * (10 if prompt == "slow" else 1))
+        finally:
+            self.active -= 1
+        if prompt == "fail":
+            raise RuntimeError("boom")
+        return prompt
+
+
+def test_ainvoke_dummy():
+    model = ModelManager.get_model("dummy")
+
+    assert asyncio.run(model.ainvoke("hi")) == "ok"
+
+
+def test_default_ainvoke_runs_invoke_in_thread():
+    model = SlowModel()
+
+    assert asyncio.run(BaseModel.ainvoke(model, "hi")) == "hi"
+
+
+def test_ainvoke_many_preserves_order_and_limit():
+    model = SlowModel()
+    prompts = [str(i) for i in range(12)]
+
+    start = time.perf_counter()
+    results = asyncio.run(
+        ModelManager.ainvoke_many([(model, p) for p in prompts], max_concurrency=4)
+    )
+    elapsed = time.perf_counter() - start
+
+    assert results == prompts
+    assert model.peak == 4
+    assert elapsed < 12 * model.delay
+
+
+def test_ainvoke_many_by_name_and_exceptions():
+    model = SlowModel(delay=0)
+    results = asyncio.run(
+        ModelManager.ainvoke_many(
+            [("dummy", "a"), (model, "fail"), (model, "b")], return_exceptions=True
+        )
+    )
+
+    assert results[0] == "ok"
+    assert isinstance(results[1], RuntimeError)
+    assert results[2] == "b"
+
+
+def test_batch_dummy():
+    results = ModelManager.get_model("dummy").batch(["a", "b", "c"])
+
+    assert isinstance(results, BatchResult)
+    assert results == ["ok", "ok", "ok"]
+    assert len(results.latencies) == 3
+
+
+def test_batch_ordered_with_failures():
+    model = SlowModel(delay=0.01)
+
+    results = model.batch(["slow", "fail", "b"], max_concurrency=3)
+
+    assert results[0] == "slow"
+    assert isinstance(results[1], RuntimeError)
+    assert results[2] == "b"
+    assert results.errors == [results[1]]
+    assert results.latencies[0] > results.latencies[2]
+    assert model.peak == 3
+
+
+def test_batch_raises_without_return_exceptions():
+    model = SlowModel(delay=0)
+
+    with pytest.raises(RuntimeError, match="boom"):
+        model.batch(["a", "fail"], return_exceptions=False)
+
+
+def test_batch_timeout_only_fails_slow_item():
+    model = SlowModel(delay=0.02)
+
+    results = model.batch(["slow", "a"], timeout=0.1)
+
+    assert isinstance(results[0], TimeoutError)
+    assert results[1] == "a"
+
+
+def test_default_stream_yields_single_chunk():
+    assert list(SlowModel(delay=0).stream("hi")) == ["hi"]
+
+
+def test_default_astream_yields_single_chunk():
+    async def collect():
+        return [chunk async for chunk in SlowModel(delay=0).astream("hi")]
+
+    assert asyncio.run(collect()) == ["hi"]
+
+
 def test_models_loaded_only_once():
     ModelManager.list_models()
     first_registry = MODEL_REGISTRY.copy()
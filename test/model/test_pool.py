@@ -0,0 +1,106 @@
+import threading
+
+import pytest
+
+from evocore.model.pool import ModelPool, normalize_config
+
+
+class FakeModel:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalize_config_ignores_key_order():
+    assert normalize_config({"a": 1, "b": {"c": 2}}) == normalize_config({"b": {"c": 2}, "a": 1})
+    assert normalize_config(None) == normalize_config({})
+
+
+def test_get_returns_pooled_instance():
+    pool = ModelPool()
+
+    first = pool.get("m", {"a": 1}, FakeModel)
+    second = pool.get("m", {"a": 1}, FakeModel)
+    other = pool.get("m", {"a": 2}, FakeModel)
+
+    assert first is second
+    assert other is not first
+    stats = pool.stats()
+    assert (stats.hits, stats.misses, stats.size) == (1, 2, 2)
+
+
+def test_lru_eviction_closes_oldest():
+    pool = ModelPool(max_size=2)
+    a = pool.get("a", None, FakeModel)
+    pool.get("b", None, FakeModel)
+    pool.get("a", None, FakeModel)
+    pool.get("c", None, FakeModel)
+
+    assert pool.stats().evictions == 1
+    assert not a.closed
+    assert pool.get("a", None, FakeModel) is a
+
+
+def test_ttl_eviction():
+    clock = FakeClock()
+    pool = ModelPool(ttl=10, clock=clock)
+    first = pool.get("m", None, FakeModel)
+
+    clock.now = 11
+    second = pool.get("m", None, FakeModel)
+
+    assert first.closed
+    assert second is not first
+    assert pool.stats().evictions == 1
+
+
+def test_release_and_close():
+    pool = ModelPool()
+    a = pool.get("a", None, FakeModel)
+    b = pool.get("b", {"x": 1}, FakeModel)
+
+    assert pool.release("a")
+    assert not pool.release("a")
+    assert a.closed
+
+    pool.close()
+    assert b.closed
+    assert len(pool) == 0
+
+
+def test_invalid_size():
+    with pytest.raises(ValueError):
+        ModelPool(max_size=0)
+
+
+def test_concurrent_get_builds_once():
+    pool = ModelPool()
+    built = []
+    barrier = threading.Barrier(8)
+
+    def factory():
+        built.append(1)
+        return FakeModel()
+
+    def worker():
+        barrier.wait()
+        pool.get("m", None, factory)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(built) == 1
+    assert pool.stats().hits == 7
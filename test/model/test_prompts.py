@@ -0,0 +1,31 @@
+import pydantic
+
+from evocore.model.prompts import PromptLayout, section, stable_json
+
+
+class Spec(pydantic.BaseModel):
+    name: str
+    options: dict
+    files: list
+
+
+def test_stable_json_is_independent_of_dict_order():
+    a = Spec(name="x", options={"b": 1, "a": [{"z": 1, "y": 2}]}, files=[])
+    b = Spec(name="x", options={"a": [{"y": 2, "z": 1}], "b": 1}, files=[])
+
+    assert stable_json(a) == stable_json(b)
+    # Model fields keep their declared order, the rest is sorted and compact.
+    assert stable_json(a) == '{"name":"x","options":{"a":[{"y":2,"z":1}],"b":1},"files":[]}'
+    assert stable_json(a, exclude=["files"]) == '{"name":"x","options":{"a":[{"y":2,"z":1}],"b":1}}'
+
+
+def test_layout_renders_static_sections_first():
+    layout = PromptLayout("\nSystem.\n", [section("Spec", "{}")]).extend(section("Files", "a\nb"))
+
+    first = layout.render(section("File to generate", '{"path":"a"}')).to_messages()
+    second = layout.render(section("File to generate", '{"path":"b"}')).to_messages()
+
+    assert first[0].content == second[0].content == "System."
+    assert first[1].content == 'Spec:\n{}\n\nFiles:\na\nb\n\nFile to generate:\n{"path":"a"}'
+    assert second[1].content.startswith("Spec:\n{}\n\nFiles:\na\nb\n\n")
+    assert len(PromptLayout("System.").render().to_messages()) == 1
@@ -0,0 +1,224 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from evocore.model.cache import CachedModel, ResponseCache
+from evocore.model.mock_ollama import MockOllamaServer
+from evocore.model.model_manager import ModelManager
+from evocore.model.residency import (
+    OllamaBackend,
+    ResidencyManager,
+    ResidentModel,
+    backend_model_id,
+)
+from evocore.model.tracing import MetricsExporter, Tracer
+
+
+class RecordingBackend:
+    def __init__(self, load_time: float = 0.0) -> None:
+        self.load_time = load_time
+        self.events = []
+        self.lock = threading.Lock()
+
+    def load(self, model_id, keep_alive):
+        time.sleep(self.load_time)
+        with self.lock:
+            self.events.append(("load", model_id))
+
+    def unload(self, model_id):
+        with self.lock:
+            self.events.append(("unload", model_id))
+
+
+def manager(backend, **kwargs):
+    kwargs.setdefault("footprints", {"a": 10, "b": 10, "c": 5, "huge": 100})
+    return ResidencyManager(budget_gb=20, backend=backend, tracer=Tracer(), **kwargs)
+
+
+def test_models_that_fit_stay_resident():
+    backend = RecordingBackend()
+    residency = manager(backend)
+
+    for model_id in ["a", "b", "a", "b"]:
+        with residency.acquire(model_id):
+            pass
+
+    assert backend.events == [("load", "a"), ("load", "b")]
+    stats = residency.stats()
+    assert (stats.loads, stats.unloads, stats.swaps) == (2, 0, 0)
+    assert stats.resident == ["a", "b"]
+
+
+def test_least_recently_used_idle_model_is_unloaded():
+    backend = RecordingBackend()
+    residency = manager(backend)
+    for model_id in ["a", "b", "a", "c"]:
+        residency.preload(model_id)
+
+    assert backend.events[-2:] == [("unload", "b"), ("load", "c")]
+    assert residency.stats().swaps == 1
+    assert residency.stats().resident == ["a", "c"]
+
+
+def test_oversized_model_runs_alone():
+    backend = RecordingBackend()
+    residency = manager(backend)
+    residency.preload("a")
+    residency.preload("huge")
+
+    assert residency.stats().resident == ["huge"]
+    residency.close()
+    assert residency.stats().resident == []
+    assert backend.events[-1] == ("unload", "huge")
+
+
+def test_busy_model_is_not_evicted():
+    backend = RecordingBackend()
+    residency = ResidencyManager(
+        budget_gb=10, backend=backend, footprints={"a": 10, "b": 10}, tracer=Tracer()
+    )
+    order = []
+    started = threading.Event()
+
+    def use_a():
+        with residency.acquire("a"):
+            started.set()
+            time.sleep(0.2)
+            order.append("a done")
+
+    thread = threading.Thread(target=use_a)
+    thread.start()
+    started.wait()
+    with residency.acquire("b"):
+        order.append("b running")
+    thread.join()
+
+    assert order == ["a done", "b running"]
+
+
+def test_queued_work_is_batched_by_model():
+    """Interleaved a/b requests on a box that fits one model swap once, not per call."""
+    backend = RecordingBackend(load_time=0.05)
+    residency = ResidencyManager(
+        budget_gb=10, backend=backend, footprints={"a": 10, "b": 10}, tracer=Tracer()
+    )
+    residency.preload("a")
+
+    def work(model_id):
+        with residency.acquire(model_id):
+            time.sleep(0.02)
+
+    threads = [threading.Thread(target=work, args=(m,)) for m in "abababab"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert residency.stats().swaps == 1
+    assert [e for e in backend.events if e[0] == "load"] == [("load", "a"), ("load", "b")]
+
+
+def test_waiting_model_is_not_starved():
+    backend = RecordingBackend()
+    residency = ResidencyManager(
+        budget_gb=10,
+        backend=backend,
+        footprints={"a": 10, "b": 10},
+        max_wait=0.1,
+        tracer=Tracer(),
+    )
+    stop = threading.Event()
+
+    def keep_a_busy():
+        while not stop.is_set():
+            with residency.acquire("a"):
+                time.sleep(0.01)
+
+    workers = [threading.Thread(target=keep_a_busy) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    time.sleep(0.05)
+    start = time.perf_counter()
+    with residency.acquire("b"):
+        waited = time.perf_counter() - start
+    stop.set()
+    for worker in workers:
+        worker.join()
+
+    assert waited < 1.0
+
+
+def test_failed_load_releases_reservation():
+    class Failing(RecordingBackend):
+        def load(self, model_id, keep_alive):
+            raise ConnectionError("down")
+
+    residency = manager(Failing())
+    with pytest.raises(ConnectionError):
+        residency.preload("a")
+    assert residency.stats().resident == []
+    assert residency._in_use == {}
+
+
+def test_cancelled_async_acquire_releases_the_model():
+    loading, release = threading.Event(), threading.Event()
+
+    class Blocking(RecordingBackend):
+        def load(self, model_id, keep_alive):
+            loading.set()
+            release.wait(5)
+
+    residency = manager(Blocking())
+
+    async def run():
+        task = asyncio.create_task(residency.aacquire("a").__aenter__())
+        await asyncio.to_thread(loading.wait, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        release.set()
+
+    asyncio.run(run())
+    deadline = time.monotonic() + 5
+    while residency._in_use and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert residency._in_use == {}
+    assert residency.stats().resident == ["a"]
+
+
+def test_resident_model_against_mock_server():
+    metrics = MetricsExporter()
+    with MockOllamaServer(responses="hi") as server:
+        residency = ResidencyManager(
+            budget_gb=20,
+            backend=OllamaBackend(server.url),
+            footprints={"gpt-oss:20b": 14, "qwen3-coder:30b": 19},
+            tracer=Tracer([metrics]),
+        )
+        config = {"base_url": server.url}
+        architect = ResidentModel(ModelManager.get_model("gpt-local", config), residency)
+        coder = ResidentModel(ModelManager.get_model("qwen_code_local", config), residency)
+
+        assert architect.invoke("x").content == "hi"
+        assert server.requests[-1]["keep_alive"] == -1
+        assert "".join(c.content for c in coder.stream("y")) == "hi"
+        assert asyncio.run(architect.ainvoke("z")).content == "hi"
+
+        assert sorted(server.loaded) == ["gpt-oss:20b"]
+        assert server.counts["unload"] == 2
+
+    stats = residency.stats()
+    assert (stats.loads, stats.swaps) == (3, 2)
+    text = metrics.render()
+    assert 'evocore_residency_swaps_total{model="gpt-oss:20b"} 1' in text
+    assert 'evocore_residency_loads_total{model="qwen3-coder:30b"} 1' in text
+
+
+def test_backend_model_id_looks_through_wrappers(tmp_path):
+    model = ModelManager.get_model("gpt-local", pooled=False)
+    cached = CachedModel(model, ResponseCache(tmp_path / "c.sqlite"))
+
+    assert backend_model_id(cached) == "gpt-oss:20b"
+    assert backend_model_id(ModelManager.get_model("dummy")) == "dummy"
@@ -0,0 +1,176 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from evocore.model.model_manager import BaseModel
+from evocore.model.singleflight import SingleflightModel
+from evocore.model.tracing import MetricsExporter, Tracer
+
+
+class Slow(BaseModel):
+    name = ""
+
+    def __init__(self, delay: float = 0.1, fail: bool = False) -> None:
+        super().__init__()
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _called(self) -> None:
+        with self._lock:
+            self.calls += 1
+        if self.fail:
+            raise ConnectionError("backend went away")
+
+    def invoke(self, prompt, **kwargs):
+        self._called()
+        time.sleep(self.delay)
+        return f"answer to {prompt}"
+
+    async def ainvoke(self, prompt, **kwargs):
+        self._called()
+        await asyncio.sleep(self.delay)
+        return f"answer to {prompt}"
+
+    def stream(self, prompt, **kwargs):
+        self._called()
+        for word in ("a", "b", "c"):
+            time.sleep(self.delay / 3)
+            yield word
+
+    async def astream(self, prompt, **kwargs):
+        self._called()
+        for word in ("a", "b", "c"):
+            await asyncio.sleep(self.delay / 3)
+            yield word
+
+
+def test_concurrent_identical_calls_share_one_request():
+    metrics = MetricsExporter()
+    inner = Slow()
+    model = SingleflightModel(inner, Tracer([metrics]))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(model.invoke, ["x"] * 8))
+
+    assert results == ["answer to x"] * 8
+    assert inner.calls == 1
+    stats = model.stats()
+    assert (stats.upstream, stats.coalesced, stats.in_flight) == (1, 7, 0)
+    text = metrics.render()
+    assert 'evocore_singleflight_upstream_total{model="Slow"} 1' in text
+    assert 'evocore_singleflight_coalesced_total{model="Slow"} 7' in text
+
+
+def test_different_arguments_are_not_coalesced():
+    inner = Slow(delay=0.05)
+    model = SingleflightModel(inner, Tracer())
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda p: model.invoke(p[0], max_tokens=p[1]), [("x", 1), ("x", 2), ("y", 1)]))
+
+    assert inner.calls == 3
+
+
+def test_calls_after_completion_go_upstream_again():
+    inner = Slow(delay=0)
+    model = SingleflightModel(inner, Tracer())
+
+    model.invoke("x")
+    model.invoke("x")
+
+    assert inner.calls == 2
+
+
+def test_errors_reach_every_waiter():
+    inner = Slow(fail=True)
+    model = SingleflightModel(inner, Tracer())
+
+    def call(_):
+        with pytest.raises(ConnectionError):
+            model.invoke("x")
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(call, range(4)))
+
+    assert model.stats().in_flight == 0
+
+
+def test_stream_is_fanned_out():
+    inner = Slow(delay=0.15)
+    model = SingleflightModel(inner, Tracer())
+    results = []
+
+    def read(delay):
+        time.sleep(delay)
+        results.append(list(model.stream("x")))
+
+    threads = [threading.Thread(target=read, args=(d,)) for d in (0, 0.01, 0.08)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # The late reader replays the chunks it missed.
+    assert results == [["a", "b", "c"]] * 3
+    assert inner.calls == 1
+
+
+def test_stream_survives_the_first_reader_leaving():
+    inner = Slow(delay=0.15)
+    model = SingleflightModel(inner, Tracer())
+    first = model.stream("x")
+    assert next(first) == "a"
+    second = model.stream("x")
+    assert next(second) == "a"
+
+    first.close()
+
+    assert list(second) == ["b", "c"]
+    assert inner.calls == 1
+    assert list(model.stream("x")) == ["a", "b", "c"]
+    assert inner.calls == 2
+
+
+def test_async_calls_are_coalesced():
+    inner = Slow()
+    model = SingleflightModel(inner, Tracer())
+
+    async def run():
+        results = await asyncio.gather(*(model.ainvoke("x") for _ in range(5)))
+
+        async def read():
+            return [chunk async for chunk in model.astream("x")]
+
+        streams = await asyncio.gather(*(read() for _ in range(3)))
+        return results, streams
+
+    results, streams = asyncio.run(run())
+
+    assert results == ["answer to x"] * 5
+    assert streams == [["a", "b", "c"]] * 3
+    assert inner.calls == 2
+    assert model.stats().coalesced == 6
+
+
+def test_cancelling_the_leader_does_not_cancel_followers():
+    inner = Slow(delay=0.1)
+    model = SingleflightModel(inner, Tracer())
+
+    async def run():
+        leader = asyncio.create_task(model.ainvoke("x"))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(model.ainvoke("x"))
+        await asyncio.sleep(0.02)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(run()) == "answer to x"
+    assert inner.calls == 1
+    assert model.stats().in_flight == 0
@@ -0,0 +1,16 @@
+import math
+
+from evocore.model.stats import flatten, percentile
+
+
+def test_percentile():
+    assert percentile([1, 2, 3, 4, 5], 50) == 3
+    assert percentile([1, 2], 50) == 1.5
+    assert percentile([7], 99) == 7
+    assert math.isnan(percentile([], 50))
+
+
+def test_flatten_keeps_numbers_by_dotted_path():
+    data = {"a": {"b": 1, "c": {"d": 2.5}}, "e": True, "f": "text", "g": 3}
+
+    assert flatten(data) == {"a.b": 1.0, "a.c.d": 2.5, "g": 3.0}
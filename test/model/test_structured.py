@@ -0,0 +1,129 @@
+import json
+from typing import List
+
+import pydantic
+import pytest
+from langchain_core.messages import AIMessage
+
+from evocore.model.mock_ollama import MockOllamaServer
+from evocore.model.model_manager import BaseModel, ModelManager
+from evocore.model.structured import (
+    StructuredOutput,
+    StructuredOutputError,
+    repair_json,
+)
+from evocore.model.tracing import MetricsExporter, Tracer
+
+
+class Plan(pydantic.BaseModel):
+    name: str
+    steps: List[str]
+    done: bool = False
+
+
+VALID = {"name": "p", "steps": ["a", "b"], "done": True}
+
+
+class Scripted(BaseModel):
+    def __init__(self, *responses, supports_format=False) -> None:
+        super().__init__()
+        self.responses = list(responses)
+        self.prompts = []
+        self.kwargs = []
+        self.supports_format = supports_format
+
+    def invoke(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        self.kwargs.append(kwargs)
+        return AIMessage(
+            content=self.responses.pop(0),
+            usage_metadata={"input_tokens": 1, "output_tokens": 50, "total_tokens": 51},
+        )
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '```json\n{"name": "p", "steps": ["a", "b"], "done": true}\n```',
+        'Sure! {"name": "p", "steps": ["a", "b"], "done": true} Hope that helps.',
+        '{"name": "p", "steps": ["a", "b",], "done": true,}',
+        '{"name": "p", "steps": ["a", "b"], "done": True}',
+        '{"name": "p", "done": true, "steps": ["a", "b"',
+    ],
+)
+def test_repair_json(text):
+    assert json.loads(repair_json(text)) == VALID
+
+
+def test_repair_json_closes_truncated_strings():
+    assert json.loads(repair_json('{"name": "p", "steps": ["a", "unfinish')) == {
+        "name": "p",
+        "steps": ["a", "unfinish"],
+    }
+
+
+def test_repair_json_leaves_strings_alone():
+    text = '{"name": "returns None if empty, True \\"or\\" ,]", "done": True,}'
+
+    assert json.loads(repair_json(text)) == {
+        "name": 'returns None if empty, True "or" ,]',
+        "done": True,
+    }
+
+
+def test_valid_output_needs_no_reask():
+    output = StructuredOutput(Plan, tracer=Tracer())
+    model = Scripted(json.dumps(VALID))
+
+    assert output.invoke(model, "make a plan") == Plan(**VALID)
+    assert output.stats().parse_failures == 0
+    assert model.kwargs == [{}]
+
+
+def test_schema_is_passed_as_format_when_supported():
+    output = StructuredOutput(Plan, tracer=Tracer())
+    model = Scripted(json.dumps(VALID), supports_format=True)
+
+    output.invoke(model, "make a plan")
+
+    assert model.kwargs[0]["format"] == Plan.model_json_schema()
+
+
+def test_reask_sends_only_the_error():
+    metrics = MetricsExporter()
+    output = StructuredOutput(Plan, tracer=Tracer([metrics]))
+    long_prompt = "x" * 10_000
+    model = Scripted('{"name": "p"}', json.dumps(VALID))
+
+    assert output.invoke(model, long_prompt).steps == ["a", "b"]
+
+    reask = model.prompts[1].to_string()
+    assert "x" * 100 not in reask
+    assert '{"name": "p"}' in reask
+    assert "steps" in reask and "Field required" in reask
+    stats = output.stats()
+    assert (stats.parse_failures, stats.reasks, stats.wasted_tokens) == (1, 1, 50)
+    text = metrics.render()
+    assert 'evocore_structured_parse_failures_total{schema="Plan"} 1' in text
+    assert 'evocore_structured_wasted_tokens_total{schema="Plan"} 50' in text
+
+
+def test_gives_up_after_max_reasks():
+    output = StructuredOutput(Plan, max_reasks=1, tracer=Tracer())
+    model = Scripted("nope", "still nope")
+
+    with pytest.raises(StructuredOutputError) as info:
+        output.invoke(model, "make a plan")
+
+    assert info.value.output == "still nope"
+    stats = output.stats()
+    assert (stats.calls, stats.parse_failures, stats.reasks, stats.failures) == (1, 2, 1, 1)
+
+
+def test_ollama_model_sends_schema_format():
+    with MockOllamaServer(responses=json.dumps(VALID)) as server:
+        model = ModelManager.get_model("gpt-local", {"base_url": server.url}, pooled=False)
+        result = StructuredOutput(Plan, tracer=Tracer()).invoke(model, "make a plan")
+
+    assert result == Plan(**VALID)
+    assert server.requests[-1]["format"] == Plan.model_json_schema()
@@ -0,0 +1,203 @@
+import asyncio
+import contextvars
+import json
+import urllib.request
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from evocore.model.model_manager import BaseModel
+from evocore.model.tracing import (
+    JsonlExporter,
+    MetricsExporter,
+    Span,
+    TracedModel,
+    Tracer,
+    current_span,
+)
+
+
+class Collector:
+    def __init__(self) -> None:
+        self.spans = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+
+class UsageModel(BaseModel):
+    name = None
+
+    def invoke(self, prompt):
+        return AIMessage(
+            content="hi there",
+            usage_metadata={"input_tokens": 7, "output_tokens": 2, "total_tokens": 9},
+        )
+
+    def stream(self, prompt):
+        yield AIMessageChunk(content="")
+        yield AIMessageChunk(content="hi")
+        yield AIMessageChunk(
+            content=" there",
+            usage_metadata={"input_tokens": 7, "output_tokens": 2, "total_tokens": 9},
+        )
+
+
+@pytest.fixture
+def collector():
+    return Collector()
+
+
+def test_spans_nest_and_record_errors(collector):
+    tracer = Tracer([collector])
+
+    with tracer.span("outer", kind="run") as outer:
+        assert current_span() is outer
+        with pytest.raises(ValueError):
+            with tracer.span("inner", path="a.py"):
+                raise ValueError("boom")
+    assert current_span() is None
+
+    inner, outer = collector.spans
+    assert inner.parent_id == outer.span_id
+    assert inner.trace_id == outer.trace_id
+    assert outer.parent_id is None
+    assert inner.status == "error" and inner.error == "ValueError: boom"
+    assert inner.attributes == {"path": "a.py"}
+    assert outer.status == "ok"
+    assert outer.end >= outer.start and outer.duration >= inner.duration
+
+
+def test_spans_propagate_into_tasks(collector):
+    tracer = Tracer([collector])
+
+    async def child(i):
+        with tracer.span(f"child{i}"):
+            await asyncio.sleep(0)
+
+    async def main():
+        with tracer.span("root"):
+            await asyncio.gather(child(0), child(1))
+
+    asyncio.run(main())
+    root = collector.spans[-1]
+    assert {s.parent_id for s in collector.spans[:-1]} == {root.span_id}
+
+
+def test_attempts_count_until_success():
+    tracer = Tracer()
+    assert tracer.attempt("task") == 1
+    assert tracer.attempt("task") == 2
+    tracer.succeeded("task")
+    assert tracer.attempt("task") == 1
+
+
+def test_traced_model_records_usage(collector):
+    model = TracedModel(UsageModel(), Tracer([collector]))
+
+    assert model.invoke("x").content == "hi there"
+    (span,) = collector.spans
+    assert span.kind == "model" and span.name == "invoke"
+    assert span.attributes == {"model": "UsageModel", "prompt_tokens": 7, "completion_tokens": 2}
+
+
+def test_traced_model_stream_records_ttft(collector):
+    model = TracedModel(UsageModel(), Tracer([collector]))
+
+    assert "".join(c.content for c in model.stream("x")) == "hi there"
+    (span,) = collector.spans
+    assert span.name == "stream"
+    assert span.attributes["completion_tokens"] == 2
+    assert 0 <= span.attributes["ttft"] <= span.duration
+
+
+def test_stream_span_is_not_current_in_the_consumer(collector):
+    tracer = Tracer([collector])
+
+    class Nested(UsageModel):
+        def stream(self, prompt):
+            with tracer.span("backend"):
+                pass
+            yield from super().stream(prompt)
+
+    model = TracedModel(Nested(), tracer)
+    with tracer.span("node") as node:
+        for chunk in model.stream("x"):
+            assert current_span() is node
+            with tracer.span("consumer"):
+                pass
+
+    spans = {s.name: s for s in collector.spans}
+    assert spans["consumer"].parent_id == node.span_id
+    assert spans["stream"].parent_id == node.span_id
+    assert spans["backend"].parent_id == spans["stream"].span_id
+
+
+def test_stream_closed_in_another_context(collector):
+    model = TracedModel(UsageModel(), Tracer([collector]))
+    stream = model.stream("x")
+    next(stream)
+
+    contextvars.copy_context().run(stream.close)
+
+    (span,) = collector.spans
+    assert span.status == "error" and span.error.startswith("GeneratorExit")
+
+
+def test_traced_model_async(collector):
+    model = TracedModel(UsageModel(), Tracer([collector]))
+
+    async def run():
+        await model.ainvoke("x")
+        return [c.content async for c in model.astream("x")]
+
+    assert "".join(asyncio.run(run())) == "hi there"
+    assert [s.name for s in collector.spans] == ["invoke", "stream"]
+    assert all(s.attributes["prompt_tokens"] == 7 for s in collector.spans)
+
+
+def test_jsonl_exporter(tmp_path):
+    exporter = JsonlExporter(tmp_path / "trace" / "spans.jsonl")
+    tracer = Tracer([exporter])
+    with tracer.span("a", kind="node", attempt=1):
+        pass
+    with tracer.span("b"):
+        pass
+    exporter.close()
+
+    lines = [json.loads(l) for l in (tmp_path / "trace" / "spans.jsonl").read_text().splitlines()]
+    assert [l["name"] for l in lines] == ["a", "b"]
+    assert lines[0]["kind"] == "node" and lines[0]["attributes"] == {"attempt": 1}
+
+
+def test_metrics_exporter(tmp_path):
+    metrics = MetricsExporter()
+    tracer = Tracer([metrics])
+    model = TracedModel(UsageModel(), tracer)
+    model.invoke("x")
+    list(model.stream("x"))
+    with tracer.span("file_coder", kind="node") as span:
+        span.set(retries=2)
+
+    text = metrics.render()
+    assert 'evocore_model_prompt_tokens_total{model="UsageModel"} 14' in text
+    assert 'evocore_model_completion_tokens_total{model="UsageModel"} 4' in text
+    assert 'evocore_retries_total{name="file_coder"} 2' in text
+    assert 'evocore_model_ttft_seconds_count{model="UsageModel"} 1' in text
+    assert (
+        'evocore_span_duration_seconds_count{name="invoke",kind="model",status="ok"} 1'
+        in text
+    )
+    assert 'le="+Inf"' in text
+
+    metrics.write(tmp_path / "metrics.prom")
+    assert (tmp_path / "metrics.prom").read_text() == text
+
+    server = metrics.serve(port=0)
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            assert response.read().decode() == text
+    finally:
+        server.shutdown()
+        server.server_close()
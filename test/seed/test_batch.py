@@ -0,0 +1,133 @@
+import json
+import threading
+import time
+
+import pytest
+
+from evocore.seed.v1 import batch, main
+from test.seed.test_main import ARCHITECTURE, ScriptedModel, file_code
+
+
+@pytest.fixture
+def coder(monkeypatch):
+    coder = ScriptedModel(file_code, delay=0.05)
+    monkeypatch.setattr(main, "llm_arch", ScriptedModel(json.dumps(ARCHITECTURE)))
+    monkeypatch.setattr(main, "llm_code", coder)
+    return coder
+
+
+def write_jobs(path, count):
+    lines = [json.dumps({"id": f"job-{i}", "description": f"project {i}"}) for i in range(count)]
+    path.write_text("\n".join(lines) + "\n")
+
+
+def records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_read_jobs_accepts_several_shapes(tmp_path):
+    path = tmp_path / "jobs.jsonl"
+    path.write_text(
+        '{"id": 7, "description": "a"}\n'
+        "\n"
+        '"just a description"\n'
+        '{"request_id": "r-1", "title": "T", "body": "b"}\n'
+    )
+
+    assert list(batch.read_jobs(path)) == [
+        ("7", "a"),
+        ("3", "just a description"),
+        ("r-1", "T\n\nb"),
+    ]
+
+
+def test_invalid_lines_are_recorded_as_failed_jobs(coder, tmp_path):
+    jobs, output = tmp_path / "jobs.jsonl", tmp_path / "results.jsonl"
+    jobs.write_text(
+        json.dumps({"id": "job-0", "description": "project 0"}) + "\n"
+        + '{"id": "job-1", "descr\n'
+        + json.dumps({"id": "job-2"}) + "\n"
+        + json.dumps({"id": "job-3", "description": "project 3"}) + "\n"
+    )
+    with pytest.raises(ValueError, match="line 2"):
+        list(batch.read_jobs(jobs))
+
+    progress = batch.run_batch(jobs, output, workers=2)
+
+    assert (progress.total, progress.done, progress.failed) == (4, 2, 2)
+    failed = {r["id"]: r["error"] for r in records(output) if r["status"] == "error"}
+    assert failed["2"].startswith("line 2: invalid JSON")
+    assert failed["3"] == "line 3: no description"
+    assert batch.finished_ids(output) == {"job-0", "job-3"}
+
+
+def test_batch_runs_jobs_in_parallel(coder, tmp_path):
+    jobs, output = tmp_path / "jobs.jsonl", tmp_path / "results.jsonl"
+    write_jobs(jobs, 6)
+    reports = []
+
+    start = time.perf_counter()
+    progress = batch.run_batch(jobs, output, workers=6, on_progress=reports.append)
+    elapsed = time.perf_counter() - start
+
+    assert (progress.done, progress.failed, progress.skipped) == (6, 0, 0)
+    assert sorted(r["id"] for r in records(output)) == [f"job-{i}" for i in range(6)]
+    assert all(r["files"] == ["app.py", "util.py"] for r in records(output))
+    # Twelve 50ms coder calls, two per job, spread over six workers.
+    assert elapsed < 0.4
+    assert "6/6" in progress.line()
+
+
+def test_batch_resumes_after_a_crash(coder, tmp_path):
+    jobs, output = tmp_path / "jobs.jsonl", tmp_path / "results.jsonl"
+    write_jobs(jobs, 4)
+    output.write_text(
+        json.dumps({"id": "job-0", "status": "ok"}) + "\n"
+        + json.dumps({"id": "job-1", "status": "error", "error": "boom"}) + "\n"
+        + '{"id": "job-2", "sta'
+    )
+
+    progress = batch.run_batch(jobs, output, workers=2)
+
+    assert (progress.done, progress.skipped) == (3, 1)
+    assert coder.calls == 6
+    assert batch.finished_ids(output) == {"job-0", "job-1", "job-2", "job-3"}
+
+
+def test_batch_records_failures(monkeypatch, tmp_path):
+    lock = threading.Lock()
+    calls = []
+
+    def architect(prompt):
+        with lock:
+            calls.append(prompt)
+        if "project 1" in prompt:
+            raise RuntimeError("model crashed")
+        return json.dumps(ARCHITECTURE)
+
+    monkeypatch.setattr(main, "llm_arch", ScriptedModel(architect))
+    monkeypatch.setattr(main, "llm_code", ScriptedModel(file_code))
+    jobs, output = tmp_path / "jobs.jsonl", tmp_path / "results.jsonl"
+    write_jobs(jobs, 3)
+
+    progress = batch.run_batch(jobs, output, workers=2, output_dir=tmp_path / "out")
+
+    assert (progress.done, progress.failed) == (2, 1)
+    (failed,) = [r for r in records(output) if r["status"] == "error"]
+    assert failed == {"id": "job-1", "status": "error", "error": "RuntimeError: model crashed"}
+    assert (tmp_path / "out" / "job-2" / "util.py").read_text() == "# util.py\n"
+    assert batch.main([str(jobs), "--output", str(output), "--workers", "1"]) == 1
+
+
+def test_unsafe_ids_do_not_escape_the_output_dir(coder, tmp_path):
+    jobs, output = tmp_path / "jobs.jsonl", tmp_path / "results.jsonl"
+    ids = ["../../escaped", str(tmp_path / "absolute"), "ok"]
+    jobs.write_text("".join(json.dumps({"id": i, "description": "demo"}) + "\n" for i in ids))
+
+    progress = batch.run_batch(jobs, output, workers=2, output_dir=tmp_path / "out" / "nested")
+
+    assert (progress.done, progress.failed) == (1, 2)
+    failed = {r["id"] for r in records(output) if r["status"] == "error"}
+    assert failed == set(ids[:2])
+    assert not (tmp_path / "escaped").exists() and not (tmp_path / "absolute").exists()
+    assert (tmp_path / "out" / "nested" / "ok" / "app.py").exists()
@@ -0,0 +1,96 @@
+import copy
+import json
+
+import pytest
+
+from evocore.model import hosts
+from evocore.model.mock_ollama import MockOllamaServer
+from evocore.seed.v1 import bench
+from evocore.seed.v1 import main as seed
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    entries = {entry["id"]: entry for entry in bench.load_corpus()}
+    return [entries["cli-todo"], entries["static-site"]]
+
+
+@pytest.fixture(scope="module")
+def result(corpus):
+    return bench.run(corpus, ttft=0, token_latency=0)
+
+
+def test_mock_run_records_latency_tokens_and_quality(corpus, result):
+    assert result["version"] == bench.RESULT_VERSION
+    assert result["meta"]["backend"] == "mock" and result["meta"]["corpus_size"] == 2
+    todo, site = result["runs"]["cli-todo"], result["runs"]["static-site"]
+    assert todo["ok"] and site["ok"]
+    assert (todo["files"], todo["generated"], todo["repaired"]) == (5, 5, 0)
+    # The shipped graph; pipelined, it codes todo/cli.py again once its
+    # dependency todo/store.py is planned.
+    assert result["meta"]["graph"]["pipelined"] is seed.PIPELINED
+    assert todo["nodes"]["file_coder"]["count"] == (6 if seed.PIPELINED else 5)
+    # config.json and render.py are broken on the first attempt.
+    assert (site["repaired"], site["repair_rounds"], site["invalid"]) == (2, 1, [])
+    assert todo["prompt_tokens"] > 0 and todo["completion_tokens"] > 0
+
+    summary = result["summary"]
+    assert (summary["runs"], summary["failed"], summary["files"]) == (2, 0, 9)
+    assert summary["validation_pass_rate"] == 1.0
+    assert summary["first_pass_rate"] == pytest.approx(7 / 9)
+    assert set(summary["nodes"]) == {"architect", "file_coder", "validate", "repair", "assemble"}
+    assert bench.compare(result, result) == []
+
+
+def test_backend_is_restored(result):
+    assert seed.llm_code.name == "qwen_code_local" and seed.file_store is None
+
+
+def test_replay_reproduces_a_recorded_run(corpus, tmp_path, monkeypatch):
+    monkeypatch.setattr(hosts, "_pools", {})
+    record = str(tmp_path / "responses.sqlite")
+    with MockOllamaServer(responses=bench.ScriptedBackend(corpus)) as server:
+        monkeypatch.setenv("EVOCORE_OLLAMA_HOSTS", server.url)
+        live = bench.run(corpus[:1], backend="live", record=record)
+    monkeypatch.delenv("EVOCORE_OLLAMA_HOSTS")
+
+    replayed = bench.run(corpus, backend="replay", record=record)
+
+    before, after = live["runs"]["cli-todo"], replayed["runs"]["cli-todo"]
+    assert after["ok"] and after["files"] == before["files"] == 5
+    assert after["completion_tokens"] == before["completion_tokens"]
+    unrecorded = replayed["runs"]["static-site"]
+    assert not unrecorded["ok"] and "no recorded response" in unrecorded["error"]
+    assert replayed["summary"]["failed"] == 1
+
+
+def test_compare_flags_latency_and_quality_regressions(result):
+    slower = copy.deepcopy(result)
+    slower["summary"]["latency_p50"] = result["summary"]["latency_p50"] * 2 + 1
+    slower["summary"]["nodes"]["file_coder"]["seconds_p95"] += 1
+    slower["summary"]["validation_pass_rate"] = 0.5
+    slower["runs"]["static-site"]["invalid"] = ["render.py"]
+
+    regressions = bench.compare(result, slower)
+
+    assert [line.split(":")[0] for line in regressions] == [
+        "latency latency_p50",
+        "latency nodes.file_coder.seconds_p95",
+        "quality validation_pass_rate",
+        "quality run static-site invalid files",
+    ]
+    assert "REGRESSION latency latency_p50" in bench.report(result, slower)
+    with pytest.raises(ValueError):
+        bench.compare(result, dict(slower, version=bench.RESULT_VERSION + 1))
+
+
+def test_cli_compare_exit_status(result, tmp_path, capsys):
+    old, new = tmp_path / "old.json", tmp_path / "new.json"
+    old.write_text(json.dumps(result))
+    worse = copy.deepcopy(result)
+    worse["summary"]["failed"] = 1
+    new.write_text(json.dumps(worse))
+
+    assert bench.main(["--compare", str(old), str(old)]) == 0
+    assert bench.main(["--compare", str(old), str(new)]) == 1
+    assert "REGRESSION quality failed: 0 -> 1" in capsys.readouterr().out
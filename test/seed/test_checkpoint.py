@@ -0,0 +1,71 @@
+from langgraph.checkpoint.base import empty_checkpoint
+
+from evocore.seed.v1.checkpoint import GeneratedFileStore, SqliteSaver, spec_hash
+from evocore.seed.v1.main import ArchitectureSpec, FileSpec
+
+
+def architecture(**changes):
+    files = [
+        FileSpec(path="app.py", description="entrypoint", responsibilities="serve"),
+        FileSpec(path="util.py", description="helpers", responsibilities="help"),
+    ]
+    fields = dict(
+        project_name="demo",
+        project_type="service",
+        tech_stack={"language": "python"},
+        global_requirements=[],
+        files=files,
+    )
+    return ArchitectureSpec(**{**fields, **changes})
+
+
+def put(saver, thread_id, values, parent=None):
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = values
+    checkpoint["channel_versions"] = {k: 1 for k in values}
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    if parent:
+        config["configurable"]["checkpoint_id"] = parent
+    return saver.put(config, checkpoint, {"step": 0}, checkpoint["channel_versions"])
+
+
+def test_saver_round_trip(tmp_path):
+    saver = SqliteSaver(tmp_path / "state.sqlite")
+    first = put(saver, "t", {"description": "demo"})
+    second = put(saver, "t", {"architecture": architecture()}, first["configurable"]["checkpoint_id"])
+    saver.put_writes(second, [("files", [{"path": "app.py", "code": "x"}])], "task-1")
+    saver.close()
+
+    saver = SqliteSaver(tmp_path / "state.sqlite")
+    latest = saver.get_tuple({"configurable": {"thread_id": "t"}})
+
+    assert latest.config == second
+    assert latest.parent_config == first
+    assert latest.checkpoint["channel_values"]["architecture"] == architecture()
+    assert latest.pending_writes == [("task-1", "files", [{"path": "app.py", "code": "x"}])]
+    assert [c.config for c in saver.list({"configurable": {"thread_id": "t"}})] == [second, first]
+    assert len(list(saver.list(None, limit=1))) == 1
+
+    saver.delete_thread("t")
+    assert saver.get_tuple({"configurable": {"thread_id": "t"}}) is None
+
+
+def test_spec_hash_only_covers_its_own_file():
+    base = architecture()
+    app, util = base.files
+    edited = architecture(files=[app, util.model_copy(update={"description": "more helpers"})])
+
+    assert spec_hash(base, app) == spec_hash(edited, edited.files[0])
+    assert spec_hash(base, util) != spec_hash(edited, edited.files[1])
+    assert spec_hash(base, app) != spec_hash(architecture(project_name="other"), app)
+    assert spec_hash(base, app, "coder-a") != spec_hash(base, app, "coder-b")
+
+
+def test_file_store(tmp_path):
+    store = GeneratedFileStore(tmp_path / "state.sqlite")
+    store.put("k", "app.py", "print()\n")
+
+    assert store.get("k") == "print()\n"
+    assert store.get("missing") is None
+    store.clear()
+    assert store.get("k") is None
@@ -0,0 +1,73 @@
+import pytest
+
+from evocore.model.tracing import MetricsExporter, Tracer
+from evocore.seed.v1.context import ContextBuilder, dependencies
+from evocore.seed.v1.main import ArchitectureSpec, FileSpec
+
+
+def spec(*files):
+    return ArchitectureSpec(
+        project_name="demo",
+        project_type="service",
+        tech_stack={"language": "python"},
+        global_requirements=["keep it small"],
+        files=list(files),
+    )
+
+
+API = FileSpec(
+    path="app/api.py",
+    description="HTTP routes",
+    responsibilities="Validate requests with app.models and store them via db.py",
+)
+MODELS = FileSpec(path="app/models.py", description="Request models", responsibilities="x" * 40)
+DB = FileSpec(path="db.py", description="Database access", responsibilities="y" * 40)
+README = FileSpec(path="README.md", description="Usage notes", responsibilities="z" * 4000)
+
+
+def test_dependencies_are_declared_or_mentioned():
+    architecture = spec(API, MODELS, DB, README)
+    declared = README.model_copy(update={"dependencies": ["db.py"], "responsibilities": ""})
+
+    assert [f.path for f in dependencies(architecture, API)] == ["app/models.py", "db.py"]
+    assert [f.path for f in dependencies(architecture, declared)] == ["db.py"]
+    assert dependencies(architecture, MODELS) == []
+
+
+def test_context_holds_only_what_the_file_needs():
+    metrics = MetricsExporter()
+    builder = ContextBuilder(tracer=Tracer([metrics]))
+
+    context = builder.build(spec(API, MODELS, DB, README), API)
+
+    text = "\n\n".join(context.static + context.dynamic)
+    assert context.dependencies == ["app/models.py", "db.py"]
+    assert '"global_requirements":["keep it small"]' in text
+    assert "Project files:\napp/api.py\napp/models.py\ndb.py\nREADME.md" in text
+    assert "Usage notes" not in text and "x" * 40 in text
+    assert context.dynamic[-1].startswith('File to generate:\n{"path":"app/api.py"')
+    stats = builder.stats()
+    assert stats.calls == 1 and stats.saved_tokens > 1000
+    assert stats.saved_tokens == context.full_tokens - context.tokens
+    text = metrics.render()
+    assert f"evocore_context_saved_tokens_total {stats.saved_tokens}" in text
+
+
+def test_budget_drops_detail_before_the_file_itself():
+    architecture = spec(API, MODELS, DB, README)
+    full = ContextBuilder(budget=10_000).build(architecture, API)
+
+    tight = ContextBuilder(budget=full.tokens - 1).build(architecture, API)
+    assert "Project files" not in "".join(tight.static)
+    assert "x" * 40 in tight.dynamic[0]
+
+    builder = ContextBuilder(budget=1)
+    smallest = builder.build(architecture, API)
+    assert smallest.dynamic[0] == 'Depends on:\n{"path":"app/models.py"}\n{"path":"db.py"}'
+    assert "Validate requests" in smallest.dynamic[-1]
+    assert builder.stats().over_budget == 1
+
+
+def test_budget_must_be_positive():
+    with pytest.raises(ValueError):
+        ContextBuilder(budget=0)
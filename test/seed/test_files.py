@@ -0,0 +1,86 @@
+from evocore.seed.v1.files import FileBlockWriter, safe_target, write_atomic
+
+OUTPUT = """Here is the project.
+
+FILE: app/main.py
+```python
+from app import util
+
+print(util.greet())
+```
+
+FILE: app/util.py
+def greet():
+    return "hi"
+
+FILE: README.md
+# Demo
+"""
+
+
+def feed_all(writer, text, size):
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(writer.feed(text[i : i + size]))
+    events.extend(writer.close())
+    return events
+
+
+def test_splits_blocks_and_strips_fences(tmp_path):
+    events = feed_all(FileBlockWriter(tmp_path), OUTPUT, 7)
+
+    assert [e.path for e in events] == ["app/main.py", "app/util.py", "README.md"]
+    assert (tmp_path / "app/main.py").read_text() == (
+        "from app import util\n\nprint(util.greet())\n"
+    )
+    assert (tmp_path / "app/util.py").read_text() == 'def greet():\n    return "hi"\n'
+    assert (tmp_path / "README.md").read_text() == "# Demo\n"
+    assert events[0].size == len("from app import util\n\nprint(util.greet())\n")
+
+
+def test_chunking_does_not_change_output(tmp_path):
+    for size in (1, 3, 64, len(OUTPUT)):
+        out = tmp_path / str(size)
+        feed_all(FileBlockWriter(out), OUTPUT, size)
+        assert (out / "app/main.py").read_text().startswith("from app import util")
+
+
+def test_files_are_written_when_their_block_closes(tmp_path):
+    writer = FileBlockWriter(tmp_path)
+
+    assert writer.feed("FILE: a.py\nx = 1\n") == []
+    assert not (tmp_path / "a.py").exists()
+    events = writer.feed("FILE: b.py\n")
+
+    assert [e.path for e in events] == ["a.py"]
+    assert (tmp_path / "a.py").read_text() == "x = 1\n"
+    writer.close()
+    assert [p.name for p in tmp_path.iterdir() if p.name.endswith(".tmp")] == []
+
+
+def test_rejects_paths_outside_output_dir(tmp_path):
+    out = tmp_path / "out"
+    writer = FileBlockWriter(out)
+
+    events = feed_all(writer, "FILE: ../evil.py\nx\nFILE: /etc/passwd\ny\nFILE: ok.py\nz\n", 5)
+
+    assert [e.path for e in events] == ["ok.py"]
+    assert writer.rejected == ["../evil.py", "/etc/passwd"]
+    assert not (tmp_path / "evil.py").exists()
+
+
+def test_abort_discards_partial_block(tmp_path):
+    writer = FileBlockWriter(tmp_path)
+    writer.feed("FILE: a.py\nx = 1\n")
+
+    writer.abort()
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_safe_target_and_write_atomic(tmp_path):
+    assert safe_target(tmp_path, "a/../../b") is None
+    target = safe_target(tmp_path, "a/b.txt")
+
+    assert write_atomic(target, "data") == 4
+    assert target.read_text() == "data"
@@ -0,0 +1,635 @@
+import json
+import re
+import threading
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langgraph.types import RetryPolicy
+
+from evocore.model.cache import CachedModel, ResponseCache
+from evocore.model.model_manager import BaseModel
+from evocore.model.structured import StructuredOutput
+from evocore.model.tracing import TracedModel, Tracer
+from evocore.seed.v1 import main
+from evocore.seed.v1.checkpoint import GeneratedFileStore, SqliteSaver
+
+
+ARCHITECTURE = {
+    "project_name": "demo",
+    "project_type": "service",
+    "tech_stack": {"language": "python"},
+    "global_requirements": ["keep it small"],
+    "files": [
+        {"path": "app.py", "description": "entrypoint", "responsibilities": "serve"},
+        {"path": "util.py", "description": "helpers", "responsibilities": "help"},
+    ],
+}
+
+CODE = "FILE: app.py\nprint('hello world')\n"
+
+
+class ScriptedModel(BaseModel):
+    def __init__(self, response, delay: float = 0) -> None:
+        super().__init__()
+        self.response = response
+        self.delay = delay
+        self.calls = 0
+
+    def _respond(self, prompt) -> str:
+        self.calls += 1
+        time.sleep(self.delay)
+        if callable(self.response):
+            return self.response(prompt.to_string())
+        return self.response
+
+    def invoke(self, prompt):
+        return AIMessage(content=self._respond(prompt))
+
+    def stream(self, prompt):
+        response = self._respond(prompt)
+        for i in range(0, len(response), 4):
+            yield AIMessageChunk(content=response[i : i + 4])
+
+
+class Collector:
+    def __init__(self, spans) -> None:
+        self.spans = spans
+
+    def export(self, span) -> None:
+        self.spans.append(span)
+
+
+def file_code(prompt: str) -> str:
+    path = re.search(r'File to generate:\s*\{"path":\s*"([^"]+)"', prompt).group(1)
+    return f"```python\n# {path}\n```"
+
+
+@pytest.fixture
+def fake_llms(monkeypatch):
+    monkeypatch.setattr(main, "llm_arch", ScriptedModel(json.dumps(ARCHITECTURE)))
+    monkeypatch.setattr(main, "llm_code", ScriptedModel(CODE))
+
+
+@pytest.fixture
+def fake_file_llms(monkeypatch):
+    monkeypatch.setattr(main, "llm_arch", ScriptedModel(json.dumps(ARCHITECTURE)))
+    monkeypatch.setattr(main, "llm_code", ScriptedModel(file_code))
+
+
+def test_single_call_graph_invoke(fake_llms):
+    result = main.build_graph(per_file=False).invoke({"description": "demo"})
+
+    assert result["architecture"].project_name == "demo"
+    assert result["code"] == CODE
+
+
+def test_single_call_graph_streams_coder_tokens(fake_llms):
+    tokens = []
+    updates = []
+    for mode, event in main.build_graph(per_file=False).stream(
+        {"description": "demo"}, stream_mode=["updates", "custom"]
+    ):
+        if mode == "custom":
+            tokens.append(event["token"])
+        else:
+            updates.append(event)
+
+    assert len(tokens) > 1
+    assert "".join(tokens) == CODE
+    assert updates[-1]["coder"]["code"] == CODE
+
+
+def test_per_file_graph_assembles_in_spec_order(fake_file_llms):
+    result = main.graph.invoke({"description": "demo"})
+
+    assert result["code"] == "FILE: app.py\n# app.py\n\nFILE: util.py\n# util.py\n"
+    assert main.llm_code.calls == 2
+
+
+def test_per_file_graph_streams_tokens_per_path(fake_file_llms):
+    tokens = {}
+    for mode, event in main.graph.stream({"description": "demo"}, stream_mode=["custom"]):
+        if "token" in event:
+            tokens.setdefault(event["path"], []).append(event["token"])
+
+    assert set(tokens) == {"app.py", "util.py"}
+    assert "".join(tokens["util.py"]) == file_code('File to generate: {"path": "util.py"')
+
+
+def test_per_file_prompts_share_a_stable_prefix(monkeypatch):
+    prompts = []
+
+    def record(prompt):
+        prompts.append(prompt)
+        return file_code(prompt)
+
+    monkeypatch.setattr(main, "llm_arch", ScriptedModel(json.dumps(ARCHITECTURE)))
+    monkeypatch.setattr(main, "llm_code", ScriptedModel(record))
+    main.build_graph(per_file=True).invoke({"description": "demo"})
+
+    first, second = sorted(prompts)
+    prefix = first[: first.index("File to generate:")]
+    assert second.startswith(prefix)
+    assert "Project files:\napp.py\nutil.py" in prefix
+
+
+def test_per_file_graph_runs_files_concurrently(monkeypatch):
+    architecture = dict(
+        ARCHITECTURE,
+        files=[
+            {"path": f"f{i}.py", "description": "", "responsibilities": ""}
+            for i in range(8)
+        ],
+    )
+    monkeypatch.setattr(main, "llm_arch", ScriptedModel(json.dumps(architecture)))
+    monkeypatch.setattr(main, "llm_code", ScriptedModel(file_code, delay=0.1))
+
+    start = time.perf_counter()
+    result = main.build_graph(max_concurrency=8).invoke({"description": "demo"})
+    elapsed = time.perf_counter() - start
+
+    assert result["code"].count("FILE: ") == 8
+    assert elapsed < 0.5
+
+
+def test_per_file_graph_without_files(monkeypatch):
+    monkeypatch.setattr(main, "llm_arch", ScriptedModel(json.dumps(dict(ARCHITECTURE, files=[]))))
+    monkeypatch.setattr(main, "llm_code", ScriptedModel(file_code))
+
+    assert main.graph.invoke({"description": "demo"})["code"] == ""
+
+
+def test_graph_replays_from_response_cache(monkeypatch, tmp_path):
+    cache = ResponseCache(tmp_path / "responses.sqlite")
+    architect = ScriptedModel(json.dumps(ARCHITECTURE))
+    coder = ScriptedModel(file_code)
+    monkeypatch.setattr(main, "llm_arch", CachedModel(architect, cache))
+    monkeypatch.setattr(main, "llm_code", CachedModel(coder, cache))
+
+    first = main.graph.invoke({"description": "demo"})
+    second = main.graph.invoke({"description": "demo"})
+
+    assert first["code"] == second["code"]
+    assert (architect.calls, coder.calls) == (1, 2)
+
+
+def test_single_call_graph_writes_files_as_they_close(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "llm_arch", ScriptedModel(json.dumps(ARCHITECTURE)))
+    monkeypatch.setattr(main, "llm_code", ScriptedModel(CODE + "FILE: util.py\nx = 1\n"))
+
+    written = []
+    final = {}
+    for mode, event in main.build_graph(per_file=False).stream(
+        {"description": "demo", "output_dir": str(tmp_path)},
+        stream_mode=["custom", "updates"],
+    ):
+        if mode == "custom" and "file_written" in event:
+            written.append(event["file_written"])
+        elif mode == "updates":
+            final.update(event.get("coder", {}))
+
+    assert written == ["app.py", "util.py"]
+    assert final == {"code": None, "written": ["app.py", "util.py"]}
+    assert (tmp_path / "app.py").read_text() == "print('hello world')\n"
+
+
+def test_per_file_graph_writes_files(fake_file_llms, tmp_path):
+    result = main.graph.invoke({"description": "demo", "output_dir": str(tmp_path)})
+
+    assert sorted(result["written"]) == ["app.py", "util.py"]
+    assert (tmp_path / "util.py").read_text() == "# util.py\n"
+
+
+def test_graph_records_node_and_model_spans(monkeypatch):
+    spans = []
+    tracer = Tracer([Collector(spans)])
+    monkeypatch.setattr(main, "tracer", tracer)
+    monkeypatch.setattr(
+        main, "llm_arch", TracedModel(ScriptedModel(json.dumps(ARCHITECTURE)), tracer)
+    )
+    monkeypatch.setattr(main, "llm_code", TracedModel(ScriptedModel(file_code), tracer))
+    monkeypatch.setattr(
+        main, "architecture_output", StructuredOutput(main.ArchitectureSpec, tracer=tracer)
+    )
+
+    with tracer.span("seed", kind="run"):
+        main.build_graph().invoke({"description": "demo"})
+
+    root = spans[-1]
+    nodes = {(s.name, s.attributes.get("path")): s for s in spans if s.kind == "node"}
+    assert set(nodes) == {
+        ("architect", None),
+        ("file_coder", "app.py"),
+        ("file_coder", "util.py"),
+        ("validate", None),
+        ("assemble", None),
+    }
+    assert all(s.parent_id == root.span_id for s in nodes.values())
+    assert all(s.attributes["attempt"] == 1 for s in nodes.values())
+
+    models = [s for s in spans if s.kind == "model"]
+    assert sorted(s.name for s in models) == ["invoke", "stream", "stream"]
+    parents = {s.span_id: s for s in spans}
+    assert {parents[s.parent_id].name for s in models} == {"structured", "file_coder"}
+    (parse,) = [s for s in spans if s.kind == "parse"]
+    assert parents[parse.parent_id].name == "architect"
+    assert parse.attributes["parse_failures"] == 0
+    assert all("ttft" in s.attributes for s in models if s.name == "stream")
+
+
+def test_graph_traces_retried_file_coder(monkeypatch):
+    spans = []
+    tracer = Tracer([Collector(spans)])
+    monkeypatch.setattr(main, "tracer", tracer)
+    failures = {"util.py": 1}
+
+    def flaky(prompt):
+        path = re.search(r'File to generate:\s*\{"path":\s*"([^"]+)"', prompt).group(1)
+        if failures.get(path):
+            failures[path] -= 1
+            raise ConnectionError("backend went away")
+        return file_code(prompt)
+
+    monkeypatch.setattr(main, "llm_arch", ScriptedModel(json.dumps(ARCHITECTURE)))
+    monkeypatch.setattr(main, "llm_code", ScriptedModel(flaky))
+
+    result = main.build_graph().invoke({"description": "demo"})
+
+    assert "# util.py" in result["code"]
+    util = [s for s in spans if s.attributes.get("path") == "util.py"]
+    assert [(s.status, s.attributes["attempt"]) for s in util] == [("error", 1), ("ok", 2)]
+    assert util[-1].attributes["retries"] == 1
+
+
+def test_architect_repairs_and_reasks(monkeypatch):
+    broken = "Here you go:\n```json\n" + json.dumps(ARCHITECTURE)[:-1] + ",}\n```"
+    responses = iter(["not json at all", broken])
+    arch = ScriptedModel(lambda prompt: next(responses))
+    monkeypatch.setattr(main, "llm_arch", arch)
+    monkeypatch.setattr(main, "llm_code", ScriptedModel(file_code))
+    output = StructuredOutput(main.ArchitectureSpec)
+    monkeypatch.setattr(main, "architecture_output", output)
+
+    result = main.build_graph().invoke({"description": "demo"})
+
+    assert result["architecture"].project_name == "demo"
+    assert arch.calls == 2
+    stats = output.stats()
+    assert (stats.parse_failures, stats.reasks, stats.repaired) == (1, 1, 1)
+
+
+def test_pipelined_graph_codes_files_while_planning(monkeypatch):
+    """The first file's coder starts before the architect's stream has finished."""
+    events = []
+
+    class SlowArchitect(ScriptedModel):
+        def stream(self, prompt):
+            for chunk in super().stream(prompt):
+                time.sleep(0.002)
+                yield chunk
+            events.append(("architect done", time.perf_counter()))
+
+    class RecordingCoder(ScriptedModel):
+        def stream(self, prompt):
+            events.append(("coder start", time.perf_counter()))
+            yield from super().stream(prompt)
+
+    monkeypatch.setattr(main, "llm_arch", SlowArchitect(json.dumps(ARCHITECTURE, indent=2)))
+    monkeypatch.setattr(main, "llm_code", RecordingCoder(file_code))
+
+    custom = []
+    result = None
+    for mode, event in main.build_graph(pipelined=True).stream(
+        {"description": "demo"}, stream_mode=["custom", "values"]
+    ):
+        if mode == "custom":
+            custom.append(event)
+        else:
+            result = event
+
+    assert result["code"] == "FILE: app.py\n# app.py\n\nFILE: util.py\n# util.py\n"
+    assert [e["file_spec"] for e in custom if "file_spec" in e] == ["app.py", "util.py"]
+    assert events[0][0] == "coder start"
+    assert [name for name, _ in events].count("coder start") == 2
+    assert main.llm_code.calls == 2
+
+
+def test_pipelined_architect_reasks_after_an_invalid_escape(monkeypatch):
+    broken = json.dumps(ARCHITECTURE).replace("entrypoint", "C:\\proj")
+    responses = iter([broken, json.dumps(ARCHITECTURE)])
+    arch = ScriptedModel(lambda prompt: next(responses))
+    monkeypatch.setattr(main, "llm_arch", arch)
+    monkeypatch.setattr(main, "llm_code", ScriptedModel(file_code))
+
+    result = main.build_graph(pipelined=True, validate=False).invoke({"description": "demo"})
+
+    assert result["code"] == "FILE: app.py\n# app.py\n\nFILE: util.py\n# util.py\n"
+    assert arch.calls == 2
+
+
+def test_pipelined_graph_recodes_changed_files(monkeypatch, tmp_path):
+    """Specs repaired after streaming replace what was coded early."""
+    dropped = {"path": "old.py", "description": "gone", "responsibilities": "none"}
+    streamed = dict(ARCHITECTURE, files=ARCHITECTURE["files"] + [dropped])
+    final = dict(
+        ARCHITECTURE,
+        files=[
+            {"path": "app.py", "description": "entrypoint v2", "responsibilities": "serve"},
+            ARCHITECTURE["files"][1],
+        ],
+    )
+    responses = iter([json.dumps(streamed)[:-1] + "!!", json.dumps(final)])
+    monkeypatch.setattr(main, "llm_arch", ScriptedModel(lambda prompt: next(responses)))
+    monkeypatch.setattr(
+        main,
+        "llm_code",
+        ScriptedModel(lambda p: file_code(p).replace("# ", "# v2 " if "v2" in p else "# ")),
+    )
+
+    result = main.build_graph(pipelined=True).invoke(
+        {"description": "demo", "output_dir": str(tmp_path)}
+    )
+
+    assert [f.path for f in result["architecture"].files] == ["app.py", "util.py"]
+    assert "v2" in (tmp_path / "app.py").read_text()
+    assert sorted(result["written"]) == ["app.py", "util.py"]
+    assert not (tmp_path / "old.py").exists()
+    assert main.llm_code.calls == 4
+
+
+class SignallingSaver(SqliteSaver):
+    """Sets `saved` once the write of the `watch` file is committed."""
+
+    def __init__(self, path, watch: str) -> None:
+        super().__init__(path)
+        self.watch = watch
+        self.saved = threading.Event()
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        super().put_writes(config, writes, task_id, task_path)
+        for channel, value in writes:
+            if channel == "files" and any(f["path"] == self.watch for f in value):
+                self.saved.set()
+
+
+def test_pipelined_graph_recodes_files_whose_dependencies_came_later(monkeypatch):
+    """A file coded before its dependency was planned is coded again with it."""
+    files = [
+        {"path": "app.py", "description": "entrypoint, uses util.py", "responsibilities": "serve"},
+        ARCHITECTURE["files"][1],
+    ]
+    prompts = []
+
+    def record(prompt):
+        prompts.append(prompt)
+        return file_code(prompt)
+
+    architecture = dict(ARCHITECTURE, files=files)
+    monkeypatch.setattr(main, "llm_arch", ScriptedModel(json.dumps(architecture)))
+    monkeypatch.setattr(main, "llm_code", ScriptedModel(record))
+
+    result = main.build_graph(pipelined=True, validate=False).invoke({"description": "demo"})
+
+    assert result["code"] == "FILE: app.py\n# app.py\n\nFILE: util.py\n# util.py\n"
+    app = [p for p in prompts if re.search(r'File to generate:\s*\{"path":\s*"app.py"', p)]
+    assert len(app) == 2
+    assert "helpers" not in app[0] and "helpers" in app[1]
+
+
+def test_checkpointed_graph_resumes_after_failure(monkeypatch, tmp_path):
+    failures = {"util.py": 1}
+    saver = SignallingSaver(tmp_path / "state.sqlite", watch="app.py")
+
+    def flaky(prompt):
+        path = re.search(r'File to generate:\s*\{"path":\s*"([^"]+)"', prompt).group(1)
+        if failures.get(path):
+            failures[path] -= 1
+            # Fail once app.py is saved; a failing task cancels unfinished siblings.
+            assert saver.saved.wait(5)
+            raise ConnectionError("backend went away")
+        return file_code(prompt)
+
+    architect = ScriptedModel(json.dumps(ARCHITECTURE))
+    coder = ScriptedModel(flaky)
+    monkeypatch.setattr(main, "llm_arch", architect)
+    monkeypatch.setattr(main, "llm_code", coder)
+    monkeypatch.setattr(main, "FILE_CODER_RETRY", RetryPolicy(max_attempts=1))
+    graph = main.build_graph(checkpointer=saver)
+    inputs = {"description": "demo"}
+    config = main.run_config(inputs)
+
+    with pytest.raises(ConnectionError):
+        graph.invoke(main.start_or_resume(graph, inputs, config), config)
+    assert main.start_or_resume(graph, inputs, config) is None
+
+    # A new process picks the run up from the same file.
+    graph = main.build_graph(checkpointer=SqliteSaver(tmp_path / "state.sqlite"))
+    result = graph.invoke(main.start_or_resume(graph, inputs, config), config)
+
+    assert result["code"] == "FILE: app.py\n# app.py\n\nFILE: util.py\n# util.py\n"
+    # Neither the architect nor the file that succeeded ran again.
+    assert (architect.calls, coder.calls) == (1, 3)
+
+    assert main.start_or_resume(graph, inputs, config) == inputs
+    assert graph.invoke(inputs, config)["code"] == result["code"]
+
+
+def test_pipelined_graph_resumes_without_the_architect(monkeypatch, tmp_path):
+    # util.py fails in the architect node and in its file_coder task.
+    failures = {"util.py": 2}
+
+    def flaky(prompt):
+        path = re.search(r'File to generate:\s*\{"path":\s*"([^"]+)"', prompt).group(1)
+        if failures.get(path):
+            failures[path] -= 1
+            raise ConnectionError("backend went away")
+        return file_code(prompt)
+
+    architect = ScriptedModel(json.dumps(ARCHITECTURE))
+    coder = ScriptedModel(flaky)
+    monkeypatch.setattr(main, "llm_arch", architect)
+    monkeypatch.setattr(main, "llm_code", coder)
+    monkeypatch.setattr(main, "FILE_CODER_RETRY", RetryPolicy(max_attempts=1))
+    graph = main.build_graph(
+        pipelined=True, checkpointer=SqliteSaver(tmp_path / "state.sqlite")
+    )
+    inputs = {"description": "demo"}
+    config = main.run_config(inputs)
+
+    with pytest.raises(ConnectionError):
+        graph.invoke(main.start_or_resume(graph, inputs, config), config)
+    assert main.start_or_resume(graph, inputs, config) is None
+    result = graph.invoke(None, config)
+
+    assert result["code"] == "FILE: app.py\n# app.py\n\nFILE: util.py\n# util.py\n"
+    # Only util.py's file_coder task ran again.
+    assert (architect.calls, coder.calls) == (1, 4)
+
+
+def test_pipelined_graph_hands_failed_files_to_file_coder(monkeypatch):
+    failures = {"util.py": 1}
+
+    def flaky(prompt):
+        path = re.search(r'File to generate:\s*\{"path":\s*"([^"]+)"', prompt).group(1)
+        if failures.get(path):
+            failures[path] -= 1
+            raise ConnectionError("backend went away")
+        return file_code(prompt)
+
+    monkeypatch.setattr(main, "llm_arch", ScriptedModel(json.dumps(ARCHITECTURE)))
+    monkeypatch.setattr(main, "llm_code", ScriptedModel(flaky))
+
+    custom = []
+    result = None
+    for mode, event in main.build_graph(pipelined=True).stream(
+        {"description": "demo"}, stream_mode=["custom", "values"]
+    ):
+        if mode == "custom":
+            custom.append(event)
+        else:
+            result = event
+
+    assert result["code"] == "FILE: app.py\n# app.py\n\nFILE: util.py\n# util.py\n"
+    assert [e["path"] for e in custom if e["node"] == "architect" and "error" in e] == ["util.py"]
+    assert main.llm_code.calls == 3
+
+
+def test_pipelined_files_are_stored_under_their_final_key(monkeypatch, tmp_path):
+    # Files planned before the project-wide fields are coded without them.
+    text = json.dumps({"files": ARCHITECTURE["files"], **ARCHITECTURE})
+    coder = ScriptedModel(file_code)
+    monkeypatch.setattr(main, "llm_arch", ScriptedModel(text))
+    monkeypatch.setattr(main, "llm_code", coder)
+    monkeypatch.setattr(main, "file_store", GeneratedFileStore(tmp_path / "state.sqlite"))
+
+    main.build_graph(pipelined=True, validate=False).invoke({"description": "demo"})
+    assert coder.calls == 4
+    main.build_graph(validate=False).invoke({"description": "demo"})
+
+    # The map-reduce rerun, keyed by the final architecture, reuses both.
+    assert coder.calls == 4
+
+
+def test_rerun_regenerates_only_changed_files(monkeypatch, tmp_path):
+    coder = ScriptedModel(file_code)
+    monkeypatch.setattr(main, "llm_code", coder)
+    monkeypatch.setattr(main, "file_store", GeneratedFileStore(tmp_path / "state.sqlite"))
+    monkeypatch.setattr(main, "llm_arch", ScriptedModel(json.dumps(ARCHITECTURE)))
+    main.build_graph().invoke({"description": "demo"})
+
+    files = [ARCHITECTURE["files"][0], dict(ARCHITECTURE["files"][1], description="more")]
+    monkeypatch.setattr(
+        main, "llm_arch", ScriptedModel(json.dumps(dict(ARCHITECTURE, files=files)))
+    )
+    reused = []
+    for mode, event in main.build_graph().stream(
+        {"description": "demo, slightly changed", "output_dir": str(tmp_path)},
+        stream_mode=["custom"],
+    ):
+        if event.get("reused"):
+            reused.append(event["path"])
+
+    assert reused == ["app.py"]
+    assert coder.calls == 3
+    assert (tmp_path / "app.py").read_text() == "# app.py\n"
+
+
+def test_rerun_regenerates_files_whose_dependencies_changed(monkeypatch, tmp_path):
+    prompts = {}
+
+    def record(prompt):
+        prompts[re.search(r'File to generate:\n\{"path":"([^"]+)"', prompt).group(1)] = prompt
+        return file_code(prompt)
+
+    coder = ScriptedModel(record)
+    monkeypatch.setattr(main, "llm_code", coder)
+    monkeypatch.setattr(main, "file_store", GeneratedFileStore(tmp_path / "state.sqlite"))
+
+    def run(util_description):
+        files = [
+            dict(ARCHITECTURE["files"][0], dependencies=["util.py"]),
+            dict(ARCHITECTURE["files"][1], description=util_description),
+            {"path": "README.md", "description": "docs", "responsibilities": "explain"},
+        ]
+        architecture = json.dumps(dict(ARCHITECTURE, files=files))
+        monkeypatch.setattr(main, "llm_arch", ScriptedModel(architecture))
+        events = main.build_graph().stream({"description": "demo"}, stream_mode=["custom"])
+        return [event["path"] for _, event in events if event.get("reused")]
+
+    run("helpers")
+    assert 'Depends on:\n{"description":"helpers"' in prompts["app.py"]
+    assert "Depends on" not in prompts["README.md"]
+
+    assert run("more helpers") == ["README.md"]
+    assert coder.calls == 5
+
+
+def test_slicing_can_be_turned_off(monkeypatch):
+    prompts = []
+
+    def record(prompt):
+        prompts.append(prompt)
+        return file_code(prompt)
+
+    monkeypatch.setattr(main, "context_builder", None)
+    monkeypatch.setattr(main, "llm_arch", ScriptedModel(json.dumps(ARCHITECTURE)))
+    monkeypatch.setattr(main, "llm_code", ScriptedModel(record))
+    main.build_graph(per_file=True).invoke({"description": "demo"})
+
+    assert all('Files:\n{"path":"app.py"' in prompt for prompt in prompts)
+
+
+def test_only_invalid_files_are_repaired(monkeypatch, tmp_path):
+    prompts = []
+
+    def code(prompt):
+        prompts.append(prompt)
+        if "util.py" in file_code(prompt) and "Previous attempt" not in prompt:
+            return "def helper(:\n"
+        return file_code(prompt)
+
+    monkeypatch.setattr(main, "llm_arch", ScriptedModel(json.dumps(ARCHITECTURE)))
+    monkeypatch.setattr(main, "llm_code", ScriptedModel(code))
+    events = []
+    result = None
+    for mode, event in main.build_graph().stream(
+        {"description": "demo", "output_dir": str(tmp_path)}, stream_mode=["custom", "values"]
+    ):
+        if mode == "custom":
+            events.append(event)
+        else:
+            result = event
+
+    assert len(prompts) == 3
+    assert "Error:\nline 1: invalid syntax" in prompts[-1]
+    assert "Previous attempt:\ndef helper(:" in prompts[-1]
+    assert [e["path"] for e in events if e.get("node") == "repair" and "round" in e] == ["util.py"]
+    assert result["invalid"] == {} and result["repair_rounds"] == 1
+    assert result["code"] == "FILE: app.py\n# app.py\n\nFILE: util.py\n# util.py\n"
+    assert (tmp_path / "util.py").read_text() == "# util.py\n"
+    assert sorted(result["written"]) == ["app.py", "util.py"]
+
+
+def test_repair_rounds_are_bounded(monkeypatch):
+    monkeypatch.setattr(main, "llm_arch", ScriptedModel(json.dumps(ARCHITECTURE)))
+    monkeypatch.setattr(main, "llm_code", ScriptedModel("x = (\n"))
+
+    result = main.build_graph(repair_rounds=1).invoke({"description": "demo"})
+
+    assert sorted(result["invalid"]) == ["app.py", "util.py"]
+    assert result["repair_rounds"] == 1
+    assert main.llm_code.calls == 4
+    assert result["code"] == "FILE: app.py\nx = (\n\nFILE: util.py\nx = (\n"
+
+
+def test_hedge_sits_above_the_response_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "response_cache", ResponseCache(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(main, "HEDGE_BACKUPS", ["http://backup:11434"])
+    model, layers = main.get_llm("gpt"), []
+    while model is not None:
+        layers.append(type(model).__name__)
+        model = getattr(model, "inner", None)
+
+    # A backup's answer must not be cached under the primary's key.
+    assert layers.index("HedgedModel") < layers.index("CachedModel")
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from evocore.seed.v1.spec_stream import JsonArrayStream
+
+DOCUMENT = {
+    "project_name": "demo",
+    "tech_stack": {"files": [{"path": "not-this"}]},
+    "files": [
+        {"path": "a.py", "description": 'braces {[ and "quotes" ]}'},
+        {"path": "b.py", "meta": {"files": [{"path": "nested"}]}},
+    ],
+    "other": [{"path": "nope"}],
+}
+
+
+@pytest.mark.parametrize("size", [1, 3, 17, 10_000])
+def test_emits_top_level_array_items_as_they_close(size):
+    text = json.dumps(DOCUMENT, indent=2)
+    stream = JsonArrayStream("files")
+    emitted = []
+    for i in range(0, len(text), size):
+        emitted.append(stream.feed(text[i : i + size]))
+
+    assert [item for items in emitted for item in items] == DOCUMENT["files"]
+    assert stream.text() == text
+    assert stream.fields() == {k: v for k, v in DOCUMENT.items() if k != "files"}
+
+
+def test_item_is_emitted_on_its_closing_brace():
+    text = json.dumps({"files": [{"path": "a.py"}, {"path": "b.py"}]})
+    stream = JsonArrayStream("files")
+    end = text.index("}") + 1
+
+    assert stream.feed(text[: end - 1]) == []
+    assert stream.feed(text[end - 1 : end]) == [{"path": "a.py"}]
+    assert stream.feed(text[end:]) == [{"path": "b.py"}]
+
+
+def test_escaped_quotes_and_unicode_keys():
+    text = '{"fi\\u006ces": [{"path": "a\\"}.py"}]}'
+    stream = JsonArrayStream("files")
+
+    assert stream.feed(text) == [{"path": 'a"}.py'}]
+
+
+def test_fields_appear_once_their_value_is_complete():
+    stream = JsonArrayStream("files")
+
+    stream.feed('{"name": "de')
+    assert stream.fields() == {}
+    stream.feed('mo", "tags": ["a", {"b": [1, ","]}]')
+    assert stream.fields() == {"name": "demo"}
+    stream.feed(', "files": [')
+    assert stream.fields() == {"name": "demo", "tags": ["a", {"b": [1, ","]}]}
+
+
+def test_invalid_strings_drop_their_item():
+    text = (
+        '{"project_name": "C:\\proj", "bad\\q": 1, "project_type": "tool", "files": ['
+        '{"path": "a.py", "description": "in C:\\proj"}, '
+        '{"path": "b.py", "description": "two\nlines"}, '
+        '{"path": "c.py"}]}'
+    )
+    stream = JsonArrayStream("files")
+
+    items = [item for char in text for item in stream.feed(char)]
+
+    assert items == [{"path": "c.py"}]
+    assert stream.fields() == {"project_type": "tool"}
@@ -0,0 +1,139 @@
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+from evocore.seed.v1.validate import check_file, run_tests, validate_files
+
+
+@pytest.mark.parametrize(
+    "path, code, error",
+    [
+        ("app.py", "def f(:\n    pass\n", "line 1: invalid syntax\n    def f(:"),
+        ("app.py", "def f():\n    return 1\n", None),
+        ("config.json", '{"a": 1,}', "line 1: Illegal trailing comma before end of object"),
+        ("pyproject.toml", '[project]\nname = "x"\n', None),
+        ("pyproject.toml", "name = ", "Invalid value (at end of document)"),
+        ("README.md", "def f(:", None),
+    ],
+)
+def test_check_file(path, code, error):
+    assert check_file(path, code) == error
+
+
+def test_check_yaml():
+    pytest.importorskip("yaml")
+    assert check_file(".github/workflows/ci.yml", "on: [push\n") is not None
+    assert check_file("ci.yaml", "on: [push]\n") is None
+
+
+def test_validate_files_reports_only_failures():
+    files = {f"pkg/m{i}.py": f"x = {i}\n" for i in range(8)}
+    files["pkg/broken.py"] = "x = (\n"
+    files["settings.json"] = "{}"
+
+    errors = validate_files(files)
+
+    assert list(errors) == ["pkg/broken.py"]
+    assert "'(' was never closed" in errors["pkg/broken.py"]
+    assert validate_files({}) == {}
+
+
+PROJECT = {
+    "app/__init__.py": "",
+    "app/calc.py": "def add(a, b):\n    return a - b\n",
+    "app/text.py": "def shout(s):\n    return s.upper()\n",
+    "tests/test_calc.py": (
+        "from app.calc import add\n\n\ndef test_add():\n    assert add(1, 2) == 3\n"
+    ),
+    "tests/test_text.py": (
+        "from app import text\n\n\ndef test_shout():\n    assert text.shout('a') == 'A'\n"
+    ),
+}
+
+
+@pytest.fixture
+def allow_tests(monkeypatch):
+    monkeypatch.setenv("EVOCORE_RUN_GENERATED_TESTS", "1")
+
+
+def test_generated_tests_need_opt_in(monkeypatch):
+    monkeypatch.delenv("EVOCORE_RUN_GENERATED_TESTS", raising=False)
+
+    with pytest.raises(RuntimeError, match="EVOCORE_RUN_GENERATED_TESTS"):
+        run_tests(PROJECT)
+
+
+def test_failing_tests_are_blamed_on_the_code_they_import(allow_tests):
+    errors = validate_files(PROJECT, tests=True)
+
+    assert list(errors) == ["app/calc.py"]
+    assert "assert -1 == 3" in errors["app/calc.py"]
+    fixed = dict(PROJECT, **{"app/calc.py": "def add(a, b):\n    return a + b\n"})
+    assert run_tests(fixed) == {}
+
+
+def test_tests_only_run_on_files_that_compile(allow_tests):
+    broken = dict(PROJECT, **{"app/text.py": "def shout(s:\n"})
+
+    assert list(validate_files(broken, tests=True)) == ["app/text.py"]
+
+
+def test_hanging_tests_time_out(allow_tests):
+    files = {"test_slow.py": "import time\n\n\ndef test_slow():\n    time.sleep(30)\n"}
+
+    assert run_tests(files, timeout=2) == {"test_slow.py": "tests timed out after 2s"}
+
+
+def test_generated_tests_run_sandboxed(allow_tests, tmp_path):
+    outside = tmp_path / "outside.txt"
+    sandboxed = f"""import os
+import socket
+import subprocess
+import sys
+
+import pytest
+
+
+def test_no_network():
+    with pytest.raises(PermissionError):
+        socket.create_connection(("127.0.0.1", 9), timeout=1)
+
+
+def test_no_processes():
+    with pytest.raises(PermissionError):
+        subprocess.run([sys.executable, "-c", "pass"])
+
+
+def test_writes_stay_inside():
+    with pytest.raises(PermissionError):
+        open({str(outside)!r}, "w")
+    with open("inside.txt", "w") as f:
+        f.write("ok")
+
+
+def test_memory_is_limited():
+    with pytest.raises(MemoryError):
+        bytearray(8 * 1024**3)
+"""
+
+    assert run_tests({"test_sandbox.py": sandboxed}) == {}
+    assert not outside.exists()
+
+
+def test_checks_do_not_rerun_the_entry_script(tmp_path):
+    script = tmp_path / "script.py"
+    script.write_text(
+        "from evocore.seed.v1.validate import validate_files\n"
+        "print(sorted(validate_files({'a.py': 'x = (', 'b.py': 'x = 1'})))\n"
+    )
+    root = pathlib.Path(__file__).resolve().parents[2]
+    env = {"PATH": "", "PYTHONPATH": str(root)}
+
+    result = subprocess.run(
+        [sys.executable, str(script)], cwd=tmp_path, env=env, capture_output=True, text=True
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == "['a.py']\n"